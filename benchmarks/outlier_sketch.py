@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark the sketched outlier boundaries against exact pandas quantiles
+
+Synthetic rows are modelled on the Telco `MonthlyCharges` and `TotalCharges`
+columns and generated chunk by chunk. The sketches are built per partition,
+across a process pool with `--workers`, then merged.
+
+Example: `python benchmarks/outlier_sketch.py --rows 1e6 1e7 --workers 4`.
+The exact baseline holds the full columns in memory, about 16 bytes per row,
+so skip it with `--no-exact` for 10^8 rows on small machines.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from packages.outlier_handling import OutlierSketch
+
+
+COLUMNS = ['MonthlyCharges', 'TotalCharges']
+QUANTILES = [0.25, 0.75]
+
+
+def make_chunk(index, size, seed=42):
+    """
+    Make a chunk of customers shaped like the Telco charges
+    """
+    rng = np.random.default_rng([seed, index])
+
+    # a cluster of phone only customers and a wide band of internet customers
+    phone_only = rng.random(size) < 0.22
+    monthly = np.where(phone_only, rng.normal(20, 1.5, size), rng.uniform(45, 118, size))
+    tenure = rng.integers(0, 73, size)
+
+    # new customers have no total charges yet
+    total = monthly * tenure * rng.normal(1, 0.05, size)
+    total[tenure == 0] = np.nan
+
+    return pd.DataFrame({'MonthlyCharges': monthly, 'TotalCharges': total})
+
+
+def sketch_partition(args):
+    """
+    Build the sketch of a range of chunks
+    """
+    start, stop, chunksize, k = args
+    state = OutlierSketch(k=k, seed=start)
+    for index in range(start, stop):
+        state.update(make_chunk(index, chunksize))
+    return state
+
+
+def run(rows, chunksize, workers, k, exact=True):
+    """
+    Time the sketches and the exact quantiles over `rows` rows
+
+    Returns
+    -------
+    list
+        Result of each column
+    """
+
+    n_chunks = max(int(rows) // chunksize, 1)
+    bounds = np.linspace(0, n_chunks, workers + 1).astype(int)
+    partitions = [(start, stop, chunksize, k) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+    # sketches over the partitions, merged into one
+    start = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            states = list(executor.map(sketch_partition, partitions))
+    else:
+        states = [sketch_partition(partition) for partition in partitions]
+    state = states[0]
+    for other in states[1:]:
+        state.merge(other)
+    sketch_seconds = time.perf_counter() - start
+
+    results = []
+    for pos, col in enumerate(state.columns):
+        sketch = state.sketches[pos]
+        results.append({
+            'rows': n_chunks * chunksize,
+            'column': col,
+            'sketch_seconds': sketch_seconds,
+            'sketch_items': sum(len(compactor) for compactor in sketch.compactors),
+            'q1_sketch': sketch.quantile(QUANTILES)[0],
+            'q3_sketch': sketch.quantile(QUANTILES)[1],
+        })
+
+    if not exact:
+        return results
+
+    # exact quantiles need every row in memory
+    start = time.perf_counter()
+    data = pd.concat([make_chunk(index, chunksize) for index in range(n_chunks)], ignore_index=True)
+    generate_seconds = time.perf_counter() - start
+
+    for result in results:
+        column = data[result['column']]
+
+        start = time.perf_counter()
+        q1, q3 = column.quantile(QUANTILES)
+        exact_seconds = time.perf_counter() - start
+
+        # rank error of the sketched quartiles, as a fraction of the rows
+        values = np.sort(column.dropna().to_numpy())
+        ranks = np.searchsorted(values, [result['q1_sketch'], result['q3_sketch']]) / len(values)
+
+        result.update({
+            'exact_seconds': exact_seconds + generate_seconds,
+            'q1_exact': q1,
+            'q3_exact': q3,
+            'max_rank_error': float(np.max(np.abs(ranks - QUANTILES))),
+        })
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=float, nargs='+', default=[1e6, 1e7])
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, default=1, help='processes building the partition sketches')
+    parser.add_argument('-k', type=int, default=200, help='size of the quantile sketches')
+    parser.add_argument('--no-exact', action='store_true', help='skip the exact in-memory baseline')
+    args = parser.parse_args()
+
+    results = []
+    for rows in args.rows:
+        chunksize = min(args.chunksize, int(rows))
+        results += run(rows, chunksize, args.workers, args.k, exact=not args.no_exact)
+
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(pd.DataFrame(results).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,15 +3,12 @@
 
 from flask import Flask, request, jsonify
 
-import joblib
+import os
+import json
 import numpy as np
-import pandas as pd
-from pathlib import Path
 
-from tensorflow import keras
-
-from packages.imputation_handling import impute_total_charges
-from packages.imputation_handling import impute_no_phone_internet
+from packages.model_registry import ModelRegistry, MODEL_NAMES
+from packages.prediction_cache import PredictionCache, canonical_key
 
 
 app = Flask(__name__)
@@ -22,26 +19,336 @@ LABEL = ["Not Churn", "Churn"]
 # set threshold for prediction
 THRESHOLD = 0.5
 
+# input features expected for every customer
+FEATURES = [
+    "gender", "SeniorCitizen", "Partner", "Dependents", "tenure",
+    "PhoneService", "MultipleLines", "InternetService", "OnlineSecurity",
+    "OnlineBackup", "DeviceProtection", "TechSupport", "StreamingTV",
+    "StreamingMovies", "Contract", "PaperlessBilling", "PaymentMethod",
+    "MonthlyCharges", "TotalCharges"
+]
+
+# numeric features, TotalCharges may be null and is imputed later
+NUMERIC_FEATURES = ["tenure", "MonthlyCharges", "TotalCharges"]
+NULLABLE_FEATURES = ["TotalCharges"]
+
+# inference engine, either 'keras', 'function', 'numpy', 'tflite', 'npz', or 'gather'.
+# 'npz', 'gather' and 'tflite' are served with requirements.txt, the others need
+# TensorFlow and scikit-learn from requirements-export.txt
+INFERENCE_ENGINE = os.environ.get("INFERENCE_ENGINE", "npz")
+
+# weights of the 'gather' engine, either 'float32', 'float16', or 'int8'
+INFERENCE_PRECISION = os.environ.get("INFERENCE_PRECISION", "float32")
+
+# model loading, either 'preload' to load at import or 'lazy' to load on first use
+MODEL_LOADING = os.environ.get("MODEL_LOADING", "lazy")
+
+# prediction cache, size 0 disables it
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "4096"))
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", "300"))
+
 # model location
 model_dir = 'models'
 scaler_name = 'scaler.pkl'
 encoder_name = 'encoder.pkl'
-model_name = 'keras_model.h5'
+model_name = MODEL_NAMES.get(INFERENCE_ENGINE, 'keras_model.h5')
+
+# create model registry
+registry = ModelRegistry(
+    model_dir,
+    INFERENCE_ENGINE,
+    scaler_name=scaler_name,
+    encoder_name=encoder_name,
+    model_name=model_name,
+    precision=INFERENCE_PRECISION
+)
+
+# load model before gunicorn forks the workers
+if MODEL_LOADING == "preload":
+    registry.preload()
+
+# create prediction cache
+cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+
+
+def parse_batch(req):
+    """
+    Parse the body of a batch request
+
+    Parameters
+    ----------
+    req : flask.Request
+        Request with either a JSON array or NDJSON body
+
+    Returns
+    -------
+    list
+        List of customers, one item per row. A line of an NDJSON body that is
+        not valid JSON is kept as the ValueError raised when parsing it, and
+        reported by `validate_batch` as the error of its row
+    """
+
+    # NDJSON body, one customer per line
+    if req.mimetype in ("application/x-ndjson", "application/ndjson"):
+        lines = req.get_data(as_text=True).splitlines()
+        return [parse_line(line) for line in lines if line.strip()]
+
+    content = req.get_json(force=True)
+    if not isinstance(content, list):
+        raise ValueError("batch body must be a JSON array of customers")
+
+    return content
+
+
+def parse_line(line):
+    """
+    Parse a line of an NDJSON body, returning the error instead of raising it
+    """
+
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return ValueError(f"invalid JSON: {e}")
+
+
+def known_categories():
+    """
+    Get the categories the encoder knows for each categorical feature
+
+    Returns
+    -------
+    dict
+        Lookup of the known categories of each feature, special keywords included
+    """
+
+    pipeline, _ = registry.get()
+
+    return dict(pipeline.categorical)
+
+
+def parse_threshold(value):
+    """
+    Parse an optional prediction threshold
+
+    Parameters
+    ----------
+    value : float or str or None
+        Threshold sent by the client
+
+    Returns
+    -------
+    float
+        Threshold, THRESHOLD when not specified
+    """
+
+    if value is None:
+        return THRESHOLD
+
+    threshold = float(value)
+    if not 0 <= threshold <= 1:
+        raise ValueError("threshold must be between 0 and 1")
+
+    return threshold
+
+
+def top_k(proba, k):
+    """
+    Get the positions of the k highest probabilities, highest first
+
+    Parameters
+    ----------
+    proba : numpy.ndarray
+        Churn probabilities
+    k : int
+        Number of positions to return
+
+    Returns
+    -------
+    numpy.ndarray
+        Positions of the k highest probabilities
+    """
+
+    k = min(k, len(proba))
+    if k <= 0:
+        return np.array([], dtype=np.intp)
+
+    # partial partition, then sort only the top k
+    top = np.argpartition(-proba, k - 1)[:k]
+
+    return top[np.argsort(-proba[top], kind="stable")]
+
+
+def validate_batch(content, categories=None):
+    """
+    Validate every row of a batch and keep track of the errors
+
+    Parameters
+    ----------
+    content : list
+        Raw customers, see `parse_batch`
+    categories : dict
+        Known categories of each categorical feature, see `known_categories`
+
+    Returns
+    -------
+    valid_idx : list
+        Positions of the valid customers in the batch
+    records : list
+        Valid customers with the input features only
+    errors : list
+        Validation error of each invalid customer
+    """
+
+    valid_idx = []
+    records = []
+    errors = []
+    for i, row in enumerate(content):
+        try:
+            # NDJSON line that is not valid JSON
+            if isinstance(row, Exception):
+                raise row
+
+            records.append(validate_record(row, categories))
+            valid_idx.append(i)
+        except Exception as e:
+            errors.append({"index": i, "success": False, "message": str(e)})
+
+    return valid_idx, records, errors
+
+
+def validate_record(content, categories=None):
+    """
+    Validate a single customer and keep only the input features
+
+    Parameters
+    ----------
+    content : dict
+        Raw customer data
+    categories : dict
+        Known categories of each categorical feature, see `known_categories`
+
+    Returns
+    -------
+    dict
+        Customer data with the input features only
+    """
+
+    if not isinstance(content, dict):
+        raise ValueError("customer must be a JSON object")
 
-# create path object
-scaler_path = Path(model_dir, scaler_name)
-encoder_path = Path(model_dir, encoder_name)
-model_path = Path(model_dir, model_name)
+    # check missing features
+    missing = [feat for feat in FEATURES if feat not in content]
+    if missing:
+        raise ValueError(f"missing features: {', '.join(missing)}")
+
+    # check numeric features
+    for feat in NUMERIC_FEATURES:
+        value = content[feat]
+        if value is None and feat in NULLABLE_FEATURES:
+            continue
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"{feat} must be a number")
+
+    # check categorical features
+    if categories is not None:
+        check_categories(content, categories)
+
+    return {feat: content[feat] for feat in FEATURES}
+
+
+def check_categories(content, categories):
+    """
+    Check that every categorical feature of a customer is a known category
+
+    Parameters
+    ----------
+    content : dict
+        Raw customer data
+    categories : dict
+        Known categories of each categorical feature, see `known_categories`
+    """
+
+    for feat, known in categories.items():
+        value = content[feat]
+        try:
+            is_known = not isinstance(value, bool) and value in known
+        except TypeError:
+            is_known = False
+        if not is_known:
+            raise ValueError(f"unknown {feat}: {value!r}")
+
+
+def predict_proba(records):
+    """
+    Run the whole inference pipeline once over many customers
+
+    Parameters
+    ----------
+    records : list
+        List of validated customers
+
+    Returns
+    -------
+    numpy.ndarray
+        Churn probability of each customer
+    """
+
+    pipeline, engine = registry.get()
+
+    # impute, scale and encode all rows at once
+    encoded_data = pipeline.transform(records)
+
+    # predict all rows at once
+    return engine.predict(encoded_data)
+
+
+def predict_one(record):
+    """
+    Predict a single customer, using the prediction cache when enabled
+
+    Parameters
+    ----------
+    record : dict
+        Customer data with the input features only
+
+    Returns
+    -------
+    float
+        Churn probability of the customer
+    """
+
+    if cache.maxsize <= 0:
+        pipeline, engine = registry.get()
+        return float(engine.predict(pipeline.transform_record(record)[np.newaxis])[0])
+
+    # drop cached results when the model artifacts changed
+    pipeline, engine = registry.get(check_version=True)
+    cache.validate(registry.version)
+
+    key = canonical_key(record)
+    proba = cache.get(key)
+    if proba is None:
+        # impute, scale and encode data as a float32 row
+        encoded_data = pipeline.transform_record(record)[np.newaxis]
+        proba = float(engine.predict(encoded_data)[0])
+        cache.set(key, proba)
+
+    return proba
 
-# load model
-scaler = joblib.load(scaler_path)
-encoder = joblib.load(encoder_path)
-model = keras.models.load_model(model_path)
 
 @app.route("/")
 def welcome():
     return "<h3>This is the Backend for My Modeling Program</h3>"
 
+@app.route("/ready")
+def ready():
+    status = registry.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+@app.route("/cache")
+def cache_stats():
+    return jsonify(cache.stats()), 200
+
 @app.route("/predict", methods=["GET", "POST"])
 def predict():
     if request.method == "POST":
@@ -70,29 +377,22 @@ def predict():
                 "TotalCharges": content["TotalCharges"]
             }
 
-            # convert to dataframe
-            new_data = pd.DataFrame([new_data])
-
-            # impute missing values
-            prepared_data = impute_total_charges(new_data)
+            # reject categories unknown to the encoder
+            check_categories(new_data, known_categories())
 
-            # impute no phone service and no internet service with no
-            prepared_data = impute_no_phone_internet(prepared_data)
-
-            # scale data
-            scaled_data = scaler.transform(prepared_data)
-
-            # encode data and cast it as float32
-            encoded_data = encoder.transform(scaled_data).astype(np.float32)
+            # use the threshold of the request if any
+            threshold = parse_threshold(content.get("threshold"))
 
             # predict and store result
-            res = model.predict(encoded_data).reshape(-1)
-            res = np.where(res > THRESHOLD, 1, 0)
+            proba = predict_one(new_data)
+            res = int(proba > threshold)
 
             # convert result to dictionary
             result = {
-                "class": str(res[0]),
-                "class_name": LABEL[res[0]]
+                "class": str(res),
+                "class_name": LABEL[res],
+                "probability": proba,
+                "threshold": threshold
             }
 
             # jsonify result
@@ -116,4 +416,105 @@ def predict():
     # return dari get method
     return "<p>Please use the POST method to predict <em>inference model</em></p>"
 
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    try:
+        content = parse_batch(request)
+        threshold = parse_threshold(request.args.get("threshold"))
+        categories = known_categories()
+    except Exception as e:
+        response = jsonify(
+            success=False,
+            message=str(e)
+        )
+
+        # return response
+        return response, 400
+
+    # validate each row and keep track of the errors
+    results = [None] * len(content)
+    valid_idx, records, errors = validate_batch(content, categories)
+    for error in errors:
+        results[error["index"]] = error
+
+    # run every stage once over the valid rows
+    if records:
+        try:
+            proba = predict_proba(records)
+        except Exception as e:
+            response = jsonify(
+                success=False,
+                message=str(e)
+            )
+
+            # return response
+            return response, 400
+
+        res = np.where(proba > threshold, 1, 0)
+        for i, p, c in zip(valid_idx, proba, res):
+            results[i] = {
+                "index": i,
+                "success": True,
+                "result": {
+                    "class": str(c),
+                    "class_name": LABEL[c],
+                    "probability": float(p)
+                }
+            }
+
+    # jsonify result
+    response = jsonify(
+        success=True,
+        results=results
+    )
+
+    # return response
+    return response, 200
+
+@app.route("/rank", methods=["POST"])
+def rank():
+    try:
+        content = parse_batch(request)
+        threshold = parse_threshold(request.args.get("threshold"))
+        k = int(request.args.get("k", 10))
+        if k < 1:
+            raise ValueError("k must be at least 1")
+
+        valid_idx, records, errors = validate_batch(content, known_categories())
+
+        # score every valid row, then keep the k riskiest customers
+        results = []
+        if records:
+            proba = predict_proba(records)
+            for pos in top_k(proba, k):
+                i = valid_idx[pos]
+                p = float(proba[pos])
+                res = int(p > threshold)
+                results.append({
+                    "index": i,
+                    "customerID": content[i].get("customerID"),
+                    "probability": p,
+                    "class": str(res),
+                    "class_name": LABEL[res]
+                })
+
+    except Exception as e:
+        response = jsonify(
+            success=False,
+            message=str(e)
+        )
+
+        # return response
+        return response, 400
+
+    # jsonify result
+    response = jsonify(
+        success=True,
+        results=results,
+        errors=errors
+    )
+
+    # return response
+    return response, 200
+
 # app.run(debug=True)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ASGI variant of the backend with micro-batching of concurrent /predict calls
+
+Run it with `uvicorn asgi_app:app` or
+`gunicorn -k uvicorn.workers.UvicornWorker asgi_app:app`.
+"""
+
+import os
+import asyncio
+import contextlib
+
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, JSONResponse
+from starlette.routing import Route
+
+from app import LABEL, FEATURES, registry, parse_threshold, check_categories
+from packages.micro_batcher import MicroBatcher
+
+
+# micro-batching flush window
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "64"))
+BATCH_MAX_WAIT_US = int(os.environ.get("BATCH_MAX_WAIT_US", "2000"))
+
+
+def predict_rows(rows):
+    _, engine = registry.get()
+    return engine.predict(rows)
+
+
+batcher = MicroBatcher(predict_rows, BATCH_MAX_SIZE, BATCH_MAX_WAIT_US)
+
+
+async def welcome(request):
+    return HTMLResponse("<h3>This is the Backend for My Modeling Program</h3>")
+
+
+async def ready(request):
+    status = registry.status()
+    status["batching"] = batcher.stats()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+async def predict(request):
+    if request.method == "POST":
+        try:
+            content = await request.json()
+
+            # create dictionary to store input data
+            new_data = {feat: content[feat] for feat in FEATURES}
+
+            # reject categories unknown to the encoder
+            pipeline, _ = registry.get()
+            check_categories(new_data, dict(pipeline.categorical))
+
+            # use the threshold of the request if any
+            threshold = parse_threshold(content.get("threshold"))
+
+            # impute, scale and encode data as a float32 row
+            encoded_data = pipeline.transform_record(new_data)
+
+            # predict together with the concurrent requests
+            proba = await batcher.predict(encoded_data)
+            res = int(proba > threshold)
+
+            # convert result to dictionary
+            result = {
+                "class": str(res),
+                "class_name": LABEL[res],
+                "probability": proba,
+                "threshold": threshold
+            }
+
+            # return response
+            return JSONResponse({"success": True, "result": result}, status_code=200)
+
+        except Exception as e:
+            # return response
+            return JSONResponse({"success": False, "message": str(e)}, status_code=400)
+
+    # return dari get method
+    return HTMLResponse("<p>Please use the POST method to predict <em>inference model</em></p>")
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # load and warm up the model before serving
+    await asyncio.get_running_loop().run_in_executor(None, registry.warm_up)
+    batcher.start()
+    yield
+    await batcher.stop()
+
+
+app = Starlette(
+    routes=[
+        Route("/", welcome),
+        Route("/ready", ready),
+        Route("/predict", predict, methods=["GET", "POST"]),
+    ],
+    lifespan=lifespan
+)
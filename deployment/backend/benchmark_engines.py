@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark the inference engines for start-up, memory, latency and parity
+
+Each engine runs in a fresh process, as a worker would: the start-up time
+covers importing, loading the artifacts and the first prediction, and the
+memory is the peak RSS of that process. Every engine then scores the
+customers of the CSV file one at a time and in a single batch, and its
+probabilities are compared with the Keras engine.
+
+Example: `python benchmark_engines.py --engines keras numpy tflite`
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+
+def read_customers(path, limit=None):
+    """
+    Read the customers of the Telco churn CSV as the records the API receives
+    """
+    records = []
+    with open(path, newline="") as file:
+        for row in csv.DictReader(file):
+            row["SeniorCitizen"] = int(row["SeniorCitizen"])
+            row["tenure"] = float(row["tenure"])
+            row["MonthlyCharges"] = float(row["MonthlyCharges"])
+            row["TotalCharges"] = float(row["TotalCharges"]) if row["TotalCharges"].strip() else None
+            records.append(row)
+            if limit and len(records) >= limit:
+                break
+
+    return records
+
+
+def run_engine(engine_kind, model_dir, data_path, n_single):
+    """
+    Measure one engine in the current process
+
+    Returns
+    -------
+    dict
+        Measurements and the probabilities of every customer
+    """
+
+    start = time.perf_counter()
+
+    # import, load and warm up as a worker does
+    from packages.model_registry import ModelRegistry
+
+    registry = ModelRegistry(model_dir, engine_kind)
+    registry.warm_up()
+    startup = time.perf_counter() - start
+    startup_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    import numpy as np
+
+    records = read_customers(data_path)
+    pipeline, engine = registry.get()
+
+    # one customer per call
+    latencies = []
+    for record in records[:n_single]:
+        tic = time.perf_counter()
+        engine.predict(pipeline.transform_record(record)[np.newaxis])
+        latencies.append(time.perf_counter() - tic)
+
+    # every customer at once
+    tic = time.perf_counter()
+    proba = engine.predict(pipeline.transform(records))
+    batch = time.perf_counter() - tic
+
+    return {
+        "engine": engine_kind,
+        "tensorflow_imported": "tensorflow" in sys.modules,
+        "startup_s": startup,
+        "startup_rss_mb": startup_rss / 1024,
+        "p50_us": float(np.percentile(latencies, 50) * 1e6),
+        "p99_us": float(np.percentile(latencies, 99) * 1e6),
+        "batch_rows": len(records),
+        "batch_ms": batch * 1e3,
+        "proba": proba.astype(float).tolist(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", nargs="+", default=["keras", "function", "numpy", "tflite", "npz", "gather"])
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument("--data", default="../../data/WA_Fn-UseC_-Telco-Customer-Churn.csv")
+    parser.add_argument("--n-single", type=int, default=1000, help="customers scored one at a time")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_engine(args.child, args.model_dir, args.data, args.n_single)))
+        return
+
+    # the Keras engine is the reference of the parity check
+    engines = ["keras"] + [kind for kind in args.engines if kind != "keras"]
+
+    results = []
+    for kind in engines:
+        command = [
+            sys.executable, __file__, "--child", kind, "--model-dir", args.model_dir,
+            "--data", args.data, "--n-single", str(args.n_single)
+        ]
+        env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL="3", PYTHONWARNINGS="ignore")
+        output = subprocess.run(command, capture_output=True, text=True, check=True, env=env).stdout
+        results.append(json.loads(output.splitlines()[-1]))
+
+    reference = results[0]["proba"]
+    print(f"{'engine':>8} {'tf':>5} {'startup s':>10} {'RSS MB':>8} {'p50 us':>8} {'p99 us':>8} "
+          f"{'batch ms':>9} {'max diff':>9}")
+    for result in results:
+        if result["engine"] not in args.engines:
+            continue
+        max_diff = max(abs(a - b) for a, b in zip(reference, result["proba"]))
+        print(f"{result['engine']:>8} {str(result['tensorflow_imported']):>5} {result['startup_s']:>10.2f} "
+              f"{result['startup_rss_mb']:>8.1f} {result['p50_us']:>8.1f} {result['p99_us']:>8.1f} "
+              f"{result['batch_ms']:>9.2f} {max_diff:>9.2g}")
+    print(f"batch of {results[0]['batch_rows']} customers, {args.n_single} single customer calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Check the reduced precision inference modes against the float32 model
+
+The customers of the held-out test split of the training (20%, stratified,
+random state 42) are scored by the dense float32 `NumpyChurnModel` and by
+the `GatherChurnModel` in each precision. The check fails, with exit status
+1, when the accuracy or the ROC AUC of a mode moves by more than its
+tolerance from the float32 model. `export_model.py` runs the same check
+before writing churn_model.npz.
+
+Example: `python check_precision.py --precisions float16 int8 --accuracy-tol 0.005 --auc-tol 0.002`
+"""
+
+import sys
+import argparse
+
+from packages.numpy_model import NumpyChurnModel, PRECISIONS
+from packages.precision_check import held_out_split, check_precisions, failed_precisions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default="../../data/WA_Fn-UseC_-Telco-Customer-Churn.csv")
+    parser.add_argument("--model", default="models/churn_model.npz", help=".npz model written by export_model.py")
+    parser.add_argument("--precisions", nargs="+", choices=PRECISIONS, default=list(PRECISIONS))
+    parser.add_argument("--accuracy-tol", type=float, default=0.005, help="largest change of accuracy allowed")
+    parser.add_argument("--auc-tol", type=float, default=0.005, help="largest change of ROC AUC allowed")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    args = parser.parse_args()
+
+    model = NumpyChurnModel.load(args.model)
+    data, y = held_out_split(args.data)
+
+    results = check_precisions(model, data, y, args.precisions, args.accuracy_tol, args.auc_tol, args.threshold)
+
+    print(f"{'mode':>16} {'accuracy':>9} {'auc':>7} {'max diff':>9} {'weights':>8} {'check':>6}")
+    for result in results:
+        weight_bytes = "" if result["weight_bytes"] is None else result["weight_bytes"]
+        print(f"{result['mode']:>16} {result['accuracy']:>9.4f} {result['auc']:>7.4f} {result['max_diff']:>9.2g} "
+              f"{weight_bytes:>8} {'ok' if result['passed'] else 'FAIL':>6}")
+    print(f"{len(y)} held-out customers, tolerances: accuracy {args.accuracy_tol}, auc {args.auc_tol}")
+
+    if failed_precisions(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Export the Keras model and its preprocessing to a lightweight serving artifact
+
+- tflite: the scaler is folded into the first layer and the compiled
+  pipeline is written to churn_pipeline.npz, served with
+  `INFERENCE_ENGINE=tflite` through `tflite_runtime` without TensorFlow or
+  scikit-learn
+- npz: the Dense weights, scaler means and scales and encoder category tables
+  in one memory-mappable file, served with `INFERENCE_ENGINE=npz` without
+  importing TensorFlow or scikit-learn, refused when its float16 or int8
+  gather modes lose accuracy or ROC AUC, see `check_precision.py`
+
+The manifest of the directory is written last, the backend only reloads a
+set of artifacts that matches it. Run the export after changing any artifact.
+
+The export needs requirements-export.txt, serving only requirements.txt.
+
+Example: `python export_model.py --format npz --model-dir models`
+"""
+
+import time
+import argparse
+
+from packages.model_export import export_tflite, export_npz, write_manifest
+
+
+# exporter and default file name of each format
+FORMATS = {
+    "tflite": (export_tflite, "churn_model.tflite"),
+    "npz": (export_npz, "churn_model.npz"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=list(FORMATS), nargs="+", default=list(FORMATS))
+    parser.add_argument("--model-dir", default="models", help="directory of the scaler, encoder and Keras model")
+    parser.add_argument("--no-verify", action="store_true", help="skip the parity check against the Keras model")
+    parser.add_argument("--data", default="../../data/WA_Fn-UseC_-Telco-Customer-Churn.csv",
+                        help="Telco churn CSV for the precision check of the npz format")
+    parser.add_argument("--no-precision-check", action="store_true", help="skip the precision check")
+    args = parser.parse_args()
+
+    # options of the exporters that take them
+    options = {"npz": {} if args.no_precision_check else {"data_path": args.data}}
+
+    for fmt in args.format:
+        export, output_name = FORMATS[fmt]
+
+        start = time.perf_counter()
+        path = export(args.model_dir, output_name, verify=not args.no_verify, **options.get(fmt, {}))
+        print(f"{path} written in {time.perf_counter() - start:.2f}s, {path.stat().st_size} bytes")
+
+    # the new set of artifacts is complete
+    print(f"{write_manifest(args.model_dir)} written")
+
+
+if __name__ == "__main__":
+    main()
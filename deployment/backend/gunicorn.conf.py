@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Gunicorn settings for the backend
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+
+# share the preloaded artifacts with the workers through copy-on-write
+preload_app = os.environ.get("MODEL_LOADING", "lazy") == "preload"
+
+
+def post_worker_init(worker):
+    """
+    Load and warm up the model in each worker before it accepts requests
+    """
+    from app import registry
+
+    seconds = registry.warm_up()
+    worker.log.info("Worker %s warmed up in %.2fs", worker.pid, seconds)
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Bursty load test for the /predict endpoint
+
+Start the server to test first, e.g. `gunicorn -c gunicorn.conf.py app:app` or
+`uvicorn asgi_app:app --port 5000`, then run
+`python loadtest.py --url http://127.0.0.1:5000/predict --concurrency 64`.
+"""
+
+import json
+import time
+import random
+import argparse
+import http.client
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+# payloads spanning the categories the frontend sends
+CUSTOMERS = [
+    {
+        "gender": "Female", "SeniorCitizen": 0, "Partner": "Yes", "Dependents": "No",
+        "tenure": 12, "PhoneService": "No", "MultipleLines": "No phone service",
+        "InternetService": "Fiber optic", "OnlineSecurity": "No", "OnlineBackup": "No",
+        "DeviceProtection": "No", "TechSupport": "No", "StreamingTV": "No",
+        "StreamingMovies": "No", "Contract": "Month-to-month", "PaperlessBilling": "Yes",
+        "PaymentMethod": "Electronic check", "MonthlyCharges": 50, "TotalCharges": 600,
+    },
+    {
+        "gender": "Male", "SeniorCitizen": 0, "Partner": "No", "Dependents": "No",
+        "tenure": 41, "PhoneService": "Yes", "MultipleLines": "Yes",
+        "InternetService": "No", "OnlineSecurity": "No internet service",
+        "OnlineBackup": "No internet service", "DeviceProtection": "No internet service",
+        "TechSupport": "No internet service", "StreamingTV": "No internet service",
+        "StreamingMovies": "No internet service", "Contract": "Month-to-month",
+        "PaperlessBilling": "Yes", "PaymentMethod": "Bank transfer (automatic)",
+        "MonthlyCharges": 25.25, "TotalCharges": 996.45,
+    },
+]
+
+
+def make_payload(rng):
+    """
+    Make a customer with random numeric features so the cache is not hit
+    """
+    customer = dict(rng.choice(CUSTOMERS))
+    customer["tenure"] = rng.randint(0, 72)
+    customer["MonthlyCharges"] = round(rng.uniform(18, 120), 2)
+    customer["TotalCharges"] = round(customer["MonthlyCharges"] * max(customer["tenure"], 1), 2)
+    return json.dumps(customer)
+
+
+def run(url, concurrency, requests_per_worker, seed=42):
+    """
+    Send requests from `concurrency` clients at once and time each of them
+
+    Parameters
+    ----------
+    url : str
+        URL of the /predict endpoint
+    concurrency : int
+        Number of concurrent clients
+    requests_per_worker : int
+        Number of requests sent by each client
+    seed : int
+        Random seed for the payloads
+
+    Returns
+    -------
+    dict
+        Throughput and latency percentiles
+    """
+
+    target = urlparse(url)
+    start_barrier = threading.Barrier(concurrency)
+
+    def client(worker_id):
+        rng = random.Random(seed + worker_id)
+        payloads = [make_payload(rng) for _ in range(requests_per_worker)]
+        conn = http.client.HTTPConnection(target.hostname, target.port or 80)
+        latencies = []
+        errors = 0
+
+        # start every client at the same time to create a burst
+        start_barrier.wait()
+        for payload in payloads:
+            start = time.perf_counter()
+            conn.request("POST", target.path, payload, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            latencies.append(time.perf_counter() - start)
+            errors += response.status != 200
+
+        conn.close()
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(client, range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies = np.concatenate([np.asarray(lat) for lat, _ in results]) * 1000
+    total = len(latencies)
+
+    return {
+        "requests": total,
+        "errors": sum(err for _, err in results),
+        "seconds": elapsed,
+        "throughput_rps": total / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5000/predict")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=50, help="requests per client")
+    args = parser.parse_args()
+
+    result = run(args.url, args.concurrency, args.requests)
+    for key, value in result.items():
+        print(f"{key:>15}: {value:.2f}" if isinstance(value, float) else f"{key:>15}: {value}")
+
+
+if __name__ == "__main__":
+    main()
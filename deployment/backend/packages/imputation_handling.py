@@ -2,16 +2,30 @@
 # -*- coding: utf-8 -*-
 
 import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
 
 """
 Useful functions to handle missing values
 """
 
+# special keywords for customers without phone or internet service
+NO_SERVICE_MAP = {
+    'No internet service': 'No',
+    'No phone service': 'No',
+}
 
-def prepare_imputation(data, variable, *args):
+# columns where the special keywords appear
+NO_SERVICE_COLS = [
+    'MultipleLines', 'OnlineSecurity', 'OnlineBackup', 'DeviceProtection',
+    'TechSupport', 'StreamingTV', 'StreamingMovies'
+]
+
+
+def prepare_imputation(data, variable, *args, inplace=False):
     """
     Prepare data for imputation
-    
+
     Parameters
     ----------
     data : pandas.DataFrame
@@ -20,22 +34,36 @@ def prepare_imputation(data, variable, *args):
         List of columns to be imputed
     *args :
         List of special keywords representing the missing values
+    inplace : bool
+        Modify `data` instead of returning a copy. Categorical columns keep their dtype
 
     Returns
     -------
     pandas.DataFrame
         Dataframe prepared for imputation
     """
-    
+
     if data is None or variable is None:
         raise ValueError('data and variable must be specified')
 
-    # replace missval with nan for features in impute_cols
+    # prepare output dataframe
+    output_data = data if inplace else data.copy()
+
+    # replace missval with nan for features in impute_cols, one pass per column
     for col in variable:
-        for missval in args:
-            data[col] = data[col].replace(missval, np.nan)
-    
-    return data
+        series = output_data[col]
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # removing the categories turns their values into nan without upcasting
+            missvals = [missval for missval in args if missval in series.cat.categories]
+            if missvals:
+                output_data[col] = series.cat.remove_categories(missvals)
+        else:
+            mask = series.isin(args)
+            if mask.any():
+                output_data[col] = series.mask(mask, np.nan)
+
+    return output_data
 
 
 def impute_na(data, variable, mean_value, median_value):
@@ -48,7 +76,7 @@ def impute_na(data, variable, mean_value, median_value):
         Dataframe to be imputed
     variable : str
         Column to be imputed
-    mean_value : float  
+    mean_value : float
         Mean value to be used for imputation
     median_value : float
         Median value to be used for imputation
@@ -59,11 +87,14 @@ def impute_na(data, variable, mean_value, median_value):
         Dataframe with imputed values
     """
 
-    data[variable+'_mean'] = data[variable].fillna(mean_value)
-    data[variable+'_median'] = data[variable].fillna(median_value)
-    data[variable+'_zero'] = data[variable].fillna(0)
+    # prepare output dataframe
+    output_data = data.copy()
 
-    return data
+    output_data[variable+'_mean'] = output_data[variable].fillna(mean_value)
+    output_data[variable+'_median'] = output_data[variable].fillna(median_value)
+    output_data[variable+'_zero'] = output_data[variable].fillna(0)
+
+    return output_data
 
 
 def impute_total_charges(data):
@@ -85,11 +116,106 @@ def impute_total_charges(data):
     return data
 
 
-def impute_no_phone_internet(data):
+def merge_categories(series, mapping):
+    """
+    Rename the categories of a categorical Series, merging the ones that end up equal
+
+    Parameters
+    ----------
+    series : pandas.Series
+        Categorical Series
+    mapping : dict
+        Old category to new category
+
+    Returns
+    -------
+    pandas.Series
+        Categorical Series with the renamed categories
+    """
+
+    categories = series.cat.categories
+    renamed = [mapping.get(cat, cat) for cat in categories]
+
+    # a plain rename when no categories collide
+    if len(set(renamed)) == len(renamed):
+        return series.cat.rename_categories(renamed)
+
+    # otherwise remap the codes onto the merged categories
+    new_categories = pd.Index(renamed).unique()
+    code_map = new_categories.get_indexer(renamed)
+    codes = series.cat.codes.to_numpy()
+    new_codes = np.where(codes >= 0, code_map[codes], -1)
+
+    return pd.Series(
+        pd.Categorical.from_codes(new_codes, new_categories, ordered=series.cat.ordered),
+        index=series.index,
+        name=series.name
+    )
+
+
+def impute_no_phone_internet(data, variable=None):
     """
     Handle cardinality of categorical features
+
+    Replace 'No internet service' and 'No phone service' with 'No' in a single
+    pass over the affected columns only
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Dataframe to be imputed
+    variable : list
+        List of columns to be imputed. Defaults to the phone and internet service columns
+
+    Returns
+    -------
+    pandas.DataFrame
+        Dataframe with imputed values
     """
-    data = data.replace('No internet service', 'No')
-    data = data.replace('No phone service', 'No')
 
-    return data
+    if variable is None:
+        variable = [col for col in NO_SERVICE_COLS if col in data.columns]
+
+    # group the special keywords by their replacement
+    replacements = {}
+    for missval, value in NO_SERVICE_MAP.items():
+        replacements.setdefault(value, []).append(missval)
+
+    # shallow copy, only the imputed columns are replaced
+    output_data = data.copy(deep=False)
+
+    for col in variable:
+        series = output_data[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            output_data[col] = merge_categories(series, NO_SERVICE_MAP)
+        else:
+            for value, missvals in replacements.items():
+                series = series.mask(series.isin(missvals), value)
+            output_data[col] = series
+
+    return output_data
+
+
+class NoPhoneInternetImputer(BaseEstimator, TransformerMixin):
+    """
+    Scikit-learn transformer for `impute_no_phone_internet`
+
+    Parameters
+    ----------
+    variable : list
+        List of columns to be imputed. Defaults to the phone and internet service columns
+    """
+
+    def __init__(self, variable=None):
+        self.variable = variable
+
+    def fit(self, X, y=None):
+        if self.variable is None:
+            self.variable_ = [col for col in NO_SERVICE_COLS if col in X.columns]
+        else:
+            self.variable_ = list(self.variable)
+
+        return self
+
+    def transform(self, X):
+        return impute_no_phone_internet(X, self.variable_)
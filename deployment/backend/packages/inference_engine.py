@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Low overhead inference engines for the churn model
+"""
+
+import threading
+
+import numpy as np
+
+
+def _relu(x):
+    return np.maximum(x, 0)
+
+
+def _sigmoid(x):
+    with np.errstate(over='ignore'):
+        return 1 / (1 + np.exp(-x))
+
+
+def _linear(x):
+    return x
+
+
+ACTIVATIONS = {
+    'relu': _relu,
+    'sigmoid': _sigmoid,
+    'tanh': np.tanh,
+    'linear': _linear,
+}
+
+
+class KerasEngine:
+    """
+    Predict with `keras.Model.predict`, the reference path
+    """
+
+    name = 'keras'
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, data):
+        """
+        Predict churn probabilities
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            Encoded features as float32, one row per customer
+
+        Returns
+        -------
+        numpy.ndarray
+            Churn probability of each customer
+        """
+        return self.model.predict(data, batch_size=max(len(data), 1), verbose=0).reshape(-1)
+
+
+class FunctionEngine:
+    """
+    Predict with a `tf.function` traced once for a fixed input signature
+    """
+
+    name = 'function'
+
+    def __init__(self, model):
+        import tensorflow as tf
+
+        self.model = model
+        self.n_features = model.input_shape[-1]
+
+        # trace the forward pass once for any batch size
+        self._call = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec([None, self.n_features], tf.float32)]
+        )
+
+    def predict(self, data):
+        """
+        Predict churn probabilities
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            Encoded features as float32, one row per customer
+
+        Returns
+        -------
+        numpy.ndarray
+            Churn probability of each customer
+        """
+        data = np.asarray(data, dtype=np.float32)
+        return self._call(data).numpy().reshape(-1)
+
+
+class NumpyEngine:
+    """
+    Predict with the Dense layer weights as plain NumPy matmuls
+    """
+
+    name = 'numpy'
+
+    def __init__(self, model):
+        self.layers = []
+
+        for layer in model.layers:
+            config = layer.get_config()
+            class_name = layer.__class__.__name__
+
+            # dropout is the identity at inference time
+            if class_name in ('Dropout', 'InputLayer'):
+                continue
+            if class_name != 'Dense':
+                raise ValueError(f'Unsupported layer for numpy engine: {class_name}')
+            if config['activation'] not in ACTIVATIONS:
+                raise ValueError(f'Unsupported activation for numpy engine: {config["activation"]}')
+
+            weights = layer.get_weights()
+            kernel = weights[0].astype(np.float32)
+            bias = weights[1].astype(np.float32) if config['use_bias'] else None
+            self.layers.append((kernel, bias, ACTIVATIONS[config['activation']]))
+
+    def predict(self, data):
+        """
+        Predict churn probabilities
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            Encoded features as float32, one row per customer
+
+        Returns
+        -------
+        numpy.ndarray
+            Churn probability of each customer
+        """
+        output = np.asarray(data, dtype=np.float32)
+        for kernel, bias, activation in self.layers:
+            output = output @ kernel
+            if bias is not None:
+                output += bias
+            output = activation(output)
+
+        return output.reshape(-1)
+
+
+class TFLiteEngine:
+    """
+    Predict with the TFLite model written by `packages.model_export.export_tflite`
+
+    The scaling of the numeric features is folded into the model, so it takes
+    the raw numeric values next to the one hot columns. The interpreter comes
+    from `tflite_runtime` when installed, which spares importing TensorFlow.
+
+    Parameters
+    ----------
+    model_path : str or pathlib.Path
+        Location of the TFLite model
+    model_content : bytes
+        TFLite flatbuffer, instead of `model_path`
+    num_threads : int
+        Threads of the interpreter, None lets it decide
+    """
+
+    name = 'tflite'
+
+    def __init__(self, model_path=None, model_content=None, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self.interpreter = Interpreter(
+            model_path=None if model_path is None else str(model_path),
+            model_content=model_content,
+            num_threads=num_threads
+        )
+        self.interpreter.allocate_tensors()
+
+        input_details = self.interpreter.get_input_details()[0]
+        self._input_index = input_details['index']
+        self._output_index = self.interpreter.get_output_details()[0]['index']
+        self.n_features = int(input_details['shape'][-1])
+        self._batch_size = int(input_details['shape'][0])
+
+        # the interpreter holds its tensors, one prediction at a time
+        self._lock = threading.Lock()
+
+    def predict(self, data):
+        """
+        Predict churn probabilities
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            Features as float32, with raw numeric values, one row per customer
+
+        Returns
+        -------
+        numpy.ndarray
+            Churn probability of each customer
+        """
+        data = np.ascontiguousarray(data, dtype=np.float32)
+        if len(data) == 0:
+            return np.empty(0, dtype=np.float32)
+
+        with self._lock:
+            # tensors are only reallocated when the batch size changes
+            if len(data) != self._batch_size:
+                self.interpreter.resize_tensor_input(self._input_index, [len(data), self.n_features])
+                self.interpreter.allocate_tensors()
+                self._batch_size = len(data)
+
+            self.interpreter.set_tensor(self._input_index, data)
+            self.interpreter.invoke()
+            return self.interpreter.get_tensor(self._output_index).reshape(-1)
+
+
+ENGINES = {
+    'keras': KerasEngine,
+    'function': FunctionEngine,
+    'numpy': NumpyEngine,
+    'tflite': TFLiteEngine,
+}
+
+
+def check_parity(engine, model, data, atol=1e-6):
+    """
+    Check that an engine predicts the same probabilities as `model.predict`
+
+    Parameters
+    ----------
+    engine : object
+        Inference engine to check
+    model : keras.Model
+        Reference model
+    data : numpy.ndarray
+        Encoded features as float32
+    atol : float
+        Maximum absolute difference allowed
+
+    Returns
+    -------
+    float
+        Maximum absolute difference found
+    """
+
+    expected = model.predict(data, verbose=0).reshape(-1)
+    actual = engine.predict(data)
+    max_diff = float(np.max(np.abs(expected - actual))) if len(data) else 0.0
+
+    if max_diff > atol:
+        raise ValueError(
+            f'{engine.name} engine does not match model.predict: max difference {max_diff:.3g} > {atol:.3g}'
+        )
+
+    return max_diff
+
+
+def load_engine(model_path, kind='numpy', verify=True, seed=42):
+    """
+    Load the model once and wrap it in an inference engine
+
+    Parameters
+    ----------
+    model_path : str or pathlib.Path
+        Location of the saved Keras model, or of the TFLite model for 'tflite'
+    kind : str
+        Engine to serve predictions with. Either 'keras', 'function', 'numpy', or 'tflite'
+    verify : bool
+        Check the engine against `model.predict` on random one-hot like rows.
+        The TFLite model is checked when exported instead
+    seed : int
+        Random seed for the verification rows
+
+    Returns
+    -------
+    object
+        Inference engine with a `predict` method
+    """
+
+    if kind not in ENGINES:
+        raise ValueError(f'kind must be one of {", ".join(ENGINES)}')
+
+    # served without loading the Keras model
+    if kind == 'tflite':
+        return TFLiteEngine(model_path)
+
+    from tensorflow import keras
+
+    model = keras.models.load_model(model_path)
+    engine = ENGINES[kind](model)
+
+    if verify and kind != 'keras':
+        rng = np.random.default_rng(seed)
+        probe = rng.integers(0, 2, size=(64, model.input_shape[-1])).astype(np.float32)
+        check_parity(engine, model, probe)
+
+    return engine
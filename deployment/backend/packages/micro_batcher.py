@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Coalesce concurrent single row predictions into batched forward passes
+"""
+
+import asyncio
+
+import numpy as np
+
+
+class MicroBatcher:
+    """
+    Queue feature rows and predict them together
+
+    A batch is flushed as soon as it reaches `max_batch_size` rows or
+    `max_wait_us` microseconds after its first row arrived, whichever comes first.
+
+    Parameters
+    ----------
+    predict_fn : callable
+        Function mapping a float32 feature matrix to one probability per row
+    max_batch_size : int
+        Maximum number of rows in one forward pass
+    max_wait_us : int
+        Maximum time in microseconds the first row of a batch waits for others
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_us=2000):
+        if max_batch_size < 1:
+            raise ValueError('max_batch_size must be at least 1')
+
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_us / 1e6
+
+        self.batches = 0
+        self.rows = 0
+
+        self._queue = None
+        self._task = None
+
+    def start(self):
+        """
+        Start the flush loop on the running event loop
+        """
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop the flush loop
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def predict(self, row):
+        """
+        Predict a single feature row
+
+        Parameters
+        ----------
+        row : numpy.ndarray
+            Feature vector as float32
+
+        Returns
+        -------
+        float
+            Churn probability
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((row, future))
+
+        return await future
+
+    async def _collect(self):
+        # wait for the first row, then for the rest of the batch until the deadline
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            # take what is already queued without waiting
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = await self._collect()
+            rows = np.stack([row for row, _ in batch])
+
+            try:
+                # run the forward pass off the event loop
+                proba = await loop.run_in_executor(None, self.predict_fn, rows)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.rows += len(batch)
+            for (_, future), p in zip(batch, proba):
+                if not future.done():
+                    future.set_result(float(p))
+
+    def stats(self):
+        """
+        Get the batching counters
+
+        Returns
+        -------
+        dict
+            Number of batches, rows and mean batch size
+        """
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch_size': self.rows / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_us': self.max_wait * 1e6,
+        }
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Export the churn model and its preprocessing to lightweight serving artifacts
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+from packages.feature_pipeline import CompiledFeaturePipeline
+
+
+# manifest of the artifact set, written last by `write_manifest`
+MANIFEST_NAME = 'manifest.json'
+
+# artifacts listed in the manifest when they exist
+ARTIFACT_NAMES = (
+    'scaler.pkl', 'encoder.pkl', 'keras_model.h5', 'outlier_bounds.json',
+    'churn_model.tflite', 'churn_pipeline.npz', 'churn_model.npz'
+)
+
+
+def _write_atomic(path, write):
+    """
+    Write a file through a temporary file, so workers never load a partial artifact
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def file_digest(path):
+    """
+    BLAKE2b digest of the content of a file
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def write_manifest(model_dir, names=ARTIFACT_NAMES):
+    """
+    Write the digest of every artifact of a directory to its manifest
+
+    The manifest marks a complete set of artifacts: write it after all of
+    them, `packages.model_registry.ModelRegistry` only reloads the artifacts
+    when the manifest changes, and only if they match it.
+
+    Parameters
+    ----------
+    model_dir : str or pathlib.Path
+        Directory of the artifacts
+    names : tuple
+        File names of the artifacts, the missing ones are left out
+
+    Returns
+    -------
+    pathlib.Path
+        Path of the manifest
+    """
+
+    digests = {
+        name: file_digest(Path(model_dir, name))
+        for name in names if Path(model_dir, name).exists()
+    }
+
+    output_path = Path(model_dir, MANIFEST_NAME)
+    _write_atomic(output_path, lambda tmp_path: Path(tmp_path).write_text(json.dumps(digests, indent=2) + '\n'))
+
+    return output_path
+
+
+def load_artifacts(model_dir, scaler_name='scaler.pkl', encoder_name='encoder.pkl',
+                   model_name='keras_model.h5', outlier_bounds_name='outlier_bounds.json'):
+    """
+    Load the fitted scaler and encoder as a compiled pipeline, and the Keras model
+
+    The outlier boundaries are compiled in too when their file exists.
+
+    Returns
+    -------
+    pipeline : CompiledFeaturePipeline
+        Pipeline built from the scaler and encoder
+    model : keras.Model
+        Trained model
+    """
+
+    import joblib
+    from tensorflow import keras
+
+    scaler = joblib.load(Path(model_dir, scaler_name))
+    encoder = joblib.load(Path(model_dir, encoder_name))
+    pipeline = CompiledFeaturePipeline.from_transformers(scaler, encoder)
+
+    outlier_bounds_path = Path(model_dir, outlier_bounds_name)
+    if outlier_bounds_path.exists():
+        pipeline = pipeline.with_outlier_bounds(json.loads(outlier_bounds_path.read_text()))
+
+    return pipeline, keras.models.load_model(Path(model_dir, model_name))
+
+
+def fold_scaler(model, pipeline):
+    """
+    Fold the standard scaling of the numeric features into the first Dense layer
+
+    With x' = (x - mean) / scale, the first layer computes
+    x' @ W + b = x @ (W / scale) + (b - mean / scale @ W), so the folded model
+    takes the raw numeric values next to the one hot columns.
+
+    Parameters
+    ----------
+    model : keras.Model
+        Trained model, starting with a Dense layer
+    pipeline : CompiledFeaturePipeline
+        Pipeline whose numeric columns are scaled
+
+    Returns
+    -------
+    keras.Model
+        Copy of the model with the scaling folded in
+    """
+
+    from tensorflow import keras
+
+    folded = keras.models.clone_model(model)
+    folded.set_weights(model.get_weights())
+
+    first = next(layer for layer in folded.layers if layer.__class__.__name__ != 'InputLayer')
+    if first.__class__.__name__ != 'Dense' or not first.use_bias:
+        raise ValueError('The first layer must be a Dense layer with a bias to fold the scaler into')
+
+    # fold in float64, then round once to float32
+    kernel, bias = (weight.astype(np.float64) for weight in first.get_weights())
+    for _, col, mean, scale in pipeline.numeric:
+        bias -= mean / scale * kernel[col]
+        kernel[col] /= scale
+    first.set_weights([kernel.astype(np.float32), bias.astype(np.float32)])
+
+    return folded
+
+
+def check_folded_parity(folded_predict, model, pipeline, n_rows=256, atol=1e-5, seed=42):
+    """
+    Check a model taking raw numeric values against the Keras model on scaled ones
+
+    Parameters
+    ----------
+    folded_predict : callable
+        Prediction function of the folded model, taking raw float32 features
+    model : keras.Model
+        Reference model
+    pipeline : CompiledFeaturePipeline
+        Pipeline of the reference model
+    n_rows : int
+        Number of random customers to check
+    atol : float
+        Maximum absolute difference allowed
+    seed : int
+        Random seed of the customers
+
+    Returns
+    -------
+    float
+        Maximum absolute difference found
+    """
+
+    rng = np.random.default_rng(seed)
+
+    # random customers, with numeric values around the fitted range
+    raw = np.zeros((n_rows, pipeline.n_features), dtype=np.float32)
+    for _, col, mean, scale in pipeline.numeric:
+        raw[:, col] = rng.normal(mean, 2 * scale, n_rows)
+    for _, lookup in pipeline.categorical:
+        cols = sorted(set(lookup.values()))
+        raw[np.arange(n_rows), rng.choice(cols, n_rows)] = 1
+
+    scaled = raw.copy()
+    for _, col, mean, scale in pipeline.numeric:
+        scaled[:, col] = (raw[:, col].astype(np.float64) - mean) / scale
+
+    expected = model.predict(scaled, verbose=0).reshape(-1)
+    actual = np.asarray(folded_predict(raw)).reshape(-1)
+    max_diff = float(np.max(np.abs(expected - actual)))
+
+    if max_diff > atol:
+        raise ValueError(f'Exported model does not match the Keras model: max difference {max_diff:.3g} > {atol:.3g}')
+
+    return max_diff
+
+
+def export_tflite(model_dir, output_name='churn_model.tflite', verify=True,
+                  pipeline_name='churn_pipeline.npz', **names):
+    """
+    Convert the Keras model, with the scaler folded in, to a TFLite flatbuffer
+
+    The one hot lookup of the categories stays in `CompiledFeaturePipeline`,
+    the builtin TFLite ops have no string lookup tables. The exported model
+    takes the raw numeric values followed by the one hot columns, see
+    `CompiledFeaturePipeline.without_scaling`. The pipeline is written next
+    to it, see `packages.numpy_model.pipeline_to_arrays`, so the model is
+    served with neither scikit-learn nor joblib.
+
+    Parameters
+    ----------
+    model_dir : str or pathlib.Path
+        Directory of the scaler, encoder and Keras model, where the TFLite model is written
+    output_name : str
+        File name of the TFLite model
+    verify : bool
+        Check the TFLite model against the Keras model, and the pipeline loaded back
+        from its file against the scaler and encoder, before writing them
+    pipeline_name : str
+        File name of the compiled feature pipeline
+    **names
+        File names of the artifacts, see `load_artifacts`
+
+    Returns
+    -------
+    pathlib.Path
+        Path of the TFLite model
+    """
+
+    import tensorflow as tf
+    from packages.inference_engine import TFLiteEngine
+    from packages.numpy_model import load_npz_mmap, pipeline_from_arrays, pipeline_to_arrays
+
+    pipeline, model = load_artifacts(model_dir, **names)
+    folded = fold_scaler(model, pipeline)
+
+    flatbuffer = tf.lite.TFLiteConverter.from_keras_model(folded).convert()
+
+    if verify:
+        check_folded_parity(TFLiteEngine(model_content=flatbuffer).predict, model, pipeline)
+
+    def write_pipeline(tmp_path):
+        with open(tmp_path, 'wb') as file:
+            np.savez(file, **pipeline_to_arrays(pipeline))
+
+        if verify:
+            loaded = pipeline_from_arrays(load_npz_mmap(tmp_path))
+            for attr in ('numeric', 'categorical', 'n_features', 'handle_unknown', 'bounds'):
+                if getattr(loaded, attr) != getattr(pipeline, attr):
+                    raise ValueError(f'Exported pipeline does not match the scaler and encoder: {attr}')
+
+    # the feature pipeline the model is served with
+    _write_atomic(Path(model_dir, pipeline_name), write_pipeline)
+
+    output_path = Path(model_dir, output_name)
+    _write_atomic(output_path, lambda tmp_path: Path(tmp_path).write_bytes(flatbuffer))
+
+    return output_path
+
+
+def export_npz(model_dir, output_name='churn_model.npz', verify=True, data_path=None,
+               accuracy_tol=0.005, auc_tol=0.005, **names):
+    """
+    Write the Dense layers and the compiled pipeline to one uncompressed .npz file
+
+    The file is loaded by `packages.numpy_model.NumpyChurnModel.load`, which
+    memory-maps it and needs neither TensorFlow nor scikit-learn. With
+    `data_path`, the file is only swapped in when the reduced precisions of
+    the gather engine pass `packages.precision_check.check_precisions`.
+
+    Parameters
+    ----------
+    model_dir : str or pathlib.Path
+        Directory of the scaler, encoder and Keras model, where the .npz file is written
+    output_name : str
+        File name of the .npz file
+    verify : bool
+        Check the model loaded back from the file against the Keras model before swapping it in
+    data_path : str or pathlib.Path
+        Telco churn CSV, whose held-out customers check the reduced precisions
+    accuracy_tol : float
+        Largest change of accuracy allowed for a reduced precision
+    auc_tol : float
+        Largest change of ROC AUC allowed for a reduced precision
+    **names
+        File names of the artifacts, see `load_artifacts`
+
+    Returns
+    -------
+    pathlib.Path
+        Path of the .npz file
+    """
+
+    from packages.inference_engine import check_parity
+    from packages.numpy_model import NumpyChurnModel
+
+    pipeline, model = load_artifacts(model_dir, **names)
+    arrays = NumpyChurnModel.from_keras(model, pipeline).to_arrays()
+
+    def write(tmp_path):
+        # np.savez adds the extension to a path, not to a file
+        with open(tmp_path, 'wb') as file:
+            np.savez(file, **arrays)
+
+        if verify:
+            loaded = NumpyChurnModel.load(tmp_path)
+            for attr in ('numeric', 'categorical', 'n_features', 'handle_unknown', 'bounds'):
+                if getattr(loaded.pipeline, attr) != getattr(pipeline, attr):
+                    raise ValueError(f'Exported pipeline does not match the scaler and encoder: {attr}')
+
+            rng = np.random.default_rng(42)
+            probe = rng.integers(0, 2, size=(256, pipeline.n_features)).astype(np.float32)
+            check_parity(loaded, model, probe)
+
+        # refuse a model whose reduced precisions lose accuracy or ROC AUC
+        if data_path is not None:
+            from packages.numpy_model import PRECISIONS
+            from packages.precision_check import held_out_split, check_precisions, failed_precisions
+
+            data, y = held_out_split(data_path)
+            precisions = [precision for precision in PRECISIONS if precision != 'float32']
+            results = check_precisions(NumpyChurnModel.load(tmp_path), data, y, precisions, accuracy_tol, auc_tol)
+            failed = failed_precisions(results)
+            if failed:
+                raise ValueError(f'Exported model fails the precision check: {", ".join(failed)}')
+
+    output_path = Path(model_dir, output_name)
+    _write_atomic(output_path, write)
+
+    return output_path
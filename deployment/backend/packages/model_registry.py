@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Lazy, fork-safe registry for the model artifacts
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+
+from packages.feature_pipeline import CompiledFeaturePipeline, check_parity, probe_records
+from packages.inference_engine import load_engine
+from packages.model_export import MANIFEST_NAME, file_digest
+from packages.numpy_model import NumpyChurnModel, GatherChurnModel, load_npz_mmap, pipeline_from_arrays
+
+
+# engines loaded without importing TensorFlow, shared with forked workers.
+# The numpy engine holds no TensorFlow state but reads the weights with Keras
+FORK_SAFE_ENGINES = ('npz', 'gather')
+
+# engines whose model file holds the preprocessing too, loaded without the scaler and encoder
+SELF_CONTAINED_ENGINES = ('npz', 'gather')
+
+# engines with the scaling folded into the model, fed unscaled numeric features
+SCALER_FOLDED_ENGINES = ('tflite',)
+
+# default model file of each engine, the Keras model otherwise
+MODEL_NAMES = {'tflite': 'churn_model.tflite', 'npz': 'churn_model.npz', 'gather': 'churn_model.npz'}
+
+# exported feature pipeline of each engine, loaded without the scaler and encoder
+PIPELINE_NAMES = {'tflite': 'churn_pipeline.npz'}
+
+
+class ModelRegistry:
+    """
+    Load the scaler, encoder and model once and serve them to the request handlers
+
+    When `model_dir` has a manifest, see `packages.model_export.write_manifest`,
+    the artifacts are a set: they are only reloaded when the manifest changes,
+    and only loaded when they all match it, so a set being replaced file by
+    file is never mixed with the previous one.
+
+    With gunicorn `--preload`, `preload` runs in the master so the fork-safe
+    artifacts are shared with the workers through copy-on-write. TensorFlow
+    backed engines are always loaded in the worker that uses them. Without
+    preloading every artifact is loaded lazily on first use.
+
+    Parameters
+    ----------
+    model_dir : str or pathlib.Path
+        Directory of the model artifacts
+    engine_kind : str
+        Inference engine to serve predictions with
+    scaler_name : str
+        File name of the fitted scaler
+    encoder_name : str
+        File name of the fitted encoder
+    model_name : str
+        File name of the model, by default the one of `MODEL_NAMES` for the engine,
+        or the Keras model
+    outlier_bounds_name : str
+        File name of the outlier boundaries, see `OutlierHandler.save_bounds` of the
+        training packages, applied when the file exists
+    pipeline_name : str
+        File name of the exported feature pipeline, by default the one of `PIPELINE_NAMES`
+        for the engine. Engines without one compile the scaler and encoder
+    precision : str
+        Precision of the weights of the 'gather' engine, either 'float32', 'float16', or 'int8'
+    retry_seconds : float
+        Seconds before a set that failed to reload is tried again while its files are unchanged
+    """
+
+    def __init__(self, model_dir, engine_kind='numpy', scaler_name='scaler.pkl',
+                 encoder_name='encoder.pkl', model_name=None, precision='float32',
+                 outlier_bounds_name='outlier_bounds.json', pipeline_name=None, retry_seconds=5.0):
+        if model_name is None:
+            model_name = MODEL_NAMES.get(engine_kind, 'keras_model.h5')
+        if pipeline_name is None:
+            pipeline_name = PIPELINE_NAMES.get(engine_kind)
+
+        self.model_dir = Path(model_dir)
+        self.engine_kind = engine_kind
+        self.precision = precision
+        self.retry_seconds = retry_seconds
+        self.scaler_path = Path(model_dir, scaler_name)
+        self.encoder_path = Path(model_dir, encoder_name)
+        self.model_path = Path(model_dir, model_name)
+        self.outlier_bounds_path = Path(model_dir, outlier_bounds_name)
+        self.pipeline_path = None if pipeline_name is None else Path(model_dir, pipeline_name)
+        self.manifest_path = Path(model_dir, MANIFEST_NAME)
+
+        self.scaler = None
+        self.encoder = None
+        self.outlier_bounds = None
+        self.pipeline = None
+        self.engine = None
+
+        self.version = None
+        self.reload_error = None
+
+        # fingerprint and time of the last set that failed to reload
+        self._rejected = None
+
+        self._engine_pid = None
+        self._lock = threading.RLock()
+
+        self.ready = False
+        self.warm_up_seconds = None
+
+    @property
+    def fork_safe(self):
+        return self.engine_kind in FORK_SAFE_ENGINES
+
+    @property
+    def self_contained(self):
+        return self.engine_kind in SELF_CONTAINED_ENGINES
+
+    def _artifact_paths(self):
+        if self.self_contained:
+            return (self.model_path,)
+        if self.pipeline_path is not None:
+            return (self.pipeline_path, self.model_path)
+
+        paths = (self.scaler_path, self.encoder_path, self.model_path)
+        if self.outlier_bounds_path.exists():
+            paths += (self.outlier_bounds_path,)
+        return paths
+
+    def fingerprint(self):
+        """
+        Fingerprint the model artifacts on disk
+
+        Returns
+        -------
+        tuple
+            Name, size and modification time of the manifest if any, of each artifact otherwise
+        """
+        paths = (self.manifest_path,) if self.manifest_path.exists() else self._artifact_paths()
+
+        fingerprint = []
+        for path in paths:
+            stat = path.stat()
+            fingerprint.append((path.name, stat.st_size, stat.st_mtime_ns))
+
+        return tuple(fingerprint)
+
+    def check_manifest(self):
+        """
+        Check the artifacts served by the engine against the manifest, if any
+
+        Raises
+        ------
+        ValueError
+            When an artifact is missing from the manifest or differs from it
+        """
+        if not self.manifest_path.exists():
+            return
+
+        digests = json.loads(self.manifest_path.read_text())
+        for path in self._artifact_paths():
+            if digests.get(path.name) != file_digest(path):
+                raise ValueError(f'{path.name} does not match {self.manifest_path.name}, the artifacts are being replaced')
+
+    def _load_artifacts(self):
+        """
+        Load the artifacts on disk without changing the ones being served
+
+        Returns
+        -------
+        dict
+            Loaded artifacts, keyed by registry attribute, the engine being None
+            when it is loaded by `_load_engine`
+        """
+        artifacts = {'version': self.fingerprint(), 'scaler': None, 'encoder': None, 'outlier_bounds': None}
+        self.check_manifest()
+
+        # the memory-mapped model is its own engine, joblib and scikit-learn are never imported
+        if self.self_contained:
+            engine = NumpyChurnModel.load(self.model_path)
+            if self.engine_kind == 'gather':
+                engine = GatherChurnModel(engine, self.precision)
+            return {**artifacts, 'pipeline': engine.pipeline, 'engine': engine}
+
+        # the exported pipeline was checked against the scaler and encoder when written
+        if self.pipeline_path is not None:
+            pipeline = pipeline_from_arrays(load_npz_mmap(self.pipeline_path))
+            if self.engine_kind in SCALER_FOLDED_ENGINES:
+                pipeline = pipeline.without_scaling()
+            return {**artifacts, 'pipeline': pipeline, 'engine': None}
+
+        import joblib
+
+        scaler = joblib.load(self.scaler_path)
+        encoder = joblib.load(self.encoder_path)
+        pipeline = CompiledFeaturePipeline.from_transformers(scaler, encoder)
+
+        # the outlier boundaries are optional, they are compiled into the pipeline
+        outlier_bounds = None
+        if self.outlier_bounds_path.exists():
+            outlier_bounds = json.loads(self.outlier_bounds_path.read_text())
+            pipeline = pipeline.with_outlier_bounds(outlier_bounds)
+
+        # refuse artifacts the compiled pipeline does not reproduce
+        check_parity(pipeline, scaler, encoder, probe_records(pipeline), outlier_bounds)
+
+        if self.engine_kind in SCALER_FOLDED_ENGINES:
+            pipeline = pipeline.without_scaling()
+
+        return {
+            **artifacts, 'scaler': scaler, 'encoder': encoder, 'outlier_bounds': outlier_bounds,
+            'pipeline': pipeline, 'engine': None
+        }
+
+    def _swap(self, artifacts):
+        for name, value in artifacts.items():
+            setattr(self, name, value)
+        if artifacts['engine'] is not None:
+            self._engine_pid = os.getpid()
+
+    def _load_engine(self):
+        self.engine = load_engine(self.model_path, self.engine_kind)
+        self._engine_pid = os.getpid()
+
+    def _reload(self):
+        """
+        Load a new set of artifacts next to the served one, and swap it in once it predicts
+        """
+        artifacts = self._load_artifacts()
+        if artifacts['engine'] is None:
+            artifacts['engine'] = load_engine(self.model_path, self.engine_kind)
+
+        # warms up the new engine too, the process stays ready
+        self._predict_probe(artifacts['pipeline'], artifacts['engine'])
+        self._swap(artifacts)
+
+    def preload(self):
+        """
+        Load everything that is safe to share with forked workers
+        """
+        with self._lock:
+            # only the fork-safe engines are loaded with the artifacts
+            if self.pipeline is None:
+                self._swap(self._load_artifacts())
+
+    def get(self, check_version=False):
+        """
+        Get the feature pipeline and inference engine, loading them if needed
+
+        Parameters
+        ----------
+        check_version : bool
+            Reload every artifact when the files in `model_dir` changed. The
+            current set keeps serving until the new one is loaded, so a set
+            that does not match its manifest yet, or fails to load, is not
+            swapped in, see `reload_error`. Its files are not hashed again
+            before `retry_seconds`, unless they change
+
+        Returns
+        -------
+        pipeline : CompiledFeaturePipeline
+            Feature pipeline
+        engine : object
+            Inference engine with a `predict` method
+        """
+        with self._lock:
+            if self.pipeline is not None and check_version:
+                version = self.fingerprint()
+                if version != self.version and not self._recently_rejected(version):
+                    try:
+                        self._reload()
+                        self.reload_error = None
+                        self._rejected = None
+                    except Exception as error:
+                        # a set being replaced or a broken one, keep serving the current one
+                        self.reload_error = f'{type(error).__name__}: {error}'
+                        self._rejected = (version, time.monotonic())
+
+            if self.pipeline is None:
+                self._swap(self._load_artifacts())
+
+            # engines holding TensorFlow state are not shared across a fork
+            if self.engine is None or (not self.fork_safe and self._engine_pid != os.getpid()):
+                was_ready = self.ready
+                self.ready = False
+                self._load_engine()
+
+                # a reloaded engine keeps serving, warm it up before the request uses it
+                if was_ready:
+                    self._predict_probe()
+                    self.ready = True
+
+            return self.pipeline, self.engine
+
+    def _recently_rejected(self, version):
+        if self._rejected is None:
+            return False
+        rejected_version, rejected_at = self._rejected
+        return version == rejected_version and time.monotonic() - rejected_at < self.retry_seconds
+
+    def _predict_probe(self, pipeline=None, engine=None):
+        pipeline = self.pipeline if pipeline is None else pipeline
+        engine = self.engine if engine is None else engine
+
+        # any valid category for each feature is enough to warm up
+        record = {feat: 0.0 for feat, _, _, _ in pipeline.numeric}
+        record.update({feat: next(iter(lookup)) for feat, lookup in pipeline.categorical})
+        engine.predict(pipeline.transform_record(record)[None])
+
+    def warm_up(self):
+        """
+        Run one prediction so the first request does not pay loading and tracing costs
+
+        Returns
+        -------
+        float
+            Seconds spent loading and warming up
+        """
+        start = time.perf_counter()
+
+        with self._lock:
+            self.get()
+            self._predict_probe()
+
+        self.warm_up_seconds = time.perf_counter() - start
+        self.ready = True
+
+        return self.warm_up_seconds
+
+    def status(self):
+        """
+        Get the loading and warm-up status of the current process
+
+        Returns
+        -------
+        dict
+            Readiness info
+        """
+        return {
+            'ready': self.ready and (self.fork_safe or self._engine_pid == os.getpid()),
+            'pid': os.getpid(),
+            'engine': self.engine_kind,
+            'precision': self.precision if self.engine_kind == 'gather' else None,
+            'artifacts_loaded': self.pipeline is not None,
+            'engine_loaded': self.engine is not None,
+            'warm_up_seconds': self.warm_up_seconds,
+            'reload_error': self.reload_error,
+        }
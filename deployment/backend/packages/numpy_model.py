@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Self-contained NumPy churn model, loaded from a memory-mapped .npz artifact
+"""
+
+import io
+import mmap
+import struct
+import zipfile
+
+import numpy as np
+
+from packages.feature_pipeline import CompiledFeaturePipeline
+from packages.inference_engine import ACTIVATIONS, NumpyEngine
+
+
+# types of the categories, stored as strings next to them
+CATEGORY_TYPES = {'str': str, 'int': int, 'float': float}
+
+
+def load_npz_mmap(path):
+    """
+    Memory-map the arrays of an uncompressed .npz file
+
+    `np.load` reads every member of an archive into memory, while here each
+    array is a read-only view of one shared mapping of the file, so processes
+    loading the same file share its pages.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        Location of a .npz file written by `np.savez`
+
+    Returns
+    -------
+    dict
+        Array of each member, keyed by name without the .npy extension
+    """
+
+    arrays = {}
+    with open(path, 'rb') as file, zipfile.ZipFile(file) as archive:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        for info in archive.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f'{info.filename} is compressed and cannot be memory-mapped, save with np.savez')
+
+            # the data follows the local file header, 30 bytes then the name and extra field
+            name_len, extra_len = struct.unpack('<HH', buffer[info.header_offset + 26:info.header_offset + 30])
+            start = info.header_offset + 30 + name_len + extra_len
+
+            # parse the .npy header to find the array data
+            header = io.BytesIO(buffer[start:start + min(info.file_size, 1 << 16)])
+            version = np.lib.format.read_magic(header)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(header)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(header)
+            if dtype.hasobject:
+                raise ValueError(f'{info.filename} holds Python objects and cannot be memory-mapped')
+
+            arrays[info.filename[:-len('.npy')]] = np.ndarray(
+                shape,
+                dtype=dtype,
+                buffer=buffer,
+                offset=start + header.tell(),
+                order='F' if fortran_order else 'C'
+            )
+
+    return arrays
+
+
+def pipeline_from_arrays(arrays):
+    """
+    Build a compiled feature pipeline from the arrays of `pipeline_to_arrays`
+
+    Parameters
+    ----------
+    arrays : dict
+        Arrays of the pipeline, e.g. loaded by `load_npz_mmap`
+
+    Returns
+    -------
+    CompiledFeaturePipeline
+    """
+
+    numeric = [
+        (str(feat), int(col), float(mean), float(scale))
+        for feat, col, mean, scale in zip(
+            arrays['numeric_features'], arrays['numeric_columns'],
+            arrays['numeric_mean'], arrays['numeric_scale']
+        )
+    ]
+
+    # one lookup per feature, the replaced keywords being stored as categories
+    categorical = [(str(feat), {}) for feat in arrays['categorical_features']]
+    for feat, category, category_type, col in zip(
+        arrays['category_features'], arrays['categories'],
+        arrays['category_types'], arrays['category_columns']
+    ):
+        categorical[feat][1][CATEGORY_TYPES[str(category_type)](category)] = int(col)
+
+    # outlier boundaries of the numeric features, absent from files without outlier handler
+    bounds = {}
+    if 'bound_features' in arrays:
+        bounds = {
+            str(feat): (float(lower), float(upper))
+            for feat, lower, upper in zip(arrays['bound_features'], arrays['bound_lower'], arrays['bound_upper'])
+        }
+
+    return CompiledFeaturePipeline(
+        numeric,
+        categorical,
+        int(arrays['n_features']),
+        str(arrays['handle_unknown']),
+        bounds
+    )
+
+
+def pipeline_to_arrays(pipeline):
+    """
+    Flatten a compiled feature pipeline into arrays, strings being stored as unicode arrays
+
+    Categories are stored as strings with their type, e.g. the 0 and 1 of
+    `SeniorCitizen` are looked up as integers.
+
+    Parameters
+    ----------
+    pipeline : CompiledFeaturePipeline
+
+    Returns
+    -------
+    dict
+        Arrays to save with `np.savez`
+    """
+
+    feats, cols, means, scales = zip(*pipeline.numeric)
+    arrays = {
+        'n_features': np.array(pipeline.n_features),
+        'handle_unknown': np.array(pipeline.handle_unknown),
+        'numeric_features': np.array(feats, dtype=str),
+        'numeric_columns': np.array(cols, dtype=np.int32),
+        'numeric_mean': np.array(means, dtype=np.float64),
+        'numeric_scale': np.array(scales, dtype=np.float64),
+        'categorical_features': np.array([feat for feat, _ in pipeline.categorical], dtype=str),
+        'bound_features': np.array(list(pipeline.bounds), dtype=str),
+        'bound_lower': np.array([lower for lower, _ in pipeline.bounds.values()], dtype=np.float64),
+        'bound_upper': np.array([upper for _, upper in pipeline.bounds.values()], dtype=np.float64),
+    }
+
+    # category tables as (feature position, category, output column)
+    entries = [
+        (pos, category, col)
+        for pos, (_, lookup) in enumerate(pipeline.categorical)
+        for category, col in lookup.items()
+    ]
+    category_features, categories, category_columns = zip(*entries)
+    arrays['category_features'] = np.array(category_features, dtype=np.int32)
+    arrays['categories'] = np.array(categories, dtype=str)
+    arrays['category_types'] = np.array([
+        'str' if isinstance(category, str) else 'int' if isinstance(category, (int, np.integer)) else 'float'
+        for category in categories
+    ])
+    arrays['category_columns'] = np.array(category_columns, dtype=np.int32)
+
+    return arrays
+
+
+class NumpyChurnModel(NumpyEngine):
+    """
+    Preprocess and predict customers with NumPy only
+
+    Holds the compiled feature pipeline and the Dense layers, so it can be
+    served without importing TensorFlow, scikit-learn or joblib. `predict`
+    takes encoded features like the other engines, `predict_records` raw
+    customers.
+
+    Parameters
+    ----------
+    layers : list
+        Tuples of (kernel, bias, activation) of the Dense layers, see `NumpyEngine`
+    pipeline : CompiledFeaturePipeline
+        Feature pipeline of the model
+    """
+
+    name = 'npz'
+
+    def __init__(self, layers, pipeline):
+        self.layers = layers
+        self.pipeline = pipeline
+
+    @classmethod
+    def from_keras(cls, model, pipeline):
+        """
+        Build the model from a Keras model and its feature pipeline
+        """
+        return cls(NumpyEngine(model).layers, pipeline)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load the model from a .npz artifact written by `to_arrays` and `np.savez`
+
+        The weights stay memory-mapped, shared by every process loading the file.
+        """
+        return cls.from_arrays(load_npz_mmap(path))
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """
+        Build the model from the arrays of `to_arrays`
+        """
+
+        layers = []
+        for i in range(int(arrays['n_layers'])):
+            bias = arrays[f'bias_{i}'] if arrays[f'bias_{i}'].size else None
+            layers.append((arrays[f'kernel_{i}'], bias, ACTIVATIONS[str(arrays[f'activation_{i}'])]))
+
+        return cls(layers, pipeline_from_arrays(arrays))
+
+    def to_arrays(self):
+        """
+        Flatten the pipeline and layers into arrays, see `pipeline_to_arrays`
+
+        Returns
+        -------
+        dict
+            Arrays to save with `np.savez`
+        """
+
+        arrays = pipeline_to_arrays(self.pipeline)
+
+        activation_names = {activation: name for name, activation in ACTIVATIONS.items()}
+        arrays['n_layers'] = np.array(len(self.layers))
+        for i, (kernel, bias, activation) in enumerate(self.layers):
+            arrays[f'kernel_{i}'] = np.ascontiguousarray(kernel, dtype=np.float32)
+            arrays[f'bias_{i}'] = np.empty(0, dtype=np.float32) if bias is None else bias.astype(np.float32)
+            arrays[f'activation_{i}'] = np.array(activation_names[activation])
+
+        return arrays
+
+    def predict_records(self, records):
+        """
+        Predict churn probabilities of raw customers
+
+        Parameters
+        ----------
+        records : list or pandas.DataFrame
+            Raw customers, see `CompiledFeaturePipeline.transform`
+
+        Returns
+        -------
+        numpy.ndarray
+            Churn probability of each customer
+        """
+        return self.predict(self.pipeline.transform(records))
+
+
+# weight precisions of `GatherChurnModel`
+PRECISIONS = ('float32', 'float16', 'int8')
+
+
+def quantize(kernel, precision='float32'):
+    """
+    Store a kernel in a reduced precision
+
+    int8 kernels are quantized symmetrically per output unit, kernel ~ q * scale.
+
+    Parameters
+    ----------
+    kernel : numpy.ndarray
+        Kernel of a Dense layer, one column per unit
+    precision : str
+        Either 'float32', 'float16', or 'int8'
+
+    Returns
+    -------
+    weights : numpy.ndarray
+        Kernel in the given precision
+    scale : numpy.ndarray
+        float32 scale of each unit for int8, None otherwise
+    """
+
+    if precision not in PRECISIONS:
+        raise ValueError(f'precision must be one of {", ".join(PRECISIONS)}')
+
+    if precision != 'int8':
+        return kernel.astype(precision), None
+
+    # units with only zero weights keep a scale of one
+    scale = np.abs(kernel).max(axis=0) / 127
+    scale[scale == 0] = 1
+    weights = np.clip(np.rint(kernel / scale), -127, 127).astype(np.int8)
+
+    return weights, scale.astype(np.float32)
+
+
+def dequantize(weights, scale):
+    """
+    Turn the weights of `quantize` back into a float32 kernel
+    """
+    if scale is None:
+        return weights.astype(np.float32)
+    return weights.astype(np.float32) * scale
+
+
+class GatherChurnModel:
+    """
+    Predict from the category positions of `IndexedFeaturePipeline`
+
+    The first layer adds up the kernel rows of the one hot columns of each
+    customer instead of multiplying the mostly zero float32 features by the
+    whole kernel. The categorical features are grouped so that each group has
+    a small table with the summed rows of every combination of its categories,
+    so a customer takes one lookup per group instead of one per feature.
+
+    The kernels are kept in the given precision. The group tables of float16
+    kernels are float16, and those of int8 kernels are int16 sums of the
+    quantized rows, added up as integers then scaled. The numeric rows and the
+    other layers are dequantized once to float32.
+
+    Parameters
+    ----------
+    model : NumpyChurnModel
+        float32 model to predict with
+    precision : str
+        Precision of the weights, either 'float32', 'float16', or 'int8'
+    group_rows : int
+        Maximum number of rows of a group table
+    """
+
+    name = 'gather'
+
+    def __init__(self, model, precision='float32', group_rows=256):
+        kernel, bias, activation = model.layers[0]
+        if bias is None:
+            bias = np.zeros(kernel.shape[1], dtype=np.float32)
+
+        self.precision = precision
+        self.pipeline = model.pipeline.indexed()
+
+        weights, self.scale = quantize(kernel, precision)
+        self.numeric_kernel = dequantize(weights, self.scale)[[col for _, col, _, _ in self.pipeline.numeric]]
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.activation = activation
+
+        # group consecutive features while their table stays under `group_rows` rows
+        feature_columns = self.pipeline.category_columns
+        groups = [[]]
+        for feature, columns in enumerate(feature_columns):
+            radix = [len(feature_columns[other]) + 1 for other in groups[-1]]
+            if groups[-1] and np.prod(radix) * (len(columns) + 1) > group_rows:
+                groups.append([])
+            groups[-1].append(feature)
+
+        # sum the rows of every combination of categories, exactly for int8
+        self._accumulate = accumulate = np.int32 if precision == 'int8' else np.float32
+        tables = []
+        self._bases = np.zeros((len(feature_columns), len(groups)), dtype=np.float32)
+        self._offsets = np.zeros(len(groups), dtype=np.float32)
+        for group, features in enumerate(groups):
+            # slot 0 of each feature is the unknown category, with no row
+            radix = [len(feature_columns[feature]) + 1 for feature in features]
+            slots = np.indices(radix).reshape(len(features), -1, order='F')
+            table = np.zeros((slots.shape[1], weights.shape[1]), dtype=accumulate)
+            for feature, feature_slots in zip(features, slots):
+                rows = np.vstack([np.zeros((1, weights.shape[1])), weights[feature_columns[feature]]])
+                table += rows[feature_slots].astype(accumulate)
+
+            # the code of a combination is the mixed radix number of its slots, the first one
+            # varying fastest, and the slots are the category positions plus one. The codes
+            # stay far below 2 ** 24, so they are computed exactly with a float32 matmul
+            bases = np.cumprod([1] + radix[:-1])
+            self._bases[features, group] = bases
+            self._offsets[group] = bases.sum() + sum(len(other) for other in tables)
+            tables.append(table)
+
+        # one table for every group, row sums of int8 kernels fit in int16
+        self.table = np.vstack(tables).astype(np.int16 if precision == 'int8' else weights.dtype)
+
+        self.layers = []
+        for kernel, bias, activation in model.layers[1:]:
+            self.layers.append((dequantize(*quantize(kernel, precision)), bias, activation))
+
+    @property
+    def nbytes(self):
+        """
+        Bytes of the weights used at prediction time
+        """
+        return (
+            self.numeric_kernel.nbytes
+            + self.table.nbytes
+            + sum(kernel.nbytes for kernel, _, _ in self.layers)
+        )
+
+    def predict(self, data):
+        """
+        Predict churn probabilities
+
+        Parameters
+        ----------
+        data : numpy.ndarray
+            Records of `IndexedFeaturePipeline.dtype`, one per customer
+
+        Returns
+        -------
+        numpy.ndarray
+            Churn probability of each customer
+        """
+
+        data = np.asarray(data)
+        if data.dtype.names is None:
+            raise TypeError('gather engine expects the records of IndexedFeaturePipeline, not dense features')
+
+        # row of each group in the table, then one lookup per group, added up in float32, or int32 for int8
+        codes = (data['categories'] @ self._bases + self._offsets).astype(np.intp)
+        categorical = np.zeros((len(data), self.bias.shape[0]), dtype=self._accumulate)
+        for group in range(codes.shape[1]):
+            categorical += np.take(self.table, codes[:, group], axis=0)
+
+        output = data['numeric'] @ self.numeric_kernel + self.bias
+        output += categorical if self.scale is None else categorical * self.scale
+        output = self.activation(output)
+
+        for kernel, bias, activation in self.layers:
+            output = output @ kernel
+            if bias is not None:
+                output += bias
+            output = activation(output)
+
+        return output.reshape(-1)
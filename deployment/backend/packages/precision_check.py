@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Guardrail of the reduced precision inference modes against the float32 model
+"""
+
+import numpy as np
+import pandas as pd
+
+from packages.numpy_model import GatherChurnModel, PRECISIONS
+
+
+def held_out_split(path, test_size=0.2, seed=42):
+    """
+    Get the test split of the training from the Telco churn CSV
+
+    Returns
+    -------
+    data : pandas.DataFrame
+        Customers of the test split
+    y : numpy.ndarray
+        1 for the customers who churned
+    """
+
+    from sklearn.model_selection import train_test_split
+
+    data = pd.read_csv(path)
+    data['TotalCharges'] = pd.to_numeric(data['TotalCharges'], errors='coerce')
+
+    _, data = train_test_split(data, test_size=test_size, random_state=seed, stratify=data['Churn'])
+
+    return data, (data['Churn'] == 'Yes').to_numpy().astype(np.int8)
+
+
+def evaluate(proba, y, threshold=0.5):
+    """
+    Accuracy at the threshold and ROC AUC of churn probabilities
+    """
+    from sklearn.metrics import roc_auc_score
+
+    return {
+        'accuracy': float(np.mean((proba > threshold) == y)),
+        'auc': float(roc_auc_score(y, proba)),
+    }
+
+
+def check_precisions(model, data, y, precisions=PRECISIONS, accuracy_tol=0.005, auc_tol=0.005, threshold=0.5):
+    """
+    Compare the gather engine in each precision with the dense float32 model
+
+    Parameters
+    ----------
+    model : NumpyChurnModel
+        float32 model
+    data : pandas.DataFrame
+        Held-out customers
+    y : numpy.ndarray
+        1 for the customers who churned
+    precisions : list
+        Precisions of the gather engine to check
+    accuracy_tol : float
+        Largest change of accuracy allowed
+    auc_tol : float
+        Largest change of ROC AUC allowed
+    threshold : float
+        Probability above which a customer is predicted to churn
+
+    Returns
+    -------
+    list
+        Metrics of the float32 model, then of each precision with whether it passed
+    """
+
+    reference = model.predict_records(data)
+    expected = evaluate(reference, y, threshold)
+    results = [{'mode': 'dense float32', **expected, 'max_diff': 0.0, 'weight_bytes': None, 'passed': True}]
+
+    for precision in precisions:
+        engine = GatherChurnModel(model, precision)
+        proba = engine.predict(engine.pipeline.transform(data))
+
+        metrics = evaluate(proba, y, threshold)
+        results.append({
+            'mode': f'gather {precision}',
+            **metrics,
+            'max_diff': float(np.max(np.abs(proba - reference))),
+            'weight_bytes': engine.nbytes,
+            'passed': (
+                abs(metrics['accuracy'] - expected['accuracy']) <= accuracy_tol
+                and abs(metrics['auc'] - expected['auc']) <= auc_tol
+            ),
+        })
+
+    return results
+
+
+def failed_precisions(results):
+    """
+    Modes of `check_precisions` results that moved beyond their tolerance
+    """
+    return [result['mode'] for result in results if not result['passed']]
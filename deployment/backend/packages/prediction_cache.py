@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+In-process LRU cache for prediction results
+"""
+
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+from packages.feature_pipeline import NO_SERVICE_MAP, NO_SERVICE_COLS
+
+
+def canonical_key(record, numeric=('tenure', 'MonthlyCharges', 'TotalCharges')):
+    """
+    Hash the imputed customer so equal customers share a key
+
+    Parameters
+    ----------
+    record : dict
+        Raw customer data
+    numeric : tuple
+        Numeric features, hashed as floats
+
+    Returns
+    -------
+    str
+        Hex digest of the canonical record
+    """
+
+    canonical = {}
+    for feat, value in record.items():
+        if feat in numeric:
+            value = None if value is None else float(value)
+        elif feat in NO_SERVICE_COLS and isinstance(value, str):
+            value = NO_SERVICE_MAP.get(value, value)
+        canonical[feat] = value
+
+    # impute missing TotalCharges with MonthlyCharges
+    if canonical.get('TotalCharges') is None and 'MonthlyCharges' in canonical:
+        canonical['TotalCharges'] = canonical['MonthlyCharges']
+
+    payload = json.dumps(canonical, sort_keys=True, separators=(',', ':'))
+
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class PredictionCache:
+    """
+    Least recently used cache with a time to live and hit/miss counters
+
+    Parameters
+    ----------
+    maxsize : int
+        Maximum number of cached results, 0 disables the cache
+    ttl : float
+        Seconds a result stays valid, None keeps it until evicted
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.version = None
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def validate(self, version):
+        """
+        Clear the cache when the model artifacts changed
+
+        Parameters
+        ----------
+        version : object
+            Fingerprint of the model artifacts
+        """
+        with self._lock:
+            if version != self.version:
+                self._data.clear()
+                self.version = version
+
+    def get(self, key):
+        """
+        Get a cached result
+
+        Parameters
+        ----------
+        key : str
+            Canonical key of the customer
+
+        Returns
+        -------
+        object
+            Cached result, or None when missing or expired
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expires = item
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        """
+        Store a result, evicting the least recently used one when full
+
+        Parameters
+        ----------
+        key : str
+            Canonical key of the customer
+        value : object
+            Result to cache
+        """
+        if self.maxsize <= 0:
+            return
+
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        """
+        Get the cache counters
+
+        Returns
+        -------
+        dict
+            Size, hits, misses and hit rate of the cache
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
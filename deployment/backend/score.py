@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Score a customer CSV export in chunks without going through HTTP
+
+The input has the same columns as the Telco churn dataset. The output has one
+`customerID, probability, class` row per customer, as CSV or Parquet.
+Customers with a category the model does not know are rejected like the API
+does, with one `customerID, error` row each in the errors CSV.
+
+Example: `python score.py customers.csv scores.parquet --chunksize 100000 --workers 4`
+"""
+
+import time
+import argparse
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app import FEATURES, check_categories
+from packages.imputation_handling import impute_total_charges
+from packages.model_registry import ModelRegistry
+
+
+ID_COL = "customerID"
+
+# registry of the current process, set up by `init_worker`
+registry = None
+
+
+def init_worker(model_dir, engine_kind, precision="float32"):
+    """
+    Load the model artifacts once per process
+    """
+    global registry
+    registry = ModelRegistry(model_dir, engine_kind, precision=precision)
+    registry.get()
+
+
+def reject_unknown(chunk, categories):
+    """
+    Split off the customers with a category the model does not know
+
+    Parameters
+    ----------
+    chunk : pandas.DataFrame
+        Customers with the Telco churn columns
+    categories : dict
+        Known categories of each categorical feature, see `app.known_categories`
+
+    Returns
+    -------
+    valid : pandas.DataFrame
+        Customers whose categories are all known
+    errors : pandas.DataFrame
+        customerID and error of each rejected customer, see `app.check_categories`
+    """
+
+    # rows whose categories are all known skip the row by row check, booleans never are
+    known = np.ones(len(chunk), dtype=bool)
+    for feat, lookup in categories.items():
+        if pd.api.types.is_bool_dtype(chunk[feat]):
+            known[:] = False
+        else:
+            known &= chunk[feat].isin(list(lookup)).to_numpy()
+
+    rejected = []
+    for i in np.flatnonzero(~known):
+        # missing values as the null of a JSON customer
+        record = {feat: None if pd.isna(value) else value for feat, value in chunk.iloc[i].items()}
+        try:
+            check_categories(record, categories)
+            known[i] = True
+        except ValueError as error:
+            rejected.append((chunk[ID_COL].iat[i], str(error)))
+
+    errors = pd.DataFrame(rejected, columns=[ID_COL, "error"])
+
+    return chunk[known], errors
+
+
+def score_chunk(chunk, threshold=0.5):
+    """
+    Score a chunk of customers
+
+    Parameters
+    ----------
+    chunk : pandas.DataFrame
+        Customers with the Telco churn columns
+    threshold : float
+        Probability above which a customer is predicted to churn
+
+    Returns
+    -------
+    scores : pandas.DataFrame
+        customerID, probability and class of each valid customer
+    errors : pandas.DataFrame
+        customerID and error of each customer rejected by `reject_unknown`
+    """
+
+    # the compiled pipeline encodes unknown categories as zeros, reject them as the API does
+    pipeline, engine = registry.get()
+    chunk, errors = reject_unknown(chunk, dict(pipeline.categorical))
+
+    # blank TotalCharges are parsed as NaN and imputed
+    chunk = chunk.assign(TotalCharges=pd.to_numeric(chunk["TotalCharges"], errors="coerce"))
+    chunk = impute_total_charges(chunk)
+
+    # the compiled pipeline folds in the no phone / no internet imputation
+    proba = engine.predict(pipeline.transform(chunk))
+
+    scores = pd.DataFrame({
+        ID_COL: chunk[ID_COL].to_numpy(),
+        "probability": proba.astype(np.float32),
+        "class": (proba > threshold).astype(np.int8),
+    })
+
+    return scores, errors
+
+
+class ScoreWriter:
+    """
+    Append scored chunks to a CSV or Parquet file
+    """
+
+    def __init__(self, path, fmt):
+        self.path = Path(path)
+        self.fmt = fmt
+        self._writer = None
+        self._header = True
+
+    def write(self, scores):
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(scores, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            scores.to_csv(self.path, mode="w" if self._header else "a", header=self._header, index=False)
+            self._header = False
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def iter_scores(chunks, threshold, workers, model_dir, engine_kind, precision="float32"):
+    """
+    Score chunks in order, in this process or across a process pool
+
+    At most two chunks per worker are in flight, so memory stays bounded by the chunk size.
+    """
+
+    if workers <= 1:
+        init_worker(model_dir, engine_kind, precision)
+        for chunk in chunks:
+            yield score_chunk(chunk, threshold)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(model_dir, engine_kind, precision)
+    ) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(score_chunk, chunk, threshold))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="CSV file with the Telco churn columns")
+    parser.add_argument("output", help="output file, .csv or .parquet")
+    parser.add_argument("--errors", help="CSV of the rejected customers, next to the output by default")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="rows per chunk")
+    parser.add_argument("--workers", type=int, default=1, help="processes scoring chunks in parallel")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument("--engine", default="numpy", help="inference engine, either 'keras', 'function', 'numpy', 'tflite', 'npz', or 'gather'")
+    parser.add_argument("--precision", choices=["float32", "float16", "int8"], default="float32", help="weights of the 'gather' engine")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="output format, guessed from the extension by default")
+    args = parser.parse_args()
+
+    fmt = args.format or ("parquet" if Path(args.output).suffix == ".parquet" else "csv")
+    errors_path = args.errors or Path(args.output).with_suffix(".errors.csv")
+
+    # read only the columns needed, chunk by chunk
+    chunks = pd.read_csv(
+        args.input,
+        usecols=[ID_COL] + FEATURES,
+        dtype={"TotalCharges": str},
+        chunksize=args.chunksize
+    )
+
+    start = time.perf_counter()
+    writer = ScoreWriter(args.output, fmt)
+    errors_writer = ScoreWriter(errors_path, "csv")
+    rows = 0
+    rejected = 0
+    try:
+        for scores, errors in iter_scores(chunks, args.threshold, args.workers, args.model_dir, args.engine, args.precision):
+            writer.write(scores)
+            errors_writer.write(errors)
+            rows += len(scores)
+            rejected += len(errors)
+    finally:
+        writer.close()
+        errors_writer.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows} customers in {elapsed:.2f}s ({rows / elapsed:.0f} rows/s)")
+    if rejected:
+        print(f"Rejected {rejected} customers with unknown categories, see {errors_path}")
+
+
+if __name__ == "__main__":
+    main()
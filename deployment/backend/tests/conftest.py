@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import shutil
+from pathlib import Path
+
+import pytest
+
+
+# run from the backend directory, as gunicorn does
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+os.chdir(BACKEND_DIR)
+
+MODEL_DIR = BACKEND_DIR / 'models'
+DATA_PATH = BACKEND_DIR.parents[1] / 'data' / 'WA_Fn-UseC_-Telco-Customer-Churn.csv'
+
+# valid customer, as sent by the prediction page
+CUSTOMER = {
+    'gender': 'Female', 'SeniorCitizen': 0, 'Partner': 'Yes', 'Dependents': 'No', 'tenure': 1,
+    'PhoneService': 'No', 'MultipleLines': 'No phone service', 'InternetService': 'DSL',
+    'OnlineSecurity': 'No', 'OnlineBackup': 'Yes', 'DeviceProtection': 'No', 'TechSupport': 'No',
+    'StreamingTV': 'No', 'StreamingMovies': 'No', 'Contract': 'Month-to-month',
+    'PaperlessBilling': 'Yes', 'PaymentMethod': 'Electronic check', 'MonthlyCharges': 29.85,
+    'TotalCharges': 29.85
+}
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """
+    Copy of the model artifacts that a test may change
+    """
+    return Path(shutil.copytree(MODEL_DIR, tmp_path / 'models'))
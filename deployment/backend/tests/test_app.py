@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+
+import pytest
+
+import app
+from conftest import CUSTOMER, MODEL_DIR
+from packages.model_registry import ModelRegistry
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(app, "registry", ModelRegistry(MODEL_DIR, "npz"))
+    return app.app.test_client()
+
+
+def ndjson(*lines):
+    return "\n".join(line if isinstance(line, str) else json.dumps(line) for line in lines)
+
+
+def test_batch_reports_malformed_ndjson_line(client):
+    body = ndjson(CUSTOMER, '{"gender": "Female",', CUSTOMER)
+    response = client.post("/predict/batch", data=body, content_type="application/x-ndjson")
+
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [result["success"] for result in results] == [True, False, True]
+    assert results[1]["index"] == 1
+    assert results[1]["message"].startswith("invalid JSON")
+
+
+def test_batch_rejects_unknown_categories(client):
+    body = [CUSTOMER, {**CUSTOMER, "Contract": "Weekly"}, {**CUSTOMER, "SeniorCitizen": "0"}]
+    response = client.post("/predict/batch", json=body)
+
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert results[0]["success"]
+    assert results[1] == {"index": 1, "success": False, "message": "unknown Contract: 'Weekly'"}
+    assert results[2]["message"] == "unknown SeniorCitizen: '0'"
+
+
+def test_rank_reports_row_errors(client):
+    body = ndjson({**CUSTOMER, "customerID": "a"}, "not json", {**CUSTOMER, "InternetService": "Cable"})
+    response = client.post("/rank?k=5", data=body, content_type="application/x-ndjson")
+
+    assert response.status_code == 200
+    content = response.get_json()
+    assert [result["customerID"] for result in content["results"]] == ["a"]
+    assert [error["index"] for error in content["errors"]] == [1, 2]
+
+
+def test_predict_rejects_unknown_category(client):
+    response = client.post("/predict", json={**CUSTOMER, "PaymentMethod": "Cash"})
+
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "unknown PaymentMethod: 'Cash'"
+
+    # the special keywords of the service columns are known
+    response = client.post("/predict", json={**CUSTOMER, "OnlineSecurity": "No internet service"})
+    assert response.status_code == 200
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+from starlette.testclient import TestClient
+
+import app
+import asgi_app
+from conftest import CUSTOMER, DATA_PATH, MODEL_DIR
+from packages.micro_batcher import MicroBatcher
+from packages.model_registry import ModelRegistry
+
+
+class RecordingModel:
+    # sums each row, remembering the size of each forward pass
+    def __init__(self, fail_on=None):
+        self.sizes = []
+        self.fail_on = fail_on
+
+    def __call__(self, rows):
+        self.sizes.append(len(rows))
+        if self.fail_on is not None and (rows == self.fail_on).all(axis=1).any():
+            raise ValueError("bad row")
+        return rows.sum(axis=1)
+
+
+async def predict_all(batcher, rows):
+    batcher.start()
+    try:
+        return await asyncio.gather(*[batcher.predict(row) for row in rows], return_exceptions=True)
+    finally:
+        await batcher.stop()
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = ModelRegistry(MODEL_DIR, "npz")
+    monkeypatch.setattr(app, "registry", registry)
+    monkeypatch.setattr(asgi_app, "registry", registry)
+    return registry
+
+
+@pytest.fixture
+def records():
+    data = pd.read_csv(DATA_PATH).head(60)
+    data["TotalCharges"] = pd.to_numeric(data["TotalCharges"], errors="coerce")
+    return [
+        {feat: None if pd.isna(value) else value for feat, value in zip(app.FEATURES, row)}
+        for row in data[app.FEATURES].astype(object).itertuples(index=False)
+    ]
+
+
+def test_batcher_matches_row_by_row():
+    rows = np.arange(100 * 3, dtype=np.float32).reshape(100, 3)
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=16, max_wait_us=100000)
+
+    proba = asyncio.run(predict_all(batcher, rows))
+
+    # the same result as each row summed alone, in full batches but the last
+    assert proba == [float(row.sum()) for row in rows]
+    assert model.sizes == [16] * 6 + [4]
+    assert batcher.stats()["batches"] == 7 and batcher.stats()["rows"] == 100
+
+
+def test_batcher_flushes_after_wait():
+    model = RecordingModel()
+    batcher = MicroBatcher(model, max_batch_size=64, max_wait_us=1000)
+
+    async def spaced():
+        batcher.start()
+        try:
+            first = await batcher.predict(np.ones(3, dtype=np.float32))
+            second = await batcher.predict(np.zeros(3, dtype=np.float32))
+            return first, second
+        finally:
+            await batcher.stop()
+
+    # a lone row is not held back waiting for a full batch
+    assert asyncio.run(spaced()) == (3.0, 0.0)
+    assert model.sizes == [1, 1]
+
+
+def test_batcher_fails_only_the_failing_batch():
+    rows = np.arange(8 * 2, dtype=np.float32).reshape(8, 2)
+    model = RecordingModel(fail_on=rows[1])
+    batcher = MicroBatcher(model, max_batch_size=4, max_wait_us=100000)
+
+    results = asyncio.run(predict_all(batcher, rows))
+
+    assert all(isinstance(result, ValueError) for result in results[:4])
+    assert results[4:] == [float(row.sum()) for row in rows[4:]]
+    assert batcher.stats()["batches"] == 1
+
+    with pytest.raises(ValueError):
+        MicroBatcher(model, max_batch_size=0)
+
+
+def flask_predictions(records):
+    client = app.app.test_client()
+    return [client.post("/predict", json=record) for record in records]
+
+
+def assert_same_response(actual, expected):
+    assert actual.status_code == expected.status_code
+    actual, expected = actual.json(), expected.get_json()
+    if expected["success"]:
+        assert actual["result"]["probability"] == pytest.approx(expected["result"]["probability"], rel=1e-5)
+        actual["result"]["probability"] = expected["result"]["probability"]
+    assert actual == expected
+
+
+def test_asgi_predict_matches_flask(registry, records):
+    bad = [{**CUSTOMER, "Contract": "Weekly"}, {**CUSTOMER, "threshold": 2}, {"gender": "Female"}]
+    expected = flask_predictions(records + bad)
+
+    with TestClient(asgi_app.app) as client:
+        for record, response in zip(records + bad, expected):
+            assert_same_response(client.post("/predict", json=record), response)
+
+        status = client.get("/ready").json()
+        assert status["ready"] and status["batching"]["rows"] == len(records)
+
+
+def test_asgi_batches_concurrent_requests(registry, records, monkeypatch):
+    monkeypatch.setattr(asgi_app, "batcher", MicroBatcher(asgi_app.predict_rows, 16, 100000))
+    expected = flask_predictions(records)
+
+    async def concurrent():
+        # the lifespan loads the model and starts the batcher
+        async with asgi_app.lifespan(asgi_app.app):
+            transport = httpx.ASGITransport(app=asgi_app.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(*[client.post("/predict", json=record) for record in records])
+
+    responses = asyncio.run(concurrent())
+
+    for actual, response in zip(responses, expected):
+        assert_same_response(actual, response)
+
+    stats = asgi_app.batcher.stats()
+    assert stats["rows"] == len(records)
+    assert stats["batches"] < len(records)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import itertools
+import importlib.util
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+import app
+from conftest import BACKEND_DIR, DATA_PATH, MODEL_DIR
+from packages.feature_pipeline import CompiledFeaturePipeline, check_parity, probe_records
+from packages.imputation_handling import impute_total_charges
+from packages.prediction_cache import canonical_key
+
+
+ADD_INTERNET_SERVICES = [
+    "OnlineSecurity", "OnlineBackup", "DeviceProtection", "TechSupport", "StreamingTV", "StreamingMovies"
+]
+
+
+def load_options():
+    # the frontend has its own `packages`, load its options by path
+    path = BACKEND_DIR.parent / "frontend" / "packages" / "options.py"
+    spec = importlib.util.spec_from_file_location("frontend_options", path)
+    options = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(options)
+    return options
+
+
+def frontend_records():
+    """
+    Every customer the prediction page can send, with the same dependent options
+    """
+
+    options = load_options()
+
+    # PhoneService restricts MultipleLines and InternetService, InternetService the add-on services
+    services = []
+    for phone in options.no_yes_options:
+        if phone == "No":
+            multiple_lines, internet = options.no_phone_service_options, options.InternetService_reduced_options
+        else:
+            multiple_lines, internet = options.no_yes_options, options.InternetService_full_options
+        for lines, service in itertools.product(multiple_lines, internet):
+            add_on = options.no_internet_service_options if service == "No" else options.no_yes_options
+            for add_ons in itertools.product(add_on, repeat=len(ADD_INTERNET_SERVICES)):
+                services.append({
+                    "PhoneService": phone, "MultipleLines": lines, "InternetService": service,
+                    **dict(zip(ADD_INTERNET_SERVICES, add_ons))
+                })
+
+    records = []
+    combinations = itertools.product(
+        options.gender_options, [0, 1], options.no_yes_options, options.no_yes_options, services,
+        options.Contract_options, options.no_yes_options, options.PaymentMethod_options
+    )
+    for i, (gender, senior, partner, dependents, service, contract, paperless, payment) in enumerate(combinations):
+        tenure = i % 73
+        monthly = 18.25 + (i % 1000) / 10
+        records.append({
+            "gender": gender, "SeniorCitizen": senior, "Partner": partner, "Dependents": dependents,
+            "tenure": tenure, **service, "Contract": contract, "PaperlessBilling": paperless,
+            "PaymentMethod": payment, "MonthlyCharges": monthly,
+            # the page sends TotalCharges, the API accepts a null one
+            "TotalCharges": None if i % 7 == 0 else tenure * monthly,
+        })
+
+    return records
+
+
+@pytest.fixture(scope="module")
+def transformers():
+    scaler = joblib.load(MODEL_DIR / "scaler.pkl")
+    encoder = joblib.load(MODEL_DIR / "encoder.pkl")
+    return scaler, encoder, CompiledFeaturePipeline.from_transformers(scaler, encoder)
+
+
+def test_parity_every_frontend_combination(transformers):
+    scaler, encoder, pipeline = transformers
+    records = frontend_records()
+
+    # every option of the page is a known category
+    for feat, lookup in pipeline.categorical:
+        assert {record[feat] for record in records} <= set(lookup), feat
+
+    assert check_parity(pipeline, scaler, encoder, records) == len(records)
+
+
+def test_parity_probe_records(transformers):
+    scaler, encoder, pipeline = transformers
+    records = probe_records(pipeline)
+
+    assert records[-1]["TotalCharges"] is None
+    assert check_parity(pipeline, scaler, encoder, records) == len(records)
+
+
+def test_special_keywords_only_in_service_columns(transformers):
+    scaler, encoder, pipeline = transformers
+    lookups = dict(pipeline.categorical)
+
+    assert lookups["OnlineSecurity"]["No internet service"] == lookups["OnlineSecurity"]["No"]
+    assert "No internet service" not in lookups["Partner"]
+
+    # the cache tells them apart as the encoder does
+    record = probe_records(pipeline)[0]
+    assert canonical_key({**record, "Partner": "No internet service"}) != canonical_key({**record, "Partner": "No"})
+    assert (canonical_key({**record, "TechSupport": "No internet service"})
+            == canonical_key({**record, "TechSupport": "No"}))
+
+
+def test_parity_scaled_total_charges():
+    # a scaler that keeps TotalCharges, null for the customers the chain imputes
+    numeric = ["tenure", "MonthlyCharges", "TotalCharges"]
+    nominal = [feat for feat in app.FEATURES if feat not in app.NUMERIC_FEATURES]
+
+    data = pd.read_csv(DATA_PATH)
+    data["TotalCharges"] = pd.to_numeric(data["TotalCharges"], errors="coerce")
+    data = impute_total_charges(data)
+
+    scaler = ColumnTransformer([("num_norm", StandardScaler(), numeric), ("nom", "passthrough", nominal)])
+    encoder = ColumnTransformer([
+        ("num", "passthrough", slice(0, len(numeric))),
+        ("nom", OneHotEncoder(handle_unknown="ignore"), slice(len(numeric), len(numeric) + len(nominal))),
+    ])
+    encoder.fit(scaler.fit_transform(data))
+
+    pipeline = CompiledFeaturePipeline.from_transformers(scaler, encoder)
+    records = probe_records(pipeline) + frontend_records()[:50]
+    assert "TotalCharges" in [feat for feat, _, _, _ in pipeline.numeric]
+    assert check_parity(pipeline, scaler, encoder, records) == len(records)
+
+    # the positions of the gather engine hold the same scaled values
+    indexed = pipeline.indexed()
+    expected = pipeline.transform(records)[:, [col for _, col, _, _ in pipeline.numeric]]
+    np.testing.assert_array_equal(indexed.transform(records)["numeric"], expected)
+    np.testing.assert_array_equal(np.stack([indexed.transform_record(record)["numeric"] for record in records]), expected)
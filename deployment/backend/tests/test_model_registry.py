@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import json
+import shutil
+import subprocess
+
+import pytest
+
+import app
+from conftest import CUSTOMER
+from packages import model_registry
+from packages.model_export import write_manifest, file_digest
+from packages.model_registry import ModelRegistry
+
+
+@pytest.mark.parametrize("engine_kind", ["numpy", "npz"])
+def test_ready_after_reload(model_dir, monkeypatch, engine_kind):
+    registry = ModelRegistry(model_dir, engine_kind)
+    monkeypatch.setattr(app, "registry", registry)
+    client = app.app.test_client()
+
+    assert client.get("/ready").status_code == 503
+    registry.warm_up()
+    assert client.get("/ready").status_code == 200
+
+    # a new set of artifacts on disk is reloaded by the next cached prediction
+    version = registry.version
+    stat = registry.model_path.stat()
+    os.utime(registry.model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    write_manifest(model_dir)
+
+    response = client.post("/predict", json=CUSTOMER)
+    assert response.status_code == 200
+    assert registry.version != version
+
+    assert client.get("/ready").status_code == 200
+
+
+def test_no_reload_before_manifest(model_dir):
+    registry = ModelRegistry(model_dir, "numpy")
+    registry.warm_up()
+    scaler = registry.scaler
+
+    # a new scaler without its manifest is part of a set being replaced
+    shutil.copy(model_dir / "scaler.pkl", model_dir / "new_scaler.pkl")
+    with open(model_dir / "new_scaler.pkl", "ab") as file:
+        file.write(b"\0")
+    os.replace(model_dir / "new_scaler.pkl", model_dir / "scaler.pkl")
+    assert registry.get(check_version=True)[0] is registry.pipeline
+    assert registry.scaler is scaler
+
+    stat = (model_dir / "manifest.json").stat()
+    os.utime(model_dir / "manifest.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    registry.get(check_version=True)
+    assert registry.scaler is scaler
+
+    # once the manifest lists it, the whole set is reloaded
+    write_manifest(model_dir)
+    registry.get(check_version=True)
+    assert registry.scaler is not scaler
+    assert registry.status()["ready"]
+
+
+@pytest.mark.parametrize("engine_kind, name", [("numpy", "scaler.pkl"), ("npz", "churn_model.npz")])
+def test_keep_serving_when_reload_fails(model_dir, monkeypatch, engine_kind, name):
+    registry = ModelRegistry(model_dir, engine_kind)
+    monkeypatch.setattr(app, "registry", registry)
+    client = app.app.test_client()
+    registry.warm_up()
+    pipeline, engine = registry.get()
+
+    # a complete set, listed in its manifest, whose artifact cannot be loaded
+    good = (model_dir / name).read_bytes()
+    (model_dir / name).write_bytes(good[:len(good) // 2])
+    write_manifest(model_dir)
+
+    response = client.post("/predict", json=CUSTOMER)
+    assert response.status_code == 200
+    assert registry.get() == (pipeline, engine)
+    assert client.get("/ready").status_code == 200
+    assert registry.status()["reload_error"]
+
+    # the next good set is swapped in
+    (model_dir / name).write_bytes(good)
+    write_manifest(model_dir)
+    assert registry.get(check_version=True)[1] is not engine
+    assert registry.status()["reload_error"] is None
+
+
+def test_mismatched_set_not_hashed_on_every_request(model_dir, monkeypatch):
+    registry = ModelRegistry(model_dir, "npz")
+    registry.warm_up()
+
+    hashed = []
+    monkeypatch.setattr(model_registry, "file_digest", lambda path: hashed.append(path) or file_digest(path))
+
+    # a model replaced before its manifest
+    with open(model_dir / "churn_model.npz", "ab") as file:
+        file.write(b"\0")
+    stat = (model_dir / "manifest.json").stat()
+    os.utime(model_dir / "manifest.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    for _ in range(5):
+        registry.get(check_version=True)
+    assert len(hashed) == 1
+    assert "does not match manifest.json" in registry.status()["reload_error"]
+
+    # tried again after the retry interval
+    registry.retry_seconds = 0
+    registry.get(check_version=True)
+    assert len(hashed) == 2
+
+
+def test_refuse_artifacts_not_matching_manifest(model_dir):
+    with open(model_dir / "churn_model.npz", "ab") as file:
+        file.write(b"\0")
+
+    with pytest.raises(ValueError, match="churn_model.npz does not match manifest.json"):
+        ModelRegistry(model_dir, "npz").get()
+
+
+SERVE_TFLITE = """
+import sys
+import json
+from packages.model_registry import ModelRegistry
+
+registry = ModelRegistry(sys.argv[1], "tflite")
+pipeline, engine = registry.get()
+probability = float(engine.predict(pipeline.transform_record(json.loads(sys.argv[2]))[None])[0])
+print(json.dumps([probability, sorted({"sklearn", "joblib", "pandas", "tensorflow"} & set(sys.modules))]))
+"""
+
+
+def test_tflite_served_without_scikit_learn(model_dir):
+    # a fresh interpreter, the tests import scikit-learn
+    output = subprocess.run(
+        [sys.executable, "-c", SERVE_TFLITE, str(model_dir), json.dumps(CUSTOMER)],
+        capture_output=True, text=True, check=True
+    ).stdout
+    probability, imported = json.loads(output.splitlines()[-1])
+
+    # TensorFlow imports pandas itself, when the interpreter falls back to it without tflite_runtime
+    assert "sklearn" not in imported and "joblib" not in imported
+    assert "pandas" not in imported or "tensorflow" in imported
+
+    pipeline, engine = ModelRegistry(model_dir, "numpy").get()
+    expected = engine.predict(pipeline.transform_record(CUSTOMER)[None])[0]
+    assert probability == pytest.approx(expected, abs=1e-5)
+
+
+PRELOAD = """
+import sys
+import json
+from packages.model_registry import ModelRegistry
+
+registry = ModelRegistry(sys.argv[1], sys.argv[2])
+registry.preload()
+print(json.dumps([registry.engine is not None, "tensorflow" in sys.modules]))
+"""
+
+
+@pytest.mark.parametrize("engine_kind, engine_loaded", [("numpy", False), ("npz", True), ("tflite", False)])
+def test_preload_does_not_import_tensorflow(model_dir, engine_kind, engine_loaded):
+    # the gunicorn master, forking the workers after the preload
+    output = subprocess.run(
+        [sys.executable, "-c", PRELOAD, str(model_dir), engine_kind],
+        capture_output=True, text=True, check=True
+    ).stdout
+
+    assert json.loads(output.splitlines()[-1]) == [engine_loaded, False]
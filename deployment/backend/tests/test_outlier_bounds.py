@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import json
+import subprocess
+
+import numpy as np
+import pytest
+
+from conftest import BACKEND_DIR, DATA_PATH
+from packages.model_export import write_manifest
+from packages.model_registry import ModelRegistry
+from packages.feature_pipeline import probe_records
+
+# fit the handler with the training packages, in the repository root
+FIT_HANDLER = """
+import sys
+import pandas as pd
+from packages.outlier_handling import OutlierHandler
+
+data = pd.read_csv(sys.argv[1])
+data['TotalCharges'] = pd.to_numeric(data['TotalCharges'], errors='coerce').fillna(data['MonthlyCharges'])
+OutlierHandler().fit(data[['tenure', 'MonthlyCharges', 'TotalCharges']]).save_bounds(sys.argv[2])
+"""
+
+
+@pytest.fixture
+def handler_dir(model_dir):
+    subprocess.run(
+        [sys.executable, "-c", FIT_HANDLER, str(DATA_PATH), str(model_dir / "outlier_bounds.json")],
+        cwd=BACKEND_DIR.parents[1], check=True
+    )
+    write_manifest(model_dir)
+    return model_dir
+
+
+def test_registry_applies_outlier_bounds(handler_dir):
+    registry = ModelRegistry(handler_dir, "numpy")
+    pipeline, engine = registry.get()
+
+    # TotalCharges is capped too, but the model does not take it
+    assert set(registry.outlier_bounds) == {"tenure", "MonthlyCharges", "TotalCharges"}
+    assert set(pipeline.bounds) == {"tenure", "MonthlyCharges"}
+    assert "outlier_bounds.json" in json.loads((handler_dir / "manifest.json").read_text())
+
+    # a customer beyond the boundaries is scored as the capped customer
+    record = probe_records(pipeline)[0]
+    lower, upper = pipeline.bounds["tenure"]
+    far = engine.predict(pipeline.transform([{**record, "tenure": upper + 1000}]))
+    capped = engine.predict(pipeline.transform_record({**record, "tenure": upper})[None])
+    np.testing.assert_array_equal(far, capped)
+
+
+def test_npz_export_keeps_outlier_bounds(handler_dir):
+    from packages.model_export import export_npz
+    from packages.numpy_model import NumpyChurnModel
+
+    registry = ModelRegistry(handler_dir, "numpy")
+    pipeline, _ = registry.get()
+
+    export_npz(handler_dir)
+    assert NumpyChurnModel.load(handler_dir / "churn_model.npz").pipeline.bounds == pipeline.bounds
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pytest
+
+from conftest import MODEL_DIR, DATA_PATH
+from packages.model_export import export_npz
+from packages.numpy_model import NumpyChurnModel, PRECISIONS
+from packages.precision_check import held_out_split, check_precisions, failed_precisions
+
+
+def test_served_model_passes_precision_check():
+    model = NumpyChurnModel.load(MODEL_DIR / "churn_model.npz")
+    data, y = held_out_split(DATA_PATH)
+
+    results = check_precisions(model, data, y, PRECISIONS)
+
+    assert [result["mode"] for result in results] == ["dense float32"] + [f"gather {p}" for p in PRECISIONS]
+    assert failed_precisions(results) == []
+
+
+def test_export_refuses_model_failing_precision_check(model_dir):
+    npz = (model_dir / "churn_model.npz").read_bytes()
+
+    # no reduced precision can keep a ROC AUC within a negative tolerance
+    with pytest.raises(ValueError, match="fails the precision check: gather float16, gather int8"):
+        export_npz(model_dir, data_path=DATA_PATH, auc_tol=-1)
+
+    # the served model is left in place
+    assert (model_dir / "churn_model.npz").read_bytes() == npz
+    assert not list(model_dir.glob(".*.tmp"))
+
+    export_npz(model_dir, data_path=DATA_PATH)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+from conftest import CUSTOMER, DATA_PATH, MODEL_DIR
+from packages import prediction_cache
+from packages.model_registry import ModelRegistry
+from packages.prediction_cache import PredictionCache, canonical_key
+
+
+class Clock:
+    # monotonic clock moved by hand
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(prediction_cache.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def records():
+    # blank TotalCharges included, sent as null
+    data = pd.read_csv(DATA_PATH, dtype={"TotalCharges": str})
+    data = pd.concat([data.head(100), data[data["TotalCharges"].str.strip() == ""]])
+    data["TotalCharges"] = pd.to_numeric(data["TotalCharges"], errors="coerce")
+    return [
+        {feat: None if pd.isna(value) else value for feat, value in zip(app.FEATURES, row)}
+        for row in data[app.FEATURES].astype(object).itertuples(index=False)
+    ]
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(app, "registry", ModelRegistry(MODEL_DIR, "npz"))
+    cache = PredictionCache(maxsize=4096, ttl=300)
+    monkeypatch.setattr(app, "cache", cache)
+    return cache
+
+
+def test_canonical_key_matches_equal_customers():
+    key = canonical_key(CUSTOMER)
+
+    # same customer once imputed, whatever the order and numeric types
+    assert canonical_key(dict(reversed(list(CUSTOMER.items())))) == key
+    assert canonical_key({**CUSTOMER, "tenure": 1.0, "MonthlyCharges": "29.85"}) == key
+    assert canonical_key({**CUSTOMER, "TotalCharges": None}) == key
+    assert canonical_key({**CUSTOMER, "OnlineSecurity": "No internet service"}) == key
+
+    assert canonical_key({**CUSTOMER, "tenure": 2}) != key
+    assert canonical_key({**CUSTOMER, "Contract": "One year"}) != key
+    assert canonical_key({**CUSTOMER, "TotalCharges": 30.0}) != key
+
+
+def test_expires_after_ttl(clock):
+    cache = PredictionCache(maxsize=4, ttl=10)
+    cache.set("a", 0.5)
+
+    clock.now += 9.9
+    assert cache.get("a") == 0.5
+    clock.now += 0.2
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+    cache = PredictionCache(maxsize=4, ttl=None)
+    cache.set("a", 0.5)
+    clock.now += 1e9
+    assert cache.get("a") == 0.5
+
+
+def test_evicts_least_recently_used():
+    cache = PredictionCache(maxsize=2, ttl=None)
+    cache.set("a", 0.1)
+    cache.set("b", 0.2)
+    assert cache.get("a") == 0.1
+
+    # "b" is the least recently used once "a" was read
+    cache.set("c", 0.3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (0.1, 0.3)
+    assert cache.stats() == {"size": 2, "maxsize": 2, "ttl": None, "hits": 3, "misses": 1, "hit_rate": 0.75}
+
+
+def test_validate_clears_on_new_version():
+    cache = PredictionCache()
+    cache.validate("v1")
+    cache.set("a", 0.1)
+
+    cache.validate("v1")
+    assert cache.get("a") == 0.1
+
+    cache.validate("v2")
+    assert cache.get("a") is None
+    assert cache.version == "v2"
+
+
+def test_disabled_cache_stores_nothing():
+    cache = PredictionCache(maxsize=0)
+    cache.set("a", 0.1)
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_cached_predictions_match_uncached(cache, records):
+    expected = app.predict_proba(records)
+
+    # first pass fills the cache, second pass is served from it
+    for _ in range(2):
+        actual = np.array([app.predict_one(record) for record in records])
+        np.testing.assert_allclose(actual, expected, rtol=1e-6)
+
+    stats = cache.stats()
+    assert stats["hits"] >= len(records) and stats["misses"] == stats["size"]
+    assert cache.version == app.registry.version
+
+    # the same results with the cache disabled
+    cache.maxsize = 0
+    np.testing.assert_allclose([app.predict_one(record) for record in records], expected, rtol=1e-6)
+
+
+def test_cache_cleared_when_model_version_changes(cache):
+    app.predict_one(CUSTOMER)
+    cache.set("stale", 0.0)
+
+    # a result cached for other artifacts is dropped on the next request
+    cache.version = "previous"
+    app.predict_one(CUSTOMER)
+    assert cache.get("stale") is None
+    assert cache.version == app.registry.version
+    assert cache.stats()["size"] == 1
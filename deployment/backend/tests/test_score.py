@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import subprocess
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import app
+from conftest import BACKEND_DIR, DATA_PATH, MODEL_DIR
+from packages.model_registry import ModelRegistry
+from score import FEATURES, ID_COL
+
+
+@pytest.fixture
+def customers(tmp_path):
+    # blank TotalCharges and customers the model cannot score
+    data = pd.read_csv(DATA_PATH, dtype={'TotalCharges': str})
+    data = pd.concat([data.head(300), data[data['TotalCharges'].str.strip() == '']])
+    data = data.drop(columns='Churn').reset_index(drop=True)
+    data.loc[3, 'Contract'] = 'Weekly'
+    data.loc[7, 'SeniorCitizen'] = 2
+    data.loc[11, 'InternetService'] = np.nan
+
+    path = tmp_path / 'customers.csv'
+    data.to_csv(path, index=False)
+    return path
+
+
+def api_results(path):
+    # the same customers sent to the HTTP API, blank TotalCharges being null
+    data = pd.read_csv(path, dtype={'TotalCharges': str})
+    data['TotalCharges'] = pd.to_numeric(data['TotalCharges'], errors='coerce')
+    records = [
+        {feat: None if pd.isna(value) else value for feat, value in zip(FEATURES, row)}
+        for row in data[FEATURES].astype(object).itertuples(index=False)
+    ]
+
+    client = app.app.test_client()
+    results = client.post('/predict/batch', json=records).get_json()['results']
+    return data[ID_COL], results
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_score_matches_api(customers, tmp_path, monkeypatch, workers):
+    output = tmp_path / 'scores.csv'
+    subprocess.run(
+        [
+            sys.executable, 'score.py', str(customers), str(output), '--engine', 'npz',
+            '--model-dir', str(MODEL_DIR), '--chunksize', '100', '--workers', str(workers)
+        ],
+        cwd=BACKEND_DIR, check=True, capture_output=True
+    )
+    scores = pd.read_csv(output)
+    errors = pd.read_csv(tmp_path / 'scores.errors.csv')
+
+    monkeypatch.setattr(app, 'registry', ModelRegistry(MODEL_DIR, 'npz'))
+    ids, results = api_results(customers)
+
+    # the API rejects the customers the CLI writes to the errors
+    valid = [result['success'] for result in results]
+    assert scores[ID_COL].to_list() == ids[valid].to_list()
+    np.testing.assert_allclose(
+        scores['probability'], [result['result']['probability'] for result in results if result['success']],
+        rtol=1e-6
+    )
+    assert scores['class'].to_list() == [int(result['result']['class']) for result in results if result['success']]
+
+    assert errors[ID_COL].to_list() == ids[[not success for success in valid]].to_list()
+    assert errors['error'].to_list() == [result['message'] for result in results if not result['success']]
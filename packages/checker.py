@@ -1,14 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import numpy as np
 import pandas as pd
+from pathlib import Path
+
+from packages.parallel import resolve_n_jobs, shareable_columns, map_columns, nunique
 
 """
 Useful functions to check dataframe
 """
 
 
-def check_unique(data, col_type='both'):
+def check_unique(data, col_type='both', n_jobs=None):
     """
     Count the number of unique values in each features for 'numeric', 'categorical', or 'both'
 
@@ -19,12 +23,36 @@ def check_unique(data, col_type='both'):
     col_type : str
         The type of the column to filter. Either 'number', 'object', or 'both'
 
+    n_jobs : int
+        Number of processes to count numeric columns in, -1 meaning all the cores.
+        Object columns are always counted in the current process
+
     Returns
     -------
     DataFrame
         Number of unique values of each features
     """
 
+    col_type = _resolve_col_type(col_type)
+
+    columns = data.select_dtypes(include=col_type).columns
+
+    # get the number of unique values in each column
+    if resolve_n_jobs(n_jobs) > 1:
+        shared = shareable_columns(data[columns])
+        counts = dict(zip(shared, map_columns(data, shared, nunique, n_jobs)))
+        num_unique = [(col, counts[col] if col in counts else data[col].nunique()) for col in columns]
+    else:
+        num_unique = [(col, data[col].nunique()) for col in columns]
+
+    return _unique_report(num_unique, data.shape[0])
+
+
+def _resolve_col_type(col_type):
+    """
+    Validate `col_type` and turn it into a `select_dtypes` argument
+    """
+
     # check if the column type is valid
     if col_type not in ('number', 'object', 'both'):
         raise ValueError('col_type must be either "number", "object", or "both"')
@@ -33,12 +61,16 @@ def check_unique(data, col_type='both'):
     if col_type == 'both':
         col_type = ['number', 'object']
 
-    # get the number of unique values in each column
-    data_unique_count = pd.DataFrame.from_records(
-        [(col, data[col].nunique()) for col in data.select_dtypes(include=col_type).columns],
-        columns=['feats', 'num_unique']
-    )
-    data_unique_count['pct_unique'] = data_unique_count['num_unique'] / data.shape[0] * 100
+    return col_type
+
+
+def _unique_report(num_unique, n_rows):
+    """
+    Build the `check_unique` report from (feature, number of unique values) pairs
+    """
+
+    data_unique_count = pd.DataFrame.from_records(num_unique, columns=['feats', 'num_unique'])
+    data_unique_count['pct_unique'] = data_unique_count['num_unique'] / n_rows * 100
 
     return data_unique_count
 
@@ -57,8 +89,16 @@ def check_missing(data):
         Missing values in dataset
     """
 
+    return _missing_report(data.isna().sum(), len(data))
+
+
+def _missing_report(tot_missing, n_rows):
+    """
+    Build the `check_missing` report from the number of missing values of each feature
+    """
+
     # create a DataFrame to store the missing values
-    data_missing = pd.DataFrame(data.isna().sum().sort_values(ascending=False), columns=['tot_missing']).reset_index()
+    data_missing = pd.DataFrame(tot_missing.sort_values(ascending=False), columns=['tot_missing']).reset_index()
 
     # reset the index and make the features columns
     data_missing = data_missing.rename(columns={'index': 'feats'})
@@ -67,12 +107,37 @@ def check_missing(data):
     data_missing = data_missing[data_missing['tot_missing'] > 0]
 
     # calculate the percentage of missing values for each features
-    data_missing['tot_missing_pct'] = data_missing['tot_missing'] / len(data) * 100
+    data_missing['tot_missing_pct'] = data_missing['tot_missing'] / n_rows * 100
 
     return data_missing
 
 
-def check_missing_special(data, *args):
+def _special_missvals(args):
+    """
+    Deduplicate the special keywords, nan is left to `check_missing`
+    """
+    return list(dict.fromkeys(
+        missval for missval in args if not (isinstance(missval, float) and np.isnan(missval))
+    ))
+
+
+def _count_missing_special(data, missvals):
+    """
+    Count the special missing values of each column in a single vectorized pass
+    """
+
+    # only numbers can match numeric columns
+    if any(isinstance(missval, (int, float, np.number)) for missval in missvals):
+        columns = data.columns
+    else:
+        columns = data.select_dtypes(exclude='number').columns
+
+    counts = data[columns].isin(missvals).sum()
+
+    return counts.reindex(data.columns, fill_value=0)
+
+
+def check_missing_special(data, *args, chunksize=None):
     """
     Function to check special missing values in dataset
     (e.g. missing values in categorical features)
@@ -80,8 +145,10 @@ def check_missing_special(data, *args):
 
     Parameters:
     -----------
-    data (dataframe): dataframe to be checked
+    data (dataframe, path or iterable of dataframes): dataframe to be checked,
+        path of a CSV file, or chunks of a dataframe
     *args : list of special keywords representing the missing values
+    chunksize (int): number of rows per chunk when `data` is a path to a CSV file
 
     Returns
     -------
@@ -89,32 +156,42 @@ def check_missing_special(data, *args):
         Missing values in dataset
     """
 
-    # create dictionary to store missing values
-    missing_values = {
-        'feats': [],
-        'tot_missing': [],
-        'tot_missing_pct': []
-    }
-
-    # Loop through the columns
-    for col in data.columns:
-        # set total missing values to 0
-        tot_missval = 0
-        # Loop through special keywords representing missing values
-        for missval in args:
-            if missval not in data[col].unique():
-                continue
-            # count the number of missing values
-            tot_missval += len(data[data[col] == missval])
-        
-        # add the missing values to the dictionary
-        missing_values['feats'].append(col)
-        missing_values['tot_missing'].append(tot_missval)
-        missing_values['tot_missing_pct'].append(tot_missval / len(data) * 100)
-
-    # create a dataframe with the missing values dictionary
-    missing_values = pd.DataFrame(missing_values)
-    
+    missvals = _special_missvals(args)
+
+    if isinstance(data, pd.DataFrame):
+        tot_missing = _count_missing_special(data, missvals)
+        tot_rows = len(data)
+    else:
+        # read the CSV file in chunks so it does not need to fit in memory
+        if isinstance(data, (str, Path)):
+            data = pd.read_csv(data, chunksize=chunksize or 100_000)
+
+        tot_missing = None
+        tot_rows = 0
+        for chunk in data:
+            counts = _count_missing_special(chunk, missvals)
+            tot_missing = counts if tot_missing is None else tot_missing.add(counts, fill_value=0)
+            tot_rows += len(chunk)
+
+        if tot_missing is None:
+            tot_missing = pd.Series(dtype='int64')
+        tot_missing = tot_missing.astype('int64')
+
+    return _missing_special_report(tot_missing, tot_rows)
+
+
+def _missing_special_report(tot_missing, n_rows):
+    """
+    Build the `check_missing_special` report from the number of special missing values of each feature
+    """
+
+    # create a dataframe with the missing values
+    missing_values = pd.DataFrame({
+        'feats': tot_missing.index,
+        'tot_missing': tot_missing.to_numpy(),
+    })
+    missing_values['tot_missing_pct'] = missing_values['tot_missing'] / n_rows * 100
+
     # drop the rows with no missing values
     missing_values = missing_values[missing_values['tot_missing'] > 0].reset_index(drop=True)
 
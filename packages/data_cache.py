@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Columnar cache of the cleaned Telco churn dataset
+"""
+
+import os
+import sys
+import json
+import inspect
+import hashlib
+from pathlib import Path
+
+from packages import loader, imputation_handling
+from packages.loader import DATA_PATH, load_telco
+from packages.imputation_handling import impute_total_charges, impute_no_phone_internet
+
+
+CACHE_DIR = 'data/cache'
+
+# modules whose code changes the cached data, this one holding `clean_telco`
+CODE_MODULES = [loader, imputation_handling, sys.modules[__name__]]
+
+FORMATS = {'feather': '.feather', 'parquet': '.parquet'}
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    Hash the content of a file chunk by chunk
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def code_version(modules=None):
+    """
+    Hash the source code of the preprocessing modules
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for module in CODE_MODULES if modules is None else modules:
+        digest.update(inspect.getsource(module).encode())
+    return digest.hexdigest()
+
+
+def source_digest(path, cache_dir=CACHE_DIR):
+    """
+    Hash a source file, reusing the last hash while its size and modification time are unchanged
+    """
+
+    path = Path(path)
+    stat = path.stat()
+    stamp_path = Path(cache_dir) / f'{path.name}.digest.json'
+
+    if stamp_path.exists():
+        stamp = json.loads(stamp_path.read_text())
+        if stamp['size'] == stat.st_size and stamp['mtime_ns'] == stat.st_mtime_ns:
+            return stamp['digest']
+
+    digest = file_digest(path)
+    _write_atomic(
+        stamp_path,
+        lambda tmp_path: Path(tmp_path).write_text(
+            json.dumps({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest})
+        )
+    )
+
+    return digest
+
+
+def _write_atomic(path, write):
+    """
+    Write a file through a temporary file, so readers never see a partial file
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+
+def clean_telco(path=DATA_PATH, impute=True, float_dtype='float32'):
+    """
+    Load and clean the Telco churn dataset
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        Path of the CSV file
+    impute : bool
+        Whether to impute `TotalCharges` and replace 'No phone service' and
+        'No internet service' with 'No'. Both only look at each row on its own,
+        so they can run before the train/test split
+    float_dtype : str
+        Dtype of the charges
+
+    Returns
+    -------
+    DataFrame
+        Cleaned dataset
+    """
+
+    data = load_telco(path, float_dtype=float_dtype)
+
+    if impute:
+        data = impute_total_charges(data)
+        data = impute_no_phone_internet(data)
+
+    return data
+
+
+def load_cached(path=DATA_PATH, cache_dir=CACHE_DIR, fmt='feather', impute=True,
+                float_dtype='float32', memory_map=True, rebuild=False):
+    """
+    Load the cleaned Telco churn dataset through a columnar cache
+
+    The cache file is keyed by the hash of the source file and of the
+    preprocessing code, so it is rebuilt whenever either changes. Stale cache
+    files of the same source are removed.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        Path of the CSV file
+    cache_dir : str or pathlib.Path
+        Directory of the cache files
+    fmt : str
+        Cache format, either 'feather' (uncompressed, memory-mapped) or 'parquet' (smaller)
+    impute : bool
+        Whether to apply the row-wise imputations, see `clean_telco`
+    float_dtype : str
+        Dtype of the charges
+    memory_map : bool
+        Memory-map the Feather file instead of reading it
+    rebuild : bool
+        Rebuild the cache even if it is up to date
+
+    Returns
+    -------
+    DataFrame
+        Cleaned dataset
+    """
+
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {list(FORMATS)}")
+
+    path = Path(path)
+    cache_dir = Path(cache_dir)
+
+    # each combination of options gets its own file, keyed by the source and the code
+    options = f"{'imputed' if impute else 'raw'}-{float_dtype}"
+    key = hashlib.blake2b(f'{source_digest(path, cache_dir)}-{code_version()}'.encode(), digest_size=8).hexdigest()
+    cache_path = cache_dir / f'{path.stem}-{options}-{key}{FORMATS[fmt]}'
+
+    if rebuild or not cache_path.exists():
+        data = clean_telco(path, impute, float_dtype)
+
+        if fmt == 'feather':
+            _write_atomic(cache_path, lambda tmp_path: feather.write_feather(data, tmp_path, compression='uncompressed'))
+        else:
+            _write_atomic(cache_path, lambda tmp_path: data.to_parquet(tmp_path, index=False))
+
+        # remove the files of older versions of the source or code
+        for stale_path in cache_dir.glob(f'{path.stem}-{options}-*{FORMATS[fmt]}'):
+            if stale_path != cache_path:
+                stale_path.unlink()
+
+        return data
+
+    if fmt == 'feather':
+        return feather.read_table(cache_path, memory_map=memory_map).to_pandas()
+    return pq.read_table(cache_path, memory_map=memory_map).to_pandas()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Load the Telco churn dataset with compact dtypes
+"""
+
+import pandas as pd
+
+
+DATA_PATH = 'data/WA_Fn-UseC_-Telco-Customer-Churn.csv'
+
+ID_COL = 'customerID'
+
+NO_YES = ['No', 'Yes']
+NO_SERVICE_PHONE = ['No', 'No phone service', 'Yes']
+NO_SERVICE_INTERNET = ['No', 'No internet service', 'Yes']
+
+# categories of every low cardinality text column
+CATEGORIES = {
+    'gender': ['Female', 'Male'],
+    'Partner': NO_YES,
+    'Dependents': NO_YES,
+    'PhoneService': NO_YES,
+    'MultipleLines': NO_SERVICE_PHONE,
+    'InternetService': ['DSL', 'Fiber optic', 'No'],
+    'OnlineSecurity': NO_SERVICE_INTERNET,
+    'OnlineBackup': NO_SERVICE_INTERNET,
+    'DeviceProtection': NO_SERVICE_INTERNET,
+    'TechSupport': NO_SERVICE_INTERNET,
+    'StreamingTV': NO_SERVICE_INTERNET,
+    'StreamingMovies': NO_SERVICE_INTERNET,
+    'Contract': ['Month-to-month', 'One year', 'Two year'],
+    'PaperlessBilling': NO_YES,
+    'PaymentMethod': [
+        'Bank transfer (automatic)',
+        'Credit card (automatic)',
+        'Electronic check',
+        'Mailed check',
+    ],
+    'Churn': NO_YES,
+}
+
+# dtypes of the numeric columns, the charges use `float_dtype`
+NUMERIC_DTYPES = {
+    'SeniorCitizen': 'int8',
+    'tenure': 'int16',
+}
+
+CHARGES_COLS = ['MonthlyCharges', 'TotalCharges']
+
+# blank values of `TotalCharges` for the customers with no tenure yet
+BLANK_VALUES = [' ']
+
+
+def telco_dtypes(float_dtype='float32'):
+    """
+    Get the dtypes to read the Telco churn columns with
+
+    The text columns are read as categories inferred from the data, then
+    checked against `CATEGORIES` by `load_telco`.
+
+    Parameters
+    ----------
+    float_dtype : str
+        Dtype of the charges
+
+    Returns
+    -------
+    dict
+        Dtype of each column
+    """
+
+    dtypes = {col: 'category' for col in CATEGORIES}
+    dtypes.update(NUMERIC_DTYPES)
+    dtypes.update({col: float_dtype for col in CHARGES_COLS})
+
+    return dtypes
+
+
+def load_telco(path=DATA_PATH, engine=None, float_dtype='float32', usecols=None, **kwargs):
+    """
+    Read the Telco churn dataset with categorical, small integer and float32 dtypes
+
+    Blank `TotalCharges` are parsed as NaN, so the column is numeric right away.
+    The categories are fixed to `CATEGORIES`, so their codes are the same
+    whatever the extract.
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        Path of the CSV file
+    engine : str
+        Parser engine of `pandas.read_csv`, e.g. 'pyarrow' for multithreaded parsing
+    float_dtype : str
+        Dtype of the charges, 'float64' to keep full precision
+    usecols : list
+        Columns to read, all of them by default
+    **kwargs :
+        Passed to `pandas.read_csv`
+
+    Returns
+    -------
+    DataFrame
+        Typed dataset
+    """
+
+    dtypes = telco_dtypes(float_dtype)
+    if usecols is not None:
+        dtypes = {col: dtype for col, dtype in dtypes.items() if col in usecols}
+
+    # the pyarrow engine also stores the IDs as arrow strings
+    if engine == 'pyarrow':
+        dtypes[ID_COL] = 'string[pyarrow]'
+
+    data = pd.read_csv(path, engine=engine, dtype=dtypes, na_values=BLANK_VALUES, usecols=usecols, **kwargs)
+
+    # fix the categories, refusing values that would silently become NaN
+    for col, categories in CATEGORIES.items():
+        if col not in data.columns:
+            continue
+
+        unknown = set(data[col].cat.categories) - set(categories)
+        if unknown:
+            raise ValueError(f'Unknown values in {col}: {sorted(unknown)}')
+
+        data[col] = data[col].cat.set_categories(categories)
+
+    return data
+
+
+def memory_report(path=DATA_PATH, engine=None, float_dtype='float32'):
+    """
+    Compare the memory used by the typed dataset with a default `pandas.read_csv`
+
+    Parameters
+    ----------
+    path : str or pathlib.Path
+        Path of the CSV file
+    engine : str
+        Parser engine of the typed read
+    float_dtype : str
+        Dtype of the charges in the typed read
+
+    Returns
+    -------
+    DataFrame
+        Dtype and memory in bytes of each column with both reads, and the total
+    """
+
+    default = pd.read_csv(path)
+    typed = load_telco(path, engine=engine, float_dtype=float_dtype)
+
+    report = pd.DataFrame({
+        'default_dtype': default.dtypes.astype(str),
+        'default_bytes': default.memory_usage(index=False, deep=True),
+        'typed_dtype': typed.dtypes.astype(str),
+        'typed_bytes': typed.memory_usage(index=False, deep=True),
+    })
+    report.loc['total'] = ['', report['default_bytes'].sum(), '', report['typed_bytes'].sum()]
+    report['reduction'] = 1 - report['typed_bytes'] / report['default_bytes']
+
+    return report
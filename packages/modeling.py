@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Churn models and their tf.data input pipelines
+"""
+
+import tensorflow as tf
+from tensorflow import keras
+
+
+def configure_threads(intra_op=None, inter_op=None):
+    """
+    Set the TensorFlow thread pools, before any operation runs
+
+    Parameters
+    ----------
+    intra_op : int
+        Threads used inside an operation, e.g. a matrix multiplication. 0 or None lets TensorFlow decide
+    inter_op : int
+        Operations run in parallel. 0 or None lets TensorFlow decide
+    """
+    if intra_op is not None:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op)
+    if inter_op is not None:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op)
+
+
+def make_dataset(X, y, batch_size=128, shuffle_buffer=None, seed=42):
+    """
+    Build a cached and prefetched tf.data pipeline
+
+    Parameters
+    ----------
+    X : ndarray
+        Encoded features
+    y : ndarray
+        Encoded target
+    batch_size : int
+        Number of rows per batch
+    shuffle_buffer : int
+        Size of the shuffle buffer, no shuffling if None. The whole set fits in
+        the buffer for a full shuffle every epoch
+    seed : int
+        Seed of the shuffling
+
+    Returns
+    -------
+    tf.data.Dataset
+    """
+
+    # keep the tensors after the first epoch instead of slicing them again
+    dataset = tf.data.Dataset.from_tensor_slices((X, y)).cache()
+
+    if shuffle_buffer:
+        dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+
+    # prepare the next batches while the current one is trained on
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def _initializer(he_init, seed):
+    if he_init:
+        return keras.initializers.he_normal(seed=seed)
+    return keras.initializers.glorot_uniform(seed=seed)
+
+
+def build_sequential(n_features, units=8, dropout=0.0, l2=0.0, learning_rate=0.001, he_init=False, seed=42):
+    """
+    Build and compile the churn model with the Sequential API
+
+    Parameters
+    ----------
+    n_features : int
+        Number of encoded features
+    units : int
+        Units of the hidden layer
+    dropout : float
+        Dropout rate after the hidden layer, no dropout layer if 0
+    l2 : float
+        L2 regularization of the hidden layer, none if 0
+    learning_rate : float
+        Learning rate of Adam
+    he_init : bool
+        Initialize the hidden layer with He normal instead of Glorot uniform
+    seed : int
+        Seed of the hidden layer initializer
+
+    Returns
+    -------
+    keras.Model
+    """
+
+    layers = [
+        keras.layers.Dense(
+            units=units,
+            activation='relu',
+            input_shape=(n_features,),
+            kernel_initializer=_initializer(he_init, seed),
+            kernel_regularizer=keras.regularizers.l2(l2) if l2 else None
+        ),
+    ]
+    if dropout:
+        layers.append(keras.layers.Dropout(rate=dropout))
+    layers.append(keras.layers.Dense(units=1, activation='sigmoid'))
+
+    model = keras.Sequential(layers)
+
+    model.compile(
+        loss='binary_crossentropy',
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+        metrics=['accuracy']
+    )
+
+    return model
+
+
+def build_functional(n_features, units=8, dropout=0.0, l2=0.0, learning_rate=0.001, he_init=False, seed=42):
+    """
+    Build and compile the churn model with the Functional API
+
+    Takes the same parameters as `build_sequential`.
+    """
+
+    input_ = keras.layers.Input(shape=(n_features,))
+    hidden_1 = keras.layers.Dense(
+        units=units,
+        activation='relu',
+        kernel_initializer=_initializer(he_init, seed),
+        kernel_regularizer=keras.regularizers.l2(l2) if l2 else None
+    )(input_)
+    if dropout:
+        hidden_1 = keras.layers.Dropout(rate=dropout)(hidden_1)
+    output = keras.layers.Dense(units=1, activation='sigmoid')(hidden_1)
+
+    model = keras.Model(inputs=input_, outputs=output)
+
+    model.compile(
+        loss='binary_crossentropy',
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+        metrics=['accuracy']
+    )
+
+    return model
+
+
+# models of the notebook, the tuned sequential one being the deployed one
+MODELS = {
+    'sequential': (build_sequential, {}),
+    'sequential_tuned': (build_sequential, {'dropout': 0.2, 'l2': 0.01, 'he_init': True}),
+    'functional': (build_functional, {}),
+    'functional_tuned': (build_functional, {'dropout': 0.2, 'l2': 0.01, 'he_init': True}),
+}
+
+
+def build_model(name, n_features, **params):
+    """
+    Build one of the `MODELS`, overriding its parameters with `params`
+    """
+    builder, defaults = MODELS[name]
+    return builder(n_features, **{**defaults, **params})
@@ -1,9 +1,16 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import json
+from pathlib import Path
+
 import numpy as np
 import pandas as pd
-from feature_engine.outliers import OutlierTrimmer, Winsorizer
+from sklearn.base import BaseEstimator, TransformerMixin
+
+from packages.parallel import resolve_n_jobs, shareable_columns, map_columns, skew
+from packages.profiler import iter_chunks, _is_numeric_text
+from packages.quantile_sketch import KLLSketch
 
 """
 Useful functions to handle outliers
@@ -30,8 +37,11 @@ def find_normal_boundaries(data, variable):
         The computed lower boundary of the data
     """
 
-    upper_boundary = data[variable].mean() + 3 * data[variable].std()
-    lower_boundary = data[variable].mean() - 3 * data[variable].std()
+    mean = data[variable].mean()
+    std = data[variable].std()
+
+    upper_boundary = mean + 3 * std
+    lower_boundary = mean - 3 * std
 
     return upper_boundary, lower_boundary
 
@@ -59,15 +69,18 @@ def find_skewed_boundaries(data, variable, fold):
         The computed lower boundary of the data
     """
 
-    IQR = data[variable].quantile(0.75) - data[variable].quantile(0.25)
+    # compute both quartiles in a single call
+    q1, q3 = data[variable].quantile([0.25, 0.75])
+
+    IQR = q3 - q1
 
-    upper_boundary = data[variable].quantile(0.75) + (IQR * fold)
-    lower_boundary = data[variable].quantile(0.25) - (IQR * fold)
+    upper_boundary = q3 + (IQR * fold)
+    lower_boundary = q1 - (IQR * fold)
 
     return upper_boundary, lower_boundary
 
 
-def check_dist(data):
+def check_dist(data, n_jobs=None):
     """
     Check the Skewness and Distribution for each features in a dataset
 
@@ -75,14 +88,32 @@ def check_dist(data):
     ----------
     data : DataFrame
 
+    n_jobs : int
+        Number of processes to compute the skewness in, -1 meaning all the cores
+
     Returns
     -------
     DataFrame
         Skewness and distribution types of each features
     """
 
+    # compute the skewness of each feature
+    if resolve_n_jobs(n_jobs) > 1:
+        columns = shareable_columns(data)
+        skewness = pd.Series(map_columns(data, columns, skew, n_jobs), index=columns, dtype='float64')
+    else:
+        skewness = data.skew()
+
+    return _dist_table(skewness)
+
+
+def _dist_table(skewness):
+    """
+    Build the `check_dist` table from the skewness of each feature
+    """
+
     # create a DataFrame containing the features of the dataset and their respective skewness
-    data_skewness = pd.DataFrame(data.skew(), columns=['skew']).reset_index()
+    data_skewness = pd.DataFrame(skewness, columns=['skew']).reset_index()
 
     # reset the index and make the features columns
     data_skewness = data_skewness.rename(columns={'index': 'feats'})
@@ -97,17 +128,64 @@ def check_dist(data):
     return data_skewness
 
 
-def check_outlier(data, fold=1.5):
+def column_outlier(series, dist, fold):
+    """
+    Calculate the boundaries and the number of outliers in each tail of a feature
+
+    Parameters
+    ----------
+    series : Series
+
+    dist : str
+        Distribution of the feature. Either 'normal' or 'skewed'
+
+    fold : float
+        The multiplier of IQR to calculate the boundaries for skewed distributions
+
+    Returns
+    -------
+    tuple
+        Upper boundary, lower boundary, number of outliers in the right tail and in the left tail
+    """
+
+    data = series.to_frame()
+
+    if dist == 'normal':
+        upper_bound, lower_bound = find_normal_boundaries(data, series.name)
+    else:
+        upper_bound, lower_bound = find_skewed_boundaries(data, series.name, fold)
+
+    tot_right_tail = int((series > upper_bound).sum())
+    tot_left_tail = int((series < lower_bound).sum())
+
+    return upper_bound, lower_bound, tot_right_tail, tot_left_tail
+
+
+def check_outlier(data, fold=1.5, n_jobs=None, sketch=False, chunksize=None, **read_csv_kwargs):
     """
     Check the outlier info for each features in a dataset
 
     Parameters
     ----------
-    data : DataFrame
+    data : DataFrame, str, pathlib.Path or iterable of DataFrames
+        Data, path of a CSV or Parquet file, or chunks of a DataFrame.
+        Anything but a DataFrame is read in chunks with `sketch` on
 
     fold : float
         The multiplier of IQR to calculate the boundaries for skewed distributions. It's either 1.5 or 3
 
+    n_jobs : int
+        Number of processes to compute the statistics in, -1 meaning all the cores
+
+    sketch : bool
+        Estimate the statistics in one chunked pass with bounded memory, see `OutlierSketch`
+
+    chunksize : int
+        Number of rows per chunk in `sketch` mode
+
+    **read_csv_kwargs :
+        Passed to `pandas.read_csv` when `data` is the path of a CSV file
+
     Returns
     -------
     DataFrame
@@ -117,72 +195,377 @@ def check_outlier(data, fold=1.5):
     if fold not in (1.5, 3):
         raise ValueError('Parameter fold only accepts numeric value of either 1.5 or 3')
 
-    data_skewness = check_dist(data)
-
-    # create a dictionary to store the outlier infos
-    data_outlier = {
-        'feats': [],
-        'upper_bound': [],
-        'lower_bound': [],
-        'tot_right_tail': [],
-        'tot_left_tail': [],
-        'tot_right_tail_pct': [],
-        'tot_left_tail_pct': [],
-        'tot_outlier': [],
-        'tot_outlier_pct': [],
-    }
-
-    # loop over each row in the `skewness` DataFrame
-    # calculate each features upper and lower boundaries and the outlier percentage
-    for row in data_skewness.index:
-        col = data_skewness.iloc[row]['feats']
-
-        if data_skewness.iloc[row]['dist'] == 'normal':
-            upper_bound, lower_bound = find_normal_boundaries(data, col)
-        else:
-            upper_bound, lower_bound = find_skewed_boundaries(data, col, fold)
-
-        tot_right_tail = len(data[data[col] > upper_bound])
-        tot_left_tail = len(data[data[col] < lower_bound])
-        tot_right_tail_pct = tot_right_tail / len(data) * 100
-        tot_left_tail_pct = tot_left_tail / len(data) * 100
-        tot_outlier =  tot_right_tail + tot_left_tail
-        tot_outlier_pct = tot_right_tail_pct + tot_left_tail_pct
-
-        data_outlier['feats'].append(col)
-        data_outlier['upper_bound'].append(upper_bound)
-        data_outlier['lower_bound'].append(lower_bound)
-        data_outlier['tot_right_tail'].append(tot_right_tail)
-        data_outlier['tot_left_tail'].append(tot_left_tail)
-        data_outlier['tot_right_tail_pct'].append(tot_right_tail_pct)
-        data_outlier['tot_left_tail_pct'].append(tot_left_tail_pct)
-        data_outlier['tot_outlier'].append(tot_outlier)
-        data_outlier['tot_outlier_pct'].append(tot_outlier_pct)
-    
-    data_outlier = pd.DataFrame(data_outlier)
+    if sketch or not isinstance(data, pd.DataFrame):
+        return _sketch_outlier(data, fold, chunksize, **read_csv_kwargs)[1]
+
+    data_skewness = check_dist(data, n_jobs)
+
+    if resolve_n_jobs(n_jobs) <= 1:
+        return outlier_stats(data, fold, data_skewness)
+
+    # calculate each features upper and lower boundaries and the number of outliers in each tail
+    columns = data_skewness['feats'].to_list()
+    args_list = [(dist, fold) for dist in data_skewness['dist']]
+    upper_bound, lower_bound, tot_right_tail, tot_left_tail = map(
+        np.array, zip(*map_columns(data, columns, column_outlier, n_jobs, args_list))
+    ) if columns else [np.array([])] * 4
+
+    return _outlier_table(columns, upper_bound, lower_bound, tot_right_tail, tot_left_tail, len(data))
+
+
+def outlier_stats(data, fold=1.5, data_skewness=None):
+    """
+    Compute the outlier info of every feature at once
+
+    Means and standard deviations of the normal features and quartiles of the
+    skewed ones are computed with one vectorized call each, and the tails are
+    counted with NumPy boolean sums. The result is the same table as `check_outlier`.
+
+    Parameters
+    ----------
+    data : DataFrame
+
+    fold : float
+        The multiplier of IQR to calculate the boundaries for skewed distributions
+
+    data_skewness : DataFrame
+        Output of `check_dist` if already computed
+
+    Returns
+    -------
+    DataFrame
+        Outlier infos such as upper and lower boundary, and also the number of outliers for each features
+    """
+
+    if data_skewness is None:
+        data_skewness = check_dist(data)
+
+    columns = data_skewness['feats'].to_list()
+    normal = (data_skewness['dist'] == 'normal').to_numpy()
+    features = data[columns]
+
+    upper_bound = np.full(len(columns), np.nan)
+    lower_bound = np.full(len(columns), np.nan)
+
+    # boundaries for normal distributions
+    if normal.any():
+        normal_features = features.iloc[:, normal]
+        mean = normal_features.mean().to_numpy()
+        std = normal_features.std().to_numpy()
+
+        upper_bound[normal] = mean + 3 * std
+        lower_bound[normal] = mean - 3 * std
+
+    # boundaries for skewed distributions, both quartiles in a single call
+    if not normal.all():
+        quartiles = features.iloc[:, ~normal].quantile([0.25, 0.75])
+        q1 = quartiles.loc[0.25].to_numpy()
+        q3 = quartiles.loc[0.75].to_numpy()
+        IQR = q3 - q1
+
+        upper_bound[~normal] = q3 + (IQR * fold)
+        lower_bound[~normal] = q1 - (IQR * fold)
+
+    # count the tails without materializing filtered copies
+    tot_right_tail = np.array(
+        [np.count_nonzero(features[col].to_numpy() > upper) for col, upper in zip(columns, upper_bound)],
+        dtype=np.int64
+    )
+    tot_left_tail = np.array(
+        [np.count_nonzero(features[col].to_numpy() < lower) for col, lower in zip(columns, lower_bound)],
+        dtype=np.int64
+    )
+
+    return _outlier_table(columns, upper_bound, lower_bound, tot_right_tail, tot_left_tail, len(data))
+
+
+def _outlier_table(columns, upper_bound, lower_bound, tot_right_tail, tot_left_tail, n_rows):
+    """
+    Build the `check_outlier` table from the boundaries and tail counts of each feature
+    """
+
+    tot_right_tail_pct = tot_right_tail / n_rows * 100
+    tot_left_tail_pct = tot_left_tail / n_rows * 100
+
+    data_outlier = pd.DataFrame({
+        'feats': columns,
+        'upper_bound': upper_bound,
+        'lower_bound': lower_bound,
+        'tot_right_tail': tot_right_tail,
+        'tot_left_tail': tot_left_tail,
+        'tot_right_tail_pct': tot_right_tail_pct,
+        'tot_left_tail_pct': tot_left_tail_pct,
+        'tot_outlier': tot_right_tail + tot_left_tail,
+        'tot_outlier_pct': tot_right_tail_pct + tot_left_tail_pct,
+    })
 
     return data_outlier
 
 
-def outlier_summary(data, fold=1.5):
+def _numeric_columns(chunk):
+    """
+    Numeric columns of a chunk, with text columns whose non blank values are all numbers
+
+    A CSV column such as TotalCharges, with blank strings for missing values,
+    is read as text in the chunks holding a blank and as numbers in the others.
+    """
+
+    columns = []
+    for col in chunk.columns:
+        series = chunk[col]
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        if pd.api.types.is_numeric_dtype(series):
+            columns.append(col)
+        elif pd.api.types.is_object_dtype(series) and _is_numeric_text(series):
+            # every value but the missing and blank ones must parse
+            columns.append(col)
+
+    return columns
+
+
+def _numeric_values(chunk, columns):
+    """
+    Values of the columns of a chunk as float64, values that are not numbers become NaN
+    """
+    values = chunk[columns]
+    if not all(pd.api.types.is_numeric_dtype(values[col]) for col in columns):
+        values = values.apply(pd.to_numeric, errors='coerce')
+    return values.to_numpy(dtype=np.float64)
+
+
+class OutlierSketch:
+    """
+    Mergeable statistics for `check_dist` and `check_outlier` over chunked data
+
+    The numeric features are fixed by the first chunk, see `_numeric_columns`,
+    and their values that are not numbers in later chunks are missing values.
+
+    The mean, standard deviation and skewness of each numeric feature are
+    exact, merged chunk by chunk from their central moments. The quartiles
+    come from a `KLLSketch` per feature, so the memory does not grow with the
+    number of rows: their rank error is about 1% with the default `k`. The
+    number of outliers is either counted in a second pass over the data, or
+    estimated from the sketches within about 1% of the number of rows.
+
+    Parameters
+    ----------
+    k : int
+        Size of the quantile sketches
+    seed : int
+        Seed of the quantile sketches
+    """
+
+    def __init__(self, k=200, seed=None):
+        self.k = k
+        self.seed = seed
+
+        self.n_rows = 0
+        self.columns = None
+        self.count = None
+        self.mean = None
+        self.m2 = None
+        self.m3 = None
+        self.sketches = None
+
+    def _merge_moments(self, count, mean, m2, m3):
+        # pairwise update of the central moments (Chan et al., Pebay)
+        n_a, n_b = self.count, count
+        n = n_a + n_b
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = np.where(n > 0, mean - self.mean, 0)
+            self.mean = np.where(n > 0, self.mean + delta * n_b / n, 0)
+            self.m3 = np.where(
+                n > 0,
+                self.m3 + m3 + delta ** 3 * n_a * n_b * (n_a - n_b) / n ** 2
+                + 3 * delta * (n_a * m2 - n_b * self.m2) / n,
+                0
+            )
+            self.m2 = np.where(n > 0, self.m2 + m2 + delta ** 2 * n_a * n_b / n, 0)
+        self.count = n
+
+    def _init_columns(self, columns):
+        self.columns = list(columns)
+        self.count = np.zeros(len(self.columns))
+        self.mean = np.zeros(len(self.columns))
+        self.m2 = np.zeros(len(self.columns))
+        self.m3 = np.zeros(len(self.columns))
+        self.sketches = [KLLSketch(self.k, self.seed) for _ in self.columns]
+
+    def update(self, chunk):
+        """
+        Add the statistics of a chunk
+
+        Parameters
+        ----------
+        chunk : DataFrame
+        """
+
+        if self.columns is None:
+            self._init_columns(_numeric_columns(chunk))
+
+        values = _numeric_values(chunk, self.columns)
+        self.n_rows += len(chunk)
+
+        # central moments of the chunk, ignoring missing values
+        count = np.count_nonzero(~np.isnan(values), axis=0).astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(count > 0, np.nansum(values, axis=0) / count, 0)
+        centered = values - mean
+        squared = centered * centered
+        m2 = np.nansum(squared, axis=0)
+        m3 = np.nansum(squared * centered, axis=0)
+        self._merge_moments(count, mean, m2, m3)
+
+        for pos, sketch in enumerate(self.sketches):
+            sketch.update(values[:, pos])
+
+        return self
+
+    def update_from(self, source, chunksize=None, **kwargs):
+        """
+        Add the statistics of every chunk of a DataFrame, CSV or Parquet file, or iterable of chunks
+        """
+        for chunk in iter_chunks(source, chunksize or 100_000, **kwargs):
+            self.update(chunk)
+        return self
+
+    def merge(self, other):
+        """
+        Merge the statistics of another partition into this one
+
+        Parameters
+        ----------
+        other : OutlierSketch
+        """
+
+        if other.columns is None:
+            return self
+        if self.columns is None:
+            self._init_columns(other.columns)
+
+        self.n_rows += other.n_rows
+        self._merge_moments(other.count, other.mean, other.m2, other.m3)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+
+        return self
+
+    def skew(self):
+        """
+        Skewness of each feature, with the same bias correction as pandas
+        """
+        if self.columns is None:
+            self._init_columns([])
+
+        count = self.count
+        m2 = np.where(np.abs(self.m2) < 1e-14, 0, self.m2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            skewness = count * (count - 1) ** 0.5 / (count - 2) * (self.m3 / m2 ** 1.5)
+        skewness = np.where(m2 == 0, 0, skewness)
+        skewness = np.where(count < 3, np.nan, skewness)
+
+        return pd.Series(skewness, index=self.columns, dtype='float64')
+
+    def check_dist(self):
+        return _dist_table(self.skew())
+
+    def check_outlier(self, fold=1.5, source=None, chunksize=None, **kwargs):
+        """
+        Outlier infos of each feature, as `check_outlier`
+
+        The number of outliers is counted exactly in a second chunked pass over
+        `source` if given, and estimated from the sketches otherwise.
+        """
+        if self.columns is None:
+            self._init_columns([])
+        if fold not in (1.5, 3):
+            raise ValueError('Parameter fold only accepts numeric value of either 1.5 or 3')
+
+        normal = (self.check_dist()['dist'] == 'normal').to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            std = np.sqrt(self.m2 / (self.count - 1))
+
+        quartiles = np.array([sketch.quantile([0.25, 0.75]) for sketch in self.sketches]).reshape(-1, 2)
+        q1, q3 = quartiles[:, 0], quartiles[:, 1]
+        IQR = q3 - q1
+
+        upper_bound = np.where(normal, self.mean + 3 * std, q3 + (IQR * fold))
+        lower_bound = np.where(normal, self.mean - 3 * std, q1 - (IQR * fold))
+
+        if source is not None:
+            # count the values beyond each boundary chunk by chunk
+            tot_right_tail = np.zeros(len(self.columns), dtype=np.int64)
+            tot_left_tail = np.zeros(len(self.columns), dtype=np.int64)
+            for chunk in iter_chunks(source, chunksize or 100_000, **kwargs):
+                values = _numeric_values(chunk, self.columns)
+                tot_right_tail += np.count_nonzero(values > upper_bound, axis=0)
+                tot_left_tail += np.count_nonzero(values < lower_bound, axis=0)
+        else:
+            # estimate the number of values beyond each boundary from the sketches
+            tot_right_tail = np.array(
+                [sketch.n - sketch.rank(upper) for sketch, upper in zip(self.sketches, upper_bound)],
+                dtype=np.int64
+            )
+            tot_left_tail = np.array(
+                [sketch.rank(lower, inclusive=False) for sketch, lower in zip(self.sketches, lower_bound)],
+                dtype=np.int64
+            )
+
+        return _outlier_table(self.columns, upper_bound, lower_bound, tot_right_tail, tot_left_tail, self.n_rows)
+
+
+def _sketch_outlier(data, fold, chunksize, **read_csv_kwargs):
+    """
+    Compute `check_dist` and `check_outlier` with an `OutlierSketch`
+
+    DataFrames and files are read a second time to count the outliers exactly,
+    other iterables only once.
+    """
+
+    state = OutlierSketch().update_from(data, chunksize, **read_csv_kwargs)
+    source = data if isinstance(data, (pd.DataFrame, str, Path)) else None
+
+    return state.check_dist(), state.check_outlier(fold, source, chunksize, **read_csv_kwargs)
+
+
+def outlier_summary(data, fold=1.5, sketch=False, chunksize=None, **read_csv_kwargs):
     """
     Check the summary for outlier data, such as distribution and number of outliers for each features
 
     Parameters
     ----------
-    data : DataFrame
+    data : DataFrame, str, pathlib.Path or iterable of DataFrames
+        Data, path of a CSV or Parquet file, or chunks of a DataFrame.
+        Anything but a DataFrame is read in chunks with `sketch` on
 
     fold : float
         The multiplier of IQR to calculate the boundaries for skewed distributions. It's either 1.5 or 3
 
+    sketch : bool
+        Estimate the statistics in one chunked pass with bounded memory, see `OutlierSketch`
+
+    chunksize : int
+        Number of rows per chunk in `sketch` mode
+
+    **read_csv_kwargs :
+        Passed to `pandas.read_csv` when `data` is the path of a CSV file
+
     Returns
     -------
     DataFrame
         Summary of outlier such as distribution and number of outliers for each features
     """
 
-    data_skewness = check_dist(data)
-    data_outlier = check_outlier(data, fold)
+    if fold not in (1.5, 3):
+        raise ValueError('Parameter fold only accepts numeric value of either 1.5 or 3')
+
+    # compute the skewness once and reuse it for the outlier infos
+    if sketch or not isinstance(data, pd.DataFrame):
+        data_skewness, data_outlier = _sketch_outlier(data, fold, chunksize, **read_csv_kwargs)
+    else:
+        data_skewness = check_dist(data)
+        data_outlier = outlier_stats(data, fold, data_skewness)
 
     outlier_summary_cols = ['feats', 'skew', 'dist', 'tot_outlier', 'tot_outlier_pct']
 
@@ -192,6 +575,212 @@ def outlier_summary(data, fold=1.5):
     return data_outlier_summary
 
 
+# stages of `trim_cap_outliers` in the order they are fitted:
+# distribution, action, capping method and fold of the boundaries
+OUTLIER_STAGES = [
+    ('normal', 'trim', 'gaussian', 3),
+    ('normal', 'cap', 'gaussian', 3),
+    ('skewed', 'trim', 'iqr', 1.5),
+    ('skewed', 'cap', 'iqr', 1.5),
+]
+
+
+def plan_outliers(data, exception_list=[], fold=1.5):
+    """
+    Decide whether to trim, cap or skip the outliers of each feature
+
+    Features with less than 5% of outliers are trimmed, features with 5% to
+    15% of outliers are capped and the others are skipped.
+
+    Parameters
+    ----------
+    data : DataFrame
+
+    exception_list : list
+        List of features to be skipped
+
+    fold : float
+        The multiplier of IQR to detect the outliers of skewed distributions. It's either 1.5 or 3
+
+    Returns
+    -------
+    DataFrame
+        Outlier summary of each feature with the action to take
+    """
+
+    data_outlier = outlier_summary(data, fold)
+
+    data_outlier['action'] = np.select(
+        [data_outlier['tot_outlier_pct'] < 5, data_outlier['tot_outlier_pct'] < 15],
+        ['trim', 'cap'],
+        'skip'
+    )
+    data_outlier.loc[data_outlier['feats'].isin(exception_list), 'action'] = 'skip'
+
+    return data_outlier
+
+
+def _stage_boundaries(data, variables, capping_method, fold):
+    """
+    Fit the upper and lower boundaries of a stage the way feature_engine does
+    """
+
+    if capping_method == 'gaussian':
+        bias = data[variables].mean()
+        scale = data[variables].std(ddof=0)
+        upper_bound = bias + fold * scale
+        lower_bound = bias - fold * scale
+    else:
+        bias = data[variables].quantile((0.75, 0.25))
+        scale = bias.loc[0.75] - bias.loc[0.25]
+        upper_bound = bias.loc[0.75] + fold * scale
+        lower_bound = bias.loc[0.25] - fold * scale
+
+    if (scale == 0).any():
+        raise ValueError(
+            f'Input columns {scale[scale == 0].index.tolist()!r}'
+            f' have low variation for method {capping_method!r}.'
+            f' Try other capping methods or drop these columns.'
+        )
+
+    return upper_bound.to_numpy(), lower_bound.to_numpy()
+
+
+def fit_outlier_boundaries(data, plan):
+    """
+    Fit the boundaries of the trimmed and capped features
+
+    The stages are fitted in the order of `OUTLIER_STAGES`, each one on the
+    rows left by the previous trimming stages.
+
+    Parameters
+    ----------
+    data : DataFrame
+
+    plan : DataFrame
+        Output of `plan_outliers`
+
+    Returns
+    -------
+    feats : list
+        Trimmed and capped features
+
+    trim : ndarray
+        Whether each feature is trimmed or capped
+
+    upper_bound : ndarray
+        Upper boundary of each feature
+
+    lower_bound : ndarray
+        Lower boundary of each feature
+    """
+
+    feats, trim, upper_bound, lower_bound = [], [], [], []
+    keep = np.ones(len(data), dtype=bool)
+
+    for dist, action, capping_method, fold in OUTLIER_STAGES:
+        variables = plan.loc[(plan['dist'] == dist) & (plan['action'] == action), 'feats'].to_list()
+        if len(variables) == 0:
+            continue
+
+        # fit on the rows left by the previous trimming stages
+        rows = data if keep.all() else data.loc[keep]
+        upper, lower = _stage_boundaries(rows, variables, capping_method, fold)
+
+        if action == 'trim':
+            keep &= _inliers(data[variables], upper, lower)
+
+        feats += variables
+        trim += [action == 'trim'] * len(variables)
+        upper_bound.append(upper)
+        lower_bound.append(lower)
+
+    upper_bound = np.concatenate(upper_bound) if upper_bound else np.array([])
+    lower_bound = np.concatenate(lower_bound) if lower_bound else np.array([])
+
+    return feats, np.array(trim, dtype=bool), upper_bound, lower_bound
+
+
+def _inliers(data, upper_bound, lower_bound):
+    """
+    Get the rows whose values all sit within the boundaries, missing values being outliers
+    """
+
+    values = np.asarray(data, dtype=np.float64)
+
+    return ((values <= upper_bound) & (values >= lower_bound)).all(axis=1)
+
+
+def apply_outlier_boundaries(data, feats, trim, upper_bound, lower_bound, target=None):
+    """
+    Trim and cap the outliers of every feature in a single pass
+
+    Parameters
+    ----------
+    data : DataFrame
+
+    feats : list
+        Trimmed and capped features
+
+    trim : ndarray
+        Whether each feature is trimmed or capped
+
+    upper_bound : ndarray
+        Upper boundary of each feature
+
+    lower_bound : ndarray
+        Lower boundary of each feature
+
+    target : Series, DataFrame or ndarray
+        Target trimmed along with the data, see `trim_cap_outliers`
+
+    Returns
+    -------
+    output_data : DataFrame
+        Data without the rows with trimmed outliers and with the other outliers capped
+    if target is not None:
+        target : Series, DataFrame or ndarray
+            Target without the trimmed rows
+    """
+
+    feats = np.asarray(feats, dtype=object)
+
+    # one mask for all the trimmed features
+    keep = _inliers(data[feats[trim]], upper_bound[trim], lower_bound[trim])
+    rows = np.flatnonzero(keep)
+    output_data = data.take(rows)
+
+    # clip all the capped features at once
+    cap = ~trim
+    if cap.any():
+        cap_cols = feats[cap].tolist()
+        output_data[cap_cols] = output_data[cap_cols].clip(lower_bound[cap], upper_bound[cap], axis=1)
+
+    if target is None:
+        return output_data
+
+    return output_data, _take_target(target, data, keep, rows)
+
+
+def _take_target(target, data, keep, rows):
+    """
+    Keep the rows of the target matching the rows kept in the data
+    """
+
+    if isinstance(target, (pd.Series, pd.DataFrame)) and not target.index.equals(data.index):
+        # align by label when the target is not in the same order as the data
+        if not (target.index.is_unique and data.index.is_unique):
+            raise ValueError('target and data must have unique indexes to be aligned by label')
+        return target.loc[data.index[keep]]
+
+    if len(target) != len(data):
+        raise ValueError(f'target has {len(target)} rows but data has {len(data)}')
+
+    if isinstance(target, (pd.Series, pd.DataFrame)):
+        return target.take(rows)
+    return np.asarray(target)[rows]
+
+
 def trim_cap_outliers(data, exception_list=[], target=None, fold=1.5):
     """
     Function to trim outliers based on the cap outliers
@@ -202,8 +791,9 @@ def trim_cap_outliers(data, exception_list=[], target=None, fold=1.5):
         DataFrame to trim outliers
     exception_list : list
         List of features to be excluded from trimming
-    target : pandas Series or DataFrame
-        Target variable name
+    target : pandas Series, DataFrame or NumPy array
+        Target variable. Pandas targets with the same index as `data` and arrays
+        are aligned by position, other pandas targets by label, which must be unique
     fold : float
         The multiplier of IQR to calculate the boundaries for skewed distributions. It's either 1.5 or 3
 
@@ -212,114 +802,108 @@ def trim_cap_outliers(data, exception_list=[], target=None, fold=1.5):
     output_data : pandas DataFrame
         Trimmed data
     if target is not None:
-        target : pandas Series or DataFrame
+        target : pandas Series, DataFrame or NumPy array
             Trimmed target variable
     """
 
-    # define whether to adjust target
-    adjust_target = False
-    if target is not None:
-        adjust_target = True
-
-    # prepare output dataframe
-    output_data = data.copy()
-
-    # run outlier detection
-    data_outlier = outlier_summary(output_data, fold)
-
-    # create a list of columns to trim outliers for normal distribution
-    norm_trim_cols = data_outlier[
-        (data_outlier['dist'] == 'normal') &
-        (data_outlier['tot_outlier_pct'] < 5)
-    ]['feats'].to_list()
-
-    # create a list of columns to cap outliers for normal distribution
-    norm_cap_cols = data_outlier[
-        (data_outlier['dist'] == 'normal') &
-        (data_outlier['tot_outlier_pct'] >= 5) &
-        (data_outlier['tot_outlier_pct'] < 15)
-    ]['feats'].to_list()
-
-    # create a list of columns to trim outliers for skew distribution
-    skew_trim_cols = data_outlier[
-        (data_outlier['dist'] == 'skewed') &
-        (data_outlier['tot_outlier_pct'] < 5)
-    ]['feats'].to_list()
-
-    # create a list of columns to cap outliers for skew distribution
-    skew_cap_cols = data_outlier[
-        (data_outlier['dist'] == 'skewed') &
-        (data_outlier['tot_outlier_pct'] >= 5) &
-        (data_outlier['tot_outlier_pct'] < 15)
-    ]['feats'].to_list()
-
-    # remove exception columns from the list
-    norm_trim_cols = [x for x in norm_trim_cols if x not in exception_list]
-    norm_cap_cols = [x for x in norm_cap_cols if x not in exception_list]
-    skew_trim_cols = [x for x in skew_trim_cols if x not in exception_list]
-    skew_cap_cols = [x for x in skew_cap_cols if x not in exception_list]
-
-    # outlier trimming for normal distribution
-    if len(norm_trim_cols) > 0:
-        trim_norm = OutlierTrimmer(
-            capping_method='gaussian',
-            tail='both',
-            fold=3,
-            variables=norm_trim_cols,
-            missing_values='ignore'
-        )
+    # decide what to do with each feature, computing the statistics once
+    plan = plan_outliers(data, exception_list, fold)
 
-        # trim outliers for normal distribution
-        output_data = trim_norm.fit_transform(output_data)
-
-        # adjust target to match the features
-        if adjust_target:
-            target = target.drop(target.index.difference(output_data.index))
-
-    # outlier capping for normal distribution
-    if len(norm_cap_cols) > 0:
-        cap_norm = Winsorizer(
-            capping_method='gaussian',
-            tail='both',
-            fold=3,
-            variables=norm_cap_cols,
-            missing_values='ignore'
-        )
+    # fit the boundaries, then trim and cap every feature and the target in one pass
+    feats, trim, upper_bound, lower_bound = fit_outlier_boundaries(data, plan)
 
-        # cap outliers for normal distribution
-        output_data = cap_norm.fit_transform(output_data)
-
-    # outlier trimming for skewed distribution
-    if len(skew_trim_cols) > 0:
-        trim_skew = OutlierTrimmer(
-            capping_method='iqr',
-            tail='both',
-            fold=1.5,
-            variables=skew_trim_cols,
-            missing_values='ignore'
-        )
+    return apply_outlier_boundaries(data, feats, trim, upper_bound, lower_bound, target)
 
-        # trim outliers for skewed distribution
-        output_data = trim_skew.fit_transform(output_data)
-
-        # adjust target to match the features
-        if adjust_target:
-            target = target.drop(target.index.difference(output_data.index))
-
-    # outlier capping for skewed distribution
-    if len(skew_cap_cols) > 0:
-        cap_skew = Winsorizer(
-            capping_method='iqr',
-            tail='both',
-            fold=1.5,
-            variables=skew_cap_cols,
-            missing_values='ignore'
-        )
 
-        # cap outliers for skewed distribution
-        output_data = cap_skew.fit_transform(output_data)
+class OutlierHandler(BaseEstimator, TransformerMixin):
+    """
+    Scikit-learn transformer applying the boundaries of `trim_cap_outliers`
 
-    if adjust_target:
-        return output_data, target
-    else:
-        return output_data
+    The distribution analysis and the boundaries are computed once in `fit`.
+    `transform` then only clips or masks the values, so the fitted handler
+    can be saved with joblib and applied to new data at serving time.
+
+    Parameters
+    ----------
+    exception_list : list
+        List of features to be skipped
+    fold : float
+        The multiplier of IQR to detect the outliers of skewed distributions. It's either 1.5 or 3
+    trim_rows : bool
+        Whether `transform` drops the rows with outliers in the trimmed features,
+        as `trim_cap_outliers` does. Otherwise every handled feature is capped,
+        so no row is ever dropped
+    """
+
+    def __init__(self, exception_list=None, fold=1.5, trim_rows=False):
+        self.exception_list = exception_list
+        self.fold = fold
+        self.trim_rows = trim_rows
+
+    def fit(self, X, y=None):
+        exception_list = [] if self.exception_list is None else list(self.exception_list)
+
+        plan = plan_outliers(X, exception_list, self.fold)
+        feats, trim, upper_bound, lower_bound = fit_outlier_boundaries(X, plan)
+
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.n_features_in_ = X.shape[1]
+        self.feats_ = feats
+        self.positions_ = np.array([X.columns.get_loc(feat) for feat in feats], dtype=np.intp)
+        self.trim_ = trim
+        self.upper_bound_ = upper_bound
+        self.lower_bound_ = lower_bound
+
+        return self
+
+    def transform(self, X):
+        if isinstance(X, pd.DataFrame):
+            if self.trim_rows:
+                return apply_outlier_boundaries(X, self.feats_, self.trim_, self.upper_bound_, self.lower_bound_)
+
+            # cap the trimmed features too, so that no row is dropped
+            X = X.copy()
+            if self.feats_:
+                X[self.feats_] = X[self.feats_].clip(self.lower_bound_, self.upper_bound_, axis=1)
+            return X
+
+        # plain arrays are matched to the features by position
+        X = np.array(X)
+        values = X[:, self.positions_]
+        cap = np.ones(len(self.feats_), dtype=bool)
+
+        if self.trim_rows:
+            keep = _inliers(values[:, self.trim_], self.upper_bound_[self.trim_], self.lower_bound_[self.trim_])
+            X = X[keep]
+            values = values[keep]
+            cap = ~self.trim_
+
+        X[:, self.positions_[cap]] = np.clip(values[:, cap], self.lower_bound_[cap], self.upper_bound_[cap])
+
+        return X
+
+    def save_bounds(self, path):
+        """
+        Write the boundaries of every handled feature to a JSON file
+
+        The backend caps the features at these boundaries, as `transform`
+        does without `trim_rows`, without loading this class.
+
+        Parameters
+        ----------
+        path : str or pathlib.Path
+            Path of the JSON file, e.g. outlier_bounds.json next to scaler.pkl and encoder.pkl
+
+        Returns
+        -------
+        dict
+            Lower and upper boundary of each handled feature
+        """
+
+        bounds = {
+            feat: [float(lower), float(upper)]
+            for feat, lower, upper in zip(self.feats_, self.lower_bound_, self.upper_bound_)
+        }
+        Path(path).write_text(json.dumps(bounds, indent=2) + '\n')
+
+        return bounds
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Column-wise statistics across a process pool, sharing the data through shared memory
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+# shared columns of the current worker process, set up by `_attach`
+_shared = {}
+
+
+def resolve_n_jobs(n_jobs):
+    """
+    Turn `n_jobs` into a number of processes, -1 meaning all the cores
+    """
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(os.cpu_count() + 1 + n_jobs, 1)
+    return max(n_jobs, 1)
+
+
+def shareable_columns(data):
+    """
+    Get the columns backed by a plain NumPy numeric or boolean array
+    """
+    return [
+        col for col in data.columns
+        if isinstance(data[col].dtype, np.dtype) and data[col].dtype.kind in 'biuf'
+    ]
+
+
+class SharedFrame:
+    """
+    Copy numeric columns once into a shared memory block, keeping their dtype
+
+    Parameters
+    ----------
+    data : DataFrame
+    columns : list
+        Numeric columns to share
+    """
+
+    def __init__(self, data, columns):
+        self.spec = []
+        offset = 0
+        for col in columns:
+            dtype = data[col].dtype
+            self.spec.append((col, dtype.str, offset))
+            # keep every column aligned on 8 bytes
+            offset += -(-dtype.itemsize * len(data) // 8) * 8
+
+        self.n_rows = len(data)
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+
+        for col, dtype, offset in self.spec:
+            column = np.ndarray(self.n_rows, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            column[:] = data[col].to_numpy()
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _attach(name, spec, n_rows):
+    shm = shared_memory.SharedMemory(name=name)
+    _shared['shm'] = shm
+    _shared['columns'] = [
+        pd.Series(np.ndarray(n_rows, dtype=dtype, buffer=shm.buf, offset=offset), name=col, copy=False)
+        for col, dtype, offset in spec
+    ]
+
+
+def _run_task(task):
+    func, pos, args = task
+    return func(_shared['columns'][pos], *args)
+
+
+def map_columns(data, columns, func, n_jobs, args_list=None):
+    """
+    Apply `func(series, *args)` to each column across a process pool
+
+    The columns are copied once into shared memory, only their positions and
+    `args` are sent to the workers. The results keep the order of `columns`.
+
+    Parameters
+    ----------
+    data : DataFrame
+    columns : list
+        Numeric columns to process
+    func : callable
+        Picklable module level function taking a Series and the extra args
+    n_jobs : int
+        Number of processes, -1 meaning all the cores
+    args_list : list
+        Extra args for each column
+
+    Returns
+    -------
+    list
+        Result of each column
+    """
+
+    if args_list is None:
+        args_list = [()] * len(columns)
+    if len(columns) == 0:
+        return []
+
+    n_jobs = min(resolve_n_jobs(n_jobs), len(columns))
+
+    with SharedFrame(data, columns) as shared:
+        with ProcessPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_attach,
+            initargs=(shared.shm.name, shared.spec, shared.n_rows)
+        ) as executor:
+            tasks = [(func, pos, args) for pos, args in enumerate(args_list)]
+            return list(executor.map(_run_task, tasks))
+
+
+def nunique(series):
+    return series.nunique()
+
+
+def skew(series):
+    return series.skew()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Split, scale, oversample and encode the Telco churn dataset for training
+"""
+
+import numpy as np
+from sklearn.compose import ColumnTransformer
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler, OneHotEncoder, LabelEncoder
+
+
+TARGET = 'Churn'
+
+ID_COL = 'customerID'
+
+# numerical features kept for training, `TotalCharges` being dropped by the scaler
+NUM_COLS_NORM = ['tenure', 'MonthlyCharges']
+
+NOM_COLS = [
+    'SeniorCitizen', 'gender', 'Partner', 'Dependents', 'PhoneService',
+    'MultipleLines', 'InternetService', 'OnlineSecurity', 'OnlineBackup',
+    'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies',
+    'Contract', 'PaperlessBilling', 'PaymentMethod'
+]
+
+
+def split_data(data, test_size=0.2, valid_size=0.2, seed=42):
+    """
+    Split the dataset into train, validation and test sets, stratified on the target
+
+    The test set is split off first, then the validation set from the rest,
+    as in the notebook.
+
+    Parameters
+    ----------
+    data : DataFrame
+        Cleaned dataset with the target
+    test_size : float
+        Share of the dataset in the test set
+    valid_size : float
+        Share of the remaining rows in the validation set
+    seed : int
+        Random state of the splits
+
+    Returns
+    -------
+    df_train, df_valid, df_test : DataFrame
+    """
+
+    df_train_valid, df_test = train_test_split(
+        data,
+        test_size=test_size,
+        random_state=seed,
+        stratify=data[TARGET]
+    )
+
+    df_train, df_valid = train_test_split(
+        df_train_valid,
+        test_size=valid_size,
+        random_state=seed,
+        stratify=df_train_valid[TARGET]
+    )
+
+    return df_train, df_valid, df_test
+
+
+def make_scaler():
+    """
+    Scale the numerical features, putting them before the nominal ones
+    """
+    return ColumnTransformer([
+        ('num_norm', StandardScaler(), NUM_COLS_NORM),
+        ('nom', 'passthrough', NOM_COLS),
+    ])
+
+
+def make_encoder():
+    """
+    One hot encode the nominal features of the scaled array
+    """
+    n_num = len(NUM_COLS_NORM)
+    return ColumnTransformer([
+        ('num', 'passthrough', slice(0, n_num)),
+        ('nom', OneHotEncoder(handle_unknown='ignore'), slice(n_num, n_num + len(NOM_COLS))),
+    ])
+
+
+def prepare_sets(data, smote=True, seed=42):
+    """
+    Turn the cleaned dataset into float32 train, validation and test arrays
+
+    The scaler and the SMOTENC oversampling are fitted on the training set
+    only, then the encoder on the oversampled training set.
+
+    Parameters
+    ----------
+    data : DataFrame
+        Cleaned dataset with the target, e.g. from `packages.data_cache.load_cached`
+    smote : bool
+        Oversample the minority class of the training set with SMOTENC
+    seed : int
+        Random state of the splits and of SMOTENC
+
+    Returns
+    -------
+    sets : dict
+        (X, y) pair of each of 'train', 'valid' and 'test'
+    scaler : ColumnTransformer
+        Fitted scaler
+    encoder : ColumnTransformer
+        Fitted encoder
+    """
+
+    data = data.drop(columns=[ID_COL], errors='ignore')
+    splits = dict(zip(['train', 'valid', 'test'], split_data(data, seed=seed)))
+
+    scaler = make_scaler()
+    encoder = make_encoder()
+    label_enc = LabelEncoder()
+
+    # scale numeric features
+    X_train = scaler.fit_transform(splits['train'])
+    y_train = splits['train'][TARGET].to_numpy()
+
+    # oversampling using SMOTE, categorical features being after the numerical ones
+    if smote:
+        from imblearn.over_sampling import SMOTENC
+
+        n_num = len(NUM_COLS_NORM)
+        smotenc = SMOTENC(categorical_features=list(range(n_num, n_num + len(NOM_COLS))), random_state=seed)
+        X_train, y_train = smotenc.fit_resample(X_train, y_train)
+
+    # encode features and labels
+    sets = {'train': (
+        encoder.fit_transform(X_train).astype(np.float32),
+        label_enc.fit_transform(y_train)
+    )}
+    for name in ['valid', 'test']:
+        sets[name] = (
+            encoder.transform(scaler.transform(splits[name])).astype(np.float32),
+            label_enc.transform(splits[name][TARGET])
+        )
+
+    return sets, scaler, encoder
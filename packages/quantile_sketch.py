@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Mergeable quantile sketch for columns too large to sort in memory
+"""
+
+import numpy as np
+
+
+class KLLSketch:
+    """
+    KLL quantile sketch (Karnin, Lang & Liberty, 2016)
+
+    Values are kept in compactors of increasing weight. When a compactor is
+    full, its values are sorted and every other one, starting at a random
+    offset, is promoted to the next compactor with twice the weight. The
+    memory is about 3 * k values whatever the number of values seen.
+
+    The rank error is of order 1 / k: with the default k of 200, the rank of
+    a returned quantile is within about 1% of the requested rank with high
+    probability (see `benchmarks/outlier_sketch.py`). The minimum and the
+    maximum are exact.
+
+    Parameters
+    ----------
+    k : int
+        Size of the largest compactor, trading memory for accuracy
+    seed : int
+        Seed of the random offsets
+    """
+
+    def __init__(self, k=200, seed=None):
+        if k < 8:
+            raise ValueError('k must be at least 8')
+
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.compactors = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.compactors):
+            items = self.compactors[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.compactors.append(np.empty(0))
+
+                # promote every other value of an even number of them, keeping the last one if odd
+                items = np.sort(items)
+                n_pairs = len(items) // 2
+                offset = self._rng.integers(2)
+                promoted = items[offset:2 * n_pairs:2]
+
+                self.compactors[level] = items[2 * n_pairs:]
+                self.compactors[level + 1] = np.concatenate([self.compactors[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        """
+        Add an array of values, ignoring missing values
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self.n += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+
+        self.compactors[0] = np.concatenate([self.compactors[0], values])
+        self._compress()
+
+        return self
+
+    def merge(self, other):
+        """
+        Merge another sketch, e.g. built over another partition, into this one
+        """
+        for level, items in enumerate(other.compactors):
+            if level == len(self.compactors):
+                self.compactors.append(np.empty(0))
+            self.compactors[level] = np.concatenate([self.compactors[level], items])
+
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+        return self
+
+    def _sorted_weights(self):
+        items = np.concatenate(self.compactors)
+        weights = np.concatenate([
+            np.full(len(compactor), 2 ** level, dtype=np.int64)
+            for level, compactor in enumerate(self.compactors)
+        ])
+        order = np.argsort(items, kind='stable')
+
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """
+        Estimate the quantiles `q`, between 0 and 1, of the values seen
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if self.n == 0:
+            return np.full(q.shape, np.nan)
+
+        items, cum_weights = self._sorted_weights()
+
+        # first value whose cumulative weight reaches the requested rank
+        pos = np.searchsorted(cum_weights, q * cum_weights[-1], side='left')
+        values = items[np.minimum(pos, len(items) - 1)]
+
+        # the extremes are known exactly
+        values = np.where(q <= 0, self.min, values)
+        values = np.where(q >= 1, self.max, values)
+
+        return values
+
+    def rank(self, value, inclusive=True):
+        """
+        Estimate the number of values seen lower than, or equal to if `inclusive`, `value`
+        """
+        if self.n == 0:
+            return np.zeros(np.shape(value), dtype=np.int64)
+
+        items, cum_weights = self._sorted_weights()
+        pos = np.searchsorted(items, value, side='right' if inclusive else 'left')
+
+        # compactions keep the total weight equal to the number of values seen
+        return np.concatenate([[0], cum_weights])[pos]
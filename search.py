@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Hyperparameter search over the churn models across a process pool
+
+Each worker process is pinned to its own subset of the CPU cores, with the
+TensorFlow thread pools sized to match. Trials are cut early with early
+stopping, and with successive halving: every rung trains the remaining
+trials for `eta` times more epochs and keeps the best 1 / `eta` of them by
+validation loss. The leaderboard of every trial and rung, with its
+wall-clock time, is written as CSV.
+
+Example: `python search.py --search random --n-trials 27 --workers 4 --leaderboard leaderboard.csv`
+"""
+
+import os
+import time
+import random
+import argparse
+import itertools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+
+# values searched for each hyperparameter
+SEARCH_SPACE = {
+    'units': [4, 8, 16, 32],
+    'dropout': [0.0, 0.1, 0.2, 0.3],
+    'learning_rate': [0.0003, 0.001, 0.003, 0.01],
+    'batch_size': [64, 128, 256],
+}
+
+# state of the current worker process, set up by `init_worker`
+_worker = {}
+
+
+def make_configs(search='random', n_trials=20, seed=42):
+    """
+    List the configurations to try, either the full grid or a random sample of it
+    """
+    grid = [dict(zip(SEARCH_SPACE, values)) for values in itertools.product(*SEARCH_SPACE.values())]
+    if search == 'grid':
+        return grid
+    return random.Random(seed).sample(grid, min(n_trials, len(grid)))
+
+
+def split_cores(workers):
+    """
+    Split the cores available to this process into one subset per worker
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count()))
+    per_worker = max(len(cores) // workers, 1)
+    return [cores[(i * per_worker) % len(cores):][:per_worker] for i in range(workers)]
+
+
+def init_worker(sets, core_queue, model_name, seed):
+    """
+    Pin the worker to a subset of cores and size the TensorFlow thread pools to it
+    """
+    cores = core_queue.get()
+
+    # pinning is only available on Linux, elsewhere only the thread pools are sized
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cores)
+
+    # the thread pools can only be set before TensorFlow runs anything
+    from packages.modeling import configure_threads
+    configure_threads(intra_op=len(cores), inter_op=1)
+
+    _worker.update(sets=sets, cores=cores, model_name=model_name, seed=seed)
+
+
+def _dataset(name, batch_size):
+    from packages.modeling import make_dataset
+
+    # a new pipeline per trial, so each trial sees the same shuffling whatever ran before it
+    X, y = _worker['sets'][name]
+    shuffle_buffer = len(X) if name == 'train' else None
+    return make_dataset(X, y, batch_size, shuffle_buffer, _worker['seed'])
+
+
+def run_trial(trial_id, config, epochs, patience):
+    """
+    Train a configuration for up to `epochs` epochs with early stopping
+
+    Returns
+    -------
+    dict
+        Best validation loss and accuracy, epochs run and wall-clock time
+    """
+
+    from tensorflow import keras
+    from packages.modeling import build_model
+
+    start = time.perf_counter()
+    keras.utils.set_random_seed(_worker['seed'])
+
+    params = {key: value for key, value in config.items() if key != 'batch_size'}
+    model = build_model(_worker['model_name'], _worker['sets']['train'][0].shape[1], seed=_worker['seed'], **params)
+
+    history = model.fit(
+        _dataset('train', config['batch_size']),
+        epochs=epochs,
+        validation_data=_dataset('valid', config['batch_size']),
+        callbacks=[keras.callbacks.EarlyStopping(monitor='val_loss', patience=patience, restore_best_weights=True)],
+        verbose=0
+    ).history
+
+    best = min(range(len(history['val_loss'])), key=history['val_loss'].__getitem__)
+
+    return {
+        'trial': trial_id,
+        **config,
+        'epochs_budget': epochs,
+        'epochs_run': len(history['val_loss']),
+        'val_loss': history['val_loss'][best],
+        'val_accuracy': history['val_accuracy'][best],
+        'seconds': time.perf_counter() - start,
+        'pid': os.getpid(),
+        'cores': ' '.join(map(str, _worker['cores'])),
+    }
+
+
+def successive_halving(executor, configs, min_epochs, max_epochs, eta, patience):
+    """
+    Run the trials rung by rung, keeping the best 1 / `eta` of them at each rung
+
+    With `eta` of 1, every trial runs once for `max_epochs`.
+
+    Returns
+    -------
+    list
+        Result of every trial at every rung
+    """
+
+    results = []
+    trials = list(enumerate(configs))
+    epochs = max_epochs if eta <= 1 else min_epochs
+    rung = 0
+
+    while True:
+        futures = [executor.submit(run_trial, trial_id, config, epochs, patience) for trial_id, config in trials]
+        rung_results = [dict(future.result(), rung=rung) for future in futures]
+        results += rung_results
+
+        print(f'rung {rung}: {len(trials)} trials, {epochs} epochs, '
+              f'best val_loss {min(result["val_loss"] for result in rung_results):.4f}')
+
+        if eta <= 1 or epochs >= max_epochs or len(trials) <= 1:
+            return results
+
+        # keep the best trials for the next rung
+        ranked = sorted(zip(trials, rung_results), key=lambda pair: pair[1]['val_loss'])
+        trials = [trial for trial, _ in ranked[:max(len(trials) // eta, 1)]]
+        epochs = min(epochs * eta, max_epochs)
+        rung += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='data/WA_Fn-UseC_-Telco-Customer-Churn.csv')
+    parser.add_argument('--model', default='sequential_tuned', help='base model of packages.modeling.MODELS')
+    parser.add_argument('--search', choices=['grid', 'random'], default='random')
+    parser.add_argument('--n-trials', type=int, default=20, help='number of random configurations')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--min-epochs', type=int, default=5, help='epochs of the first rung')
+    parser.add_argument('--max-epochs', type=int, default=45)
+    parser.add_argument('--eta', type=int, default=3, help='halving rate, 1 to disable successive halving')
+    parser.add_argument('--patience', type=int, default=5)
+    parser.add_argument('--no-smote', action='store_true')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--leaderboard', default='leaderboard.csv')
+    args = parser.parse_args()
+
+    from packages.data_cache import load_cached
+    from packages.preprocessing import prepare_sets
+
+    start = time.perf_counter()
+
+    # prepare the arrays once, they are sent to each worker when it starts
+    data = load_cached(args.data, float_dtype='float64')
+    sets, _, _ = prepare_sets(data, smote=not args.no_smote, seed=args.seed)
+    sets = {name: sets[name] for name in ['train', 'valid']}
+
+    configs = make_configs(args.search, args.n_trials, args.seed)
+
+    # spawn clean processes, each taking one subset of cores
+    context = multiprocessing.get_context('spawn')
+    core_queue = context.Queue()
+    for cores in split_cores(args.workers):
+        core_queue.put(cores)
+
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=context,
+        initializer=init_worker,
+        initargs=(sets, core_queue, args.model, args.seed)
+    ) as executor:
+        results = successive_halving(executor, configs, args.min_epochs, args.max_epochs, args.eta, args.patience)
+
+    # best trials of the last rung they reached first
+    leaderboard = pd.DataFrame(results).sort_values(['rung', 'val_loss'], ascending=[False, True])
+    leaderboard.to_csv(args.leaderboard, index=False)
+
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(leaderboard.head(10).to_string(index=False))
+    print(f'{len(configs)} configurations, {len(results)} trainings in {time.perf_counter() - start:.1f}s')
+
+
+if __name__ == '__main__':
+    main()
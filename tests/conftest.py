@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+from pathlib import Path
+
+
+# import the packages of the repository root, as the notebook and scripts do
+ROOT_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT_DIR))
+
+DATA_PATH = ROOT_DIR / 'data' / 'WA_Fn-UseC_-Telco-Customer-Churn.csv'
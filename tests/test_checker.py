@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+import pytest
+
+from conftest import DATA_PATH
+from packages.checker import check_missing_special
+
+
+MISSVALS = (' ', 'No internet service', 'No phone service')
+
+
+def baseline_check_missing_special(data, *args):
+    # one scan per column and keyword, as before the vectorized isin
+    missing_values = {'feats': [], 'tot_missing': [], 'tot_missing_pct': []}
+    for col in data.columns:
+        tot_missval = 0
+        for missval in args:
+            if missval not in data[col].unique():
+                continue
+            tot_missval += len(data[data[col] == missval])
+
+        missing_values['feats'].append(col)
+        missing_values['tot_missing'].append(tot_missval)
+        missing_values['tot_missing_pct'].append(tot_missval / len(data) * 100)
+
+    missing_values = pd.DataFrame(missing_values)
+    return missing_values[missing_values['tot_missing'] > 0].reset_index(drop=True)
+
+
+@pytest.fixture(scope='module')
+def telco():
+    return pd.read_csv(DATA_PATH)
+
+
+# the baseline looks for text keywords among the numbers with `in`
+@pytest.mark.filterwarnings('ignore:elementwise comparison failed')
+@pytest.mark.parametrize('missvals', [MISSVALS, MISSVALS + (0,), ('Yes', 1)])
+def test_check_missing_special_matches_baseline(telco, missvals):
+    expected = baseline_check_missing_special(telco, *missvals)
+
+    pd.testing.assert_frame_equal(check_missing_special(telco, *missvals), expected)
+
+    # the CSV and the chunks of the frame are counted chunk by chunk
+    pd.testing.assert_frame_equal(check_missing_special(DATA_PATH, *missvals, chunksize=500), expected)
+    chunks = (telco.iloc[start:start + 1000] for start in range(0, len(telco), 1000))
+    pd.testing.assert_frame_equal(check_missing_special(chunks, *missvals), expected)
+
+
+def test_check_missing_special_categorical(telco):
+    expected = baseline_check_missing_special(telco, *MISSVALS)
+    categorical = telco.astype({col: 'category' for col in telco.select_dtypes('object').columns})
+
+    pd.testing.assert_frame_equal(check_missing_special(categorical, *MISSVALS), expected)
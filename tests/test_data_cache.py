@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+import shutil
+import subprocess
+
+from conftest import ROOT_DIR, DATA_PATH
+
+
+LOAD_CACHED = """
+import sys
+from packages.data_cache import load_cached
+
+load_cached(sys.argv[1], sys.argv[2])
+"""
+
+
+def _cache_files(root_dir, cache_dir):
+    # a fresh interpreter, the source of the packages being read at import
+    subprocess.run(
+        [sys.executable, '-c', LOAD_CACHED, str(DATA_PATH), str(cache_dir)], cwd=root_dir, check=True
+    )
+    return {path.name for path in cache_dir.glob('*.feather')}
+
+
+def test_changed_cleaning_changes_cache_key(tmp_path):
+    shutil.copytree(ROOT_DIR / 'packages', tmp_path / 'packages', ignore=shutil.ignore_patterns('__pycache__'))
+    cache_dir = tmp_path / 'cache'
+
+    before = _cache_files(tmp_path, cache_dir)
+    assert _cache_files(tmp_path, cache_dir) == before
+
+    # change the cleaning in the module of the cache itself
+    data_cache = tmp_path / 'packages' / 'data_cache.py'
+    source = data_cache.read_text()
+    data_cache.write_text(source.replace(
+        '        data = impute_no_phone_internet(data)\n',
+        '        data = impute_no_phone_internet(data)\n        data = data.drop_duplicates()\n'
+    ))
+    assert data_cache.read_text() != source
+
+    after = _cache_files(tmp_path, cache_dir)
+    assert len(after) == 1 and after != before
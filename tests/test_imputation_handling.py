@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import DATA_PATH
+from packages.imputation_handling import prepare_imputation, impute_no_phone_internet, NoPhoneInternetImputer
+
+
+MISSVALS = (' ', 'No internet service', 'No phone service')
+
+VARIABLE = ['TotalCharges', 'MultipleLines', 'InternetService', 'OnlineSecurity', 'StreamingTV']
+
+
+def baseline_prepare_imputation(data, variable, *args):
+    # one replace per column and keyword, as before the single pass
+    output_data = data.copy()
+    for col in variable:
+        for missval in args:
+            output_data[col] = output_data[col].replace(missval, np.nan)
+    return output_data
+
+
+def baseline_impute_no_phone_internet(data):
+    # the keywords replaced in every column, as before the service columns only
+    data = data.replace('No internet service', 'No')
+    data = data.replace('No phone service', 'No')
+    return data
+
+
+@pytest.fixture(scope='module')
+def telco():
+    return pd.read_csv(DATA_PATH)
+
+
+def test_prepare_imputation_matches_baseline(telco):
+    original = telco.copy()
+    expected = baseline_prepare_imputation(telco, VARIABLE, *MISSVALS)
+
+    pd.testing.assert_frame_equal(prepare_imputation(telco, VARIABLE, *MISSVALS), expected)
+    pd.testing.assert_frame_equal(telco, original)
+
+    data = telco.copy()
+    assert prepare_imputation(data, VARIABLE, *MISSVALS, inplace=True) is data
+    pd.testing.assert_frame_equal(data, expected)
+
+
+def test_prepare_imputation_keeps_categories(telco):
+    expected = baseline_prepare_imputation(telco, VARIABLE, *MISSVALS)
+    actual = prepare_imputation(telco.astype({col: 'category' for col in VARIABLE}), VARIABLE, *MISSVALS)
+
+    for col in VARIABLE:
+        assert isinstance(actual[col].dtype, pd.CategoricalDtype)
+        assert not set(MISSVALS) & set(actual[col].cat.categories)
+        pd.testing.assert_series_equal(actual[col].astype(object), expected[col].astype(object))
+
+
+def test_impute_no_phone_internet_matches_baseline(telco):
+    original = telco.copy()
+    expected = baseline_impute_no_phone_internet(telco)
+
+    pd.testing.assert_frame_equal(impute_no_phone_internet(telco), expected)
+    pd.testing.assert_frame_equal(NoPhoneInternetImputer().fit(telco).transform(telco), expected)
+    pd.testing.assert_frame_equal(telco, original)
+
+    # categorical columns merge the keywords into 'No'
+    object_cols = telco.select_dtypes('object').columns
+    actual = impute_no_phone_internet(telco.astype({col: 'category' for col in object_cols}))
+    for col in object_cols:
+        assert isinstance(actual[col].dtype, pd.CategoricalDtype)
+        pd.testing.assert_series_equal(actual[col].astype(object), expected[col])
+
+
+def test_impute_no_phone_internet_only_service_columns(telco):
+    # the keywords are real categories of the other columns
+    data = telco.head(20).copy()
+    data.loc[0, 'Partner'] = 'No internet service'
+
+    assert impute_no_phone_internet(data).loc[0, 'Partner'] == 'No internet service'
+    assert impute_no_phone_internet(data, ['Partner']).loc[0, 'Partner'] == 'No'
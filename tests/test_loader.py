@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import DATA_PATH
+from packages.loader import CATEGORIES, CHARGES_COLS, ID_COL, load_telco, memory_report
+
+
+def baseline_load_telco(path):
+    # the default read with the blank charges converted afterwards, as before the typed loader
+    data = pd.read_csv(path)
+    data['TotalCharges'] = pd.to_numeric(data['TotalCharges'], errors='coerce')
+    return data
+
+
+@pytest.fixture(scope='module')
+def baseline():
+    return baseline_load_telco(DATA_PATH)
+
+
+@pytest.mark.parametrize('engine', [None, 'pyarrow'])
+@pytest.mark.parametrize('float_dtype', ['float32', 'float64'])
+def test_load_telco_matches_baseline(baseline, engine, float_dtype):
+    data = load_telco(DATA_PATH, engine=engine, float_dtype=float_dtype)
+
+    assert list(data.columns) == list(baseline.columns)
+    assert (data[ID_COL].astype(object) == baseline[ID_COL]).all()
+
+    # categories fixed in the declared order, with the same values
+    for col, categories in CATEGORIES.items():
+        assert list(data[col].cat.categories) == categories
+        pd.testing.assert_series_equal(data[col].astype(object), baseline[col])
+
+    assert data['SeniorCitizen'].dtype == np.int8
+    assert data['tenure'].dtype == np.int16
+    assert (data['SeniorCitizen'] == baseline['SeniorCitizen']).all()
+    assert (data['tenure'] == baseline['tenure']).all()
+
+    # charges rounded to the float dtype only, the blanks missing in both
+    for col in CHARGES_COLS:
+        assert data[col].dtype == np.dtype(float_dtype)
+        pd.testing.assert_series_equal(data[col], baseline[col].astype(float_dtype))
+
+
+def test_load_telco_usecols(baseline):
+    usecols = ['tenure', 'Contract', 'TotalCharges']
+    data = load_telco(DATA_PATH, usecols=usecols)
+
+    assert list(data.columns) == usecols
+    assert list(data['Contract'].cat.categories) == CATEGORIES['Contract']
+    pd.testing.assert_series_equal(data['TotalCharges'], baseline['TotalCharges'].astype('float32'))
+
+
+def test_load_telco_refuses_unknown_categories(baseline, tmp_path):
+    path = tmp_path / 'telco.csv'
+    data = baseline.copy()
+    data.loc[0, 'Contract'] = 'Three year'
+    data.to_csv(path, index=False)
+
+    with pytest.raises(ValueError, match='Contract'):
+        load_telco(path)
+
+
+def test_memory_report():
+    report = memory_report(DATA_PATH)
+
+    assert report.loc['total', 'typed_bytes'] < report.loc['total', 'default_bytes']
+    assert (report.loc[list(CATEGORIES), 'typed_dtype'] == 'category').all()
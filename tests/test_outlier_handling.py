@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import pytest
+from feature_engine.outliers import OutlierTrimmer, Winsorizer
+
+from conftest import DATA_PATH
+from packages.outlier_handling import check_dist, check_outlier, outlier_summary, apply_outlier_boundaries
+from packages.outlier_handling import find_skewed_boundaries, outlier_stats, plan_outliers, trim_cap_outliers
+
+
+def baseline_find_skewed_boundaries(data, variable, fold):
+    # one quantile call per quartile and use
+    IQR = data[variable].quantile(0.75) - data[variable].quantile(0.25)
+    return data[variable].quantile(0.75) + (IQR * fold), data[variable].quantile(0.25) - (IQR * fold)
+
+
+def baseline_check_outlier(data, fold=1.5):
+    # boundaries and filtered copies feature by feature, as before the vectorized statistics
+    data_skewness = check_dist(data)
+    rows = []
+    for col, dist in zip(data_skewness['feats'], data_skewness['dist']):
+        if dist == 'normal':
+            upper_bound = data[col].mean() + 3 * data[col].std()
+            lower_bound = data[col].mean() - 3 * data[col].std()
+        else:
+            upper_bound, lower_bound = baseline_find_skewed_boundaries(data, col, fold)
+
+        tot_right_tail = len(data[data[col] > upper_bound])
+        tot_left_tail = len(data[data[col] < lower_bound])
+        tot_right_tail_pct = tot_right_tail / len(data) * 100
+        tot_left_tail_pct = tot_left_tail / len(data) * 100
+        rows.append((
+            col, upper_bound, lower_bound, tot_right_tail, tot_left_tail, tot_right_tail_pct,
+            tot_left_tail_pct, tot_right_tail + tot_left_tail, tot_right_tail_pct + tot_left_tail_pct
+        ))
+
+    return pd.DataFrame(rows, columns=[
+        'feats', 'upper_bound', 'lower_bound', 'tot_right_tail', 'tot_left_tail',
+        'tot_right_tail_pct', 'tot_left_tail_pct', 'tot_outlier', 'tot_outlier_pct'
+    ])
+
+
+@pytest.fixture(scope='module')
+def telco():
+    data = pd.read_csv(DATA_PATH)
+    data['TotalCharges'] = pd.to_numeric(data['TotalCharges'], errors='coerce')
+    return data
+
+
+@pytest.mark.parametrize('chunksize', [100, None])
+def test_sketch_csv_matches_in_memory(telco, chunksize):
+    expected = outlier_summary(telco[telco.select_dtypes('number').columns])
+    actual = outlier_summary(DATA_PATH, sketch=True, chunksize=chunksize)
+
+    # TotalCharges has blank strings in the CSV, it is kept and its blanks are missing values
+    assert actual['feats'].to_list() == expected['feats'].to_list()
+    assert actual['dist'].to_list() == expected['dist'].to_list()
+    np.testing.assert_allclose(actual['skew'], expected['skew'], rtol=1e-9)
+
+    # the quartiles are estimated by the sketches, their rank error adds up in the IQR boundaries
+    expected_bounds = check_outlier(telco[expected['feats']])
+    actual_bounds = check_outlier(DATA_PATH, chunksize=chunksize)
+    for col in ('upper_bound', 'lower_bound'):
+        np.testing.assert_allclose(actual_bounds[col], expected_bounds[col], rtol=0.1, atol=1e-9)
+
+    # the outliers beyond the estimated boundaries are counted exactly
+    for _, row in actual_bounds.iterrows():
+        values = telco[row['feats']]
+        assert row['tot_outlier'] == ((values > row['upper_bound']) | (values < row['lower_bound'])).sum()
+
+
+def baseline_trim_cap_outliers(data, exception_list=[], target=None, fold=1.5):
+    # one feature_engine transformer per stage, each fitted on the rows left by the previous ones
+    data_outlier = outlier_summary(data, fold)
+    stages = [
+        ('normal', 0, 5, OutlierTrimmer, 'gaussian', 3),
+        ('normal', 5, 15, Winsorizer, 'gaussian', 3),
+        ('skewed', 0, 5, OutlierTrimmer, 'iqr', 1.5),
+        ('skewed', 5, 15, Winsorizer, 'iqr', 1.5),
+    ]
+
+    output_data = data.copy()
+    for dist, low, high, transformer, capping_method, stage_fold in stages:
+        cols = data_outlier[
+            (data_outlier['dist'] == dist)
+            & (data_outlier['tot_outlier_pct'] >= low)
+            & (data_outlier['tot_outlier_pct'] < high)
+        ]['feats'].to_list()
+        cols = [col for col in cols if col not in exception_list]
+        if len(cols) == 0:
+            continue
+
+        output_data = transformer(
+            capping_method=capping_method, tail='both', fold=stage_fold, variables=cols, missing_values='ignore'
+        ).fit_transform(output_data)
+        if target is not None and transformer is OutlierTrimmer:
+            target = target.drop(target.index.difference(output_data.index))
+
+    return output_data if target is None else (output_data, target)
+
+
+@pytest.fixture(scope='module')
+def staged():
+    # a feature for each stage, and one with too many outliers to handle
+    rng = np.random.default_rng(0)
+    n_rows = 3000
+    data = pd.DataFrame({
+        'normal_trim': rng.normal(size=n_rows),
+        'normal_cap': np.concatenate([
+            rng.normal(0, 0.1, n_rows - 180), rng.normal(10, 0.1, 90), rng.normal(-10, 0.1, 90)
+        ]),
+        'skewed_trim': rng.lognormal(0, 0.5, n_rows),
+        'skewed_cap': np.concatenate([rng.exponential(1, n_rows - 400), rng.exponential(20, 400)]),
+        'skipped': rng.standard_cauchy(n_rows),
+    })
+    data.loc[::97, 'normal_trim'] = np.nan
+    data.loc[::89, 'skewed_cap'] = np.nan
+    return data
+
+
+@pytest.fixture(scope='module')
+def numeric(telco):
+    # skewed and normal features, with missing values, next to the Telco ones
+    rng = np.random.default_rng(0)
+    data = telco.select_dtypes('number').copy()
+    data['lognormal'] = rng.lognormal(size=len(data))
+    data['normal'] = rng.normal(size=len(data))
+    data.loc[::50, 'normal'] = np.nan
+    return data
+
+
+@pytest.mark.parametrize('fold', [1.5, 3])
+def test_outlier_stats_match_baseline(numeric, fold):
+    expected = baseline_check_outlier(numeric, fold)
+
+    pd.testing.assert_frame_equal(check_outlier(numeric, fold), expected)
+    pd.testing.assert_frame_equal(outlier_stats(numeric, fold), expected)
+
+    for col in numeric.columns:
+        assert find_skewed_boundaries(numeric, col, fold) == baseline_find_skewed_boundaries(numeric, col, fold)
+
+    # the summary keeps the skewness and counts of the features
+    summary = outlier_summary(numeric, fold)
+    assert summary['feats'].to_list() == expected['feats'].to_list()
+    assert summary['tot_outlier'].to_list() == expected['tot_outlier'].to_list()
+
+
+@pytest.mark.parametrize('exception_list, fold', [([], 1.5), (['skewed_trim'], 3)])
+def test_trim_cap_outliers_matches_baseline(staged, exception_list, fold):
+    plan = plan_outliers(staged)
+    assert plan['action'].to_list() == ['trim', 'cap', 'trim', 'cap', 'skip']
+    assert plan['dist'].to_list() == ['normal', 'normal', 'skewed', 'skewed', 'skewed']
+
+    target = pd.Series(np.arange(len(staged)) % 2, index=staged.index)
+
+    expected, expected_target = baseline_trim_cap_outliers(staged, exception_list, target, fold)
+    actual, actual_target = trim_cap_outliers(staged, exception_list, target, fold)
+
+    pd.testing.assert_frame_equal(actual, expected)
+    pd.testing.assert_series_equal(actual_target, expected_target)
+    pd.testing.assert_frame_equal(trim_cap_outliers(staged, exception_list, fold=fold), expected)
+
+
+def test_sketch_csv_read_csv_kwargs():
+    actual = check_outlier(DATA_PATH, chunksize=500, usecols=['tenure', 'TotalCharges'])
+    assert actual['feats'].to_list() == ['tenure', 'TotalCharges']
+
+
+def _trim_x(data, target):
+    # trim the rows whose x is beyond [0, 10]
+    return apply_outlier_boundaries(
+        data, ['x'], np.array([True]), np.array([10.0]), np.array([0.0]), target
+    )
+
+
+def test_trim_target_reordered_index():
+    data = pd.DataFrame({'x': [1.0, 50.0, 3.0, -5.0, 4.0]}, index=[10, 11, 12, 13, 14])
+    target = pd.Series(['a', 'b', 'c', 'd', 'e'], index=data.index)[::-1]
+
+    output_data, output_target = _trim_x(data, target)
+
+    # the target follows the rows kept in the data, in their order
+    assert output_target.index.equals(output_data.index)
+    assert output_target.to_list() == ['a', 'c', 'e']
+
+
+@pytest.mark.parametrize('duplicated', ['data', 'target'])
+def test_trim_target_duplicate_index(duplicated):
+    data = pd.DataFrame({'x': [1.0, 50.0, 3.0]}, index=[0, 1, 2])
+    target = pd.Series([0, 1, 0], index=[2, 1, 0])
+    if duplicated == 'data':
+        data.index = [0, 0, 2]
+    else:
+        target.index = [2, 2, 0]
+
+    with pytest.raises(ValueError, match='unique indexes'):
+        _trim_x(data, target)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import DATA_PATH
+from packages.checker import check_unique
+from packages.outlier_handling import check_dist, check_outlier
+
+
+def baseline_check_unique(data, col_type='both'):
+    # counted in the current process, as before `n_jobs`
+    col_type = ['number', 'object'] if col_type == 'both' else col_type
+    data_unique_count = pd.DataFrame.from_records(
+        [(col, data[col].nunique()) for col in data.select_dtypes(include=col_type).columns],
+        columns=['feats', 'num_unique']
+    )
+    data_unique_count['pct_unique'] = data_unique_count['num_unique'] / data.shape[0] * 100
+    return data_unique_count
+
+
+@pytest.fixture(scope='module')
+def telco():
+    data = pd.read_csv(DATA_PATH)
+    data['TotalCharges'] = pd.to_numeric(data['TotalCharges'], errors='coerce')
+
+    # skewed, normal, integer and boolean columns next to the Telco ones
+    rng = np.random.default_rng(0)
+    data['lognormal'] = rng.lognormal(size=len(data))
+    data['normal'] = rng.normal(size=len(data)).astype(np.float32)
+    data['count'] = rng.poisson(3, size=len(data))
+    data['flag'] = rng.random(len(data)) < 0.2
+    return data
+
+
+@pytest.mark.parametrize('col_type', ['number', 'object', 'both'])
+def test_check_unique_n_jobs_matches_baseline(telco, col_type):
+    expected = baseline_check_unique(telco, col_type)
+
+    pd.testing.assert_frame_equal(check_unique(telco, col_type), expected)
+    pd.testing.assert_frame_equal(check_unique(telco, col_type, n_jobs=2), expected)
+
+
+def test_check_dist_n_jobs_matches_serial(telco):
+    numeric = telco.select_dtypes('number')
+
+    pd.testing.assert_frame_equal(check_dist(numeric, n_jobs=2), check_dist(numeric), check_exact=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize('fold', [1.5, 3])
+def test_check_outlier_n_jobs_matches_serial(telco, fold):
+    numeric = telco.select_dtypes('number')
+
+    pd.testing.assert_frame_equal(
+        check_outlier(numeric, fold, n_jobs=2), check_outlier(numeric, fold), check_exact=False, rtol=1e-9
+    )
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import pandas as pd
+import pytest
+
+from conftest import DATA_PATH
+from packages.checker import check_unique, check_missing, check_missing_special
+from packages.profiler import profile
+
+
+MISSVALS = (' ', 'No internet service', 'No phone service')
+
+
+@pytest.fixture(scope='module')
+def telco():
+    return pd.read_csv(DATA_PATH)
+
+
+@pytest.mark.parametrize('chunksize', [100, 1000, 100_000])
+@pytest.mark.parametrize('col_type', ['number', 'object', 'both'])
+def test_exact_profile_matches_in_memory(telco, chunksize, col_type):
+    # TotalCharges is read as numbers in the chunks without a blank string and as text in the others
+    data_unique, data_missing, data_missing_special = profile(
+        DATA_PATH, *MISSVALS, col_type=col_type, chunksize=chunksize
+    )
+
+    pd.testing.assert_frame_equal(data_unique, check_unique(telco, col_type))
+    pd.testing.assert_frame_equal(data_missing, check_missing(telco))
+    pd.testing.assert_frame_equal(data_missing_special, check_missing_special(telco, *MISSVALS))
+
+
+def test_approx_profile_does_not_depend_on_chunks():
+    counts = [
+        profile(DATA_PATH, chunksize=chunksize, approx_distinct=True)[0].set_index('feats')['num_unique']
+        for chunksize in (100, 100_000)
+    ]
+
+    pd.testing.assert_series_equal(counts[0], counts[1])
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+from packages.quantile_sketch import KLLSketch
+
+
+QUANTILES = np.linspace(0.01, 0.99, 99)
+
+
+def rank_error(sketch, values):
+    # distance between the requested ranks and the exact ranks of the estimated quantiles
+    exact = np.sort(values)
+    ranks = np.searchsorted(exact, sketch.quantile(QUANTILES), side='right') / len(exact)
+    return np.abs(ranks - QUANTILES)
+
+
+def test_exact_below_capacity():
+    values = np.random.default_rng(0).normal(size=150)
+    sketch = KLLSketch(k=200).update(values)
+
+    # nothing is compacted, the quantiles are the exact ones of the values
+    np.testing.assert_array_equal(sketch.quantile(QUANTILES), np.quantile(values, QUANTILES, method='inverted_cdf'))
+    assert sketch.rank(np.median(values)) == np.count_nonzero(values <= np.median(values))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_rank_error_bound(seed):
+    values = np.random.default_rng(seed).lognormal(size=100_000)
+    sketch = KLLSketch(seed=seed)
+    for chunk in np.array_split(values, 37):
+        sketch.update(chunk)
+
+    errors = rank_error(sketch, values)
+    assert errors.max() < 0.02
+    assert errors.mean() < 0.01
+
+    # the memory does not grow with the number of values, the weight matches it
+    assert sum(len(compactor) for compactor in sketch.compactors) < 3 * sketch.k + len(sketch.compactors)
+    assert sketch.rank(sketch.max) == sketch.n == len(values)
+    assert (sketch.min, sketch.max) == (values.min(), values.max())
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_merge_partitions(seed):
+    rng = np.random.default_rng(seed)
+    partitions = [rng.normal(loc, 1, rng.integers(1, 30_000)) for loc in range(8)]
+    values = np.concatenate(partitions)
+
+    sketch = KLLSketch(seed=seed)
+    for partition in partitions:
+        sketch.merge(KLLSketch(seed=seed).update(partition))
+    sketch.merge(KLLSketch())
+
+    errors = rank_error(sketch, values)
+    assert errors.max() < 0.02
+    assert errors.mean() < 0.01
+
+    assert sketch.rank(sketch.max) == sketch.n == len(values)
+    assert (sketch.min, sketch.max) == (values.min(), values.max())
+    np.testing.assert_array_equal(sketch.quantile([0, 1]), [values.min(), values.max()])
+
+
+def test_missing_and_empty():
+    sketch = KLLSketch().update([np.nan, np.nan])
+
+    assert sketch.n == 0
+    assert np.isnan(sketch.quantile(0.5))
+    assert sketch.update([1.0, np.nan, 3.0]).quantile(1) == 3.0
+
+    with pytest.raises(ValueError, match='at least 8'):
+        KLLSketch(k=4)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+import search
+from search import make_configs, successive_halving, split_cores, init_worker, run_trial
+
+
+class SerialExecutor:
+    # runs each trial right away in this process
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+
+def fake_trial(trial_id, config, epochs, patience):
+    # a distinct loss per configuration, shrinking with the budget
+    return {'trial': trial_id, **config, 'epochs_budget': epochs, 'val_loss': (trial_id * 7 % 29 + 1) / epochs}
+
+
+def baseline_search(configs, epochs):
+    # every configuration trained for the whole budget
+    return [fake_trial(trial_id, config, epochs, None) for trial_id, config in enumerate(configs)]
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    monkeypatch.setattr(search, 'run_trial', fake_trial)
+
+
+def test_make_configs():
+    grid = make_configs('grid')
+    assert len(grid) == 4 * 4 * 4 * 3
+    assert len({tuple(config.values()) for config in grid}) == len(grid)
+
+    sample = make_configs('random', n_trials=10, seed=0)
+    assert sample == make_configs('random', n_trials=10, seed=0)
+    assert len(sample) == 10 and all(config in grid for config in sample)
+    assert len(make_configs('random', n_trials=1000)) == len(grid)
+
+
+def test_split_cores():
+    cores = split_cores(2)
+    assert len(cores) == 2 and all(cores)
+
+
+def test_without_halving_matches_exhaustive_search(fake):
+    configs = make_configs('random', n_trials=9)
+    results = successive_halving(SerialExecutor(), configs, 1, 9, eta=1, patience=2)
+
+    assert [dict(result, rung=None) for result in results] == [
+        dict(result, rung=None) for result in baseline_search(configs, 9)
+    ]
+
+
+def test_halving_keeps_the_best_trials(fake):
+    configs = make_configs('random', n_trials=27)
+    results = successive_halving(SerialExecutor(), configs, 1, 9, eta=3, patience=2)
+
+    # 27 trials for 1 epoch, the best 9 for 3 epochs, the best 3 for 9 epochs
+    rungs = [[result for result in results if result['rung'] == rung] for rung in range(3)]
+    assert [len(rung) for rung in rungs] == [27, 9, 3]
+    assert [{result['epochs_budget'] for result in rung} for rung in rungs] == [{1}, {3}, {9}]
+
+    # the same winners as ranking the exhaustive search, with the loss ranking the same at any budget
+    ranked = sorted(baseline_search(configs, 9), key=lambda result: result['val_loss'])
+    assert {result['trial'] for result in rungs[1]} == {result['trial'] for result in ranked[:9]}
+    assert {result['trial'] for result in rungs[2]} == {result['trial'] for result in ranked[:3]}
+    assert min(rungs[2], key=lambda result: result['val_loss'])['trial'] == ranked[0]['trial']
+
+
+def test_halving_stops_at_one_trial(fake):
+    results = successive_halving(SerialExecutor(), make_configs('random', n_trials=4), 1, 100, eta=4, patience=2)
+    assert [result['rung'] for result in results] == [0] * 4 + [1]
+
+
+@pytest.fixture(scope='module')
+def sets():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 5)).astype('float32')
+    y = (X[:, 0] + rng.normal(scale=0.5, size=200) > 0).astype('float32')
+    return {'train': (X[:150], y[:150]), 'valid': (X[150:], y[150:])}
+
+
+def test_pool_matches_serial_trials(sets, monkeypatch):
+    configs = make_configs('random', n_trials=2)
+
+    # trials run in a spawned worker, as by `main`
+    context = multiprocessing.get_context('spawn')
+    core_queue = context.Queue()
+    core_queue.put(split_cores(1)[0])
+    with ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=context,
+        initializer=init_worker,
+        initargs=(sets, core_queue, 'sequential_tuned', 42)
+    ) as executor:
+        results = successive_halving(executor, configs, 2, 4, eta=2, patience=2)
+
+    # the same trials trained one by one in this process
+    monkeypatch.setattr(search, '_worker', {'sets': sets, 'cores': [0], 'model_name': 'sequential_tuned', 'seed': 42})
+    for result in results:
+        expected = run_trial(result['trial'], configs[result['trial']], result['epochs_budget'], 2)
+        assert result['epochs_run'] == expected['epochs_run']
+        assert result['val_loss'] == pytest.approx(expected['val_loss'], rel=1e-4)
+        assert result['val_accuracy'] == pytest.approx(expected['val_accuracy'], rel=1e-4)
+
+    assert [result['rung'] for result in results] == [0, 0, 1]
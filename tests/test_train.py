@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import hashlib
+
+import joblib
+import pytest
+
+from conftest import ROOT_DIR, DATA_PATH
+from train import save_artifacts
+
+BACKEND_MODEL_DIR = ROOT_DIR / 'deployment' / 'backend' / 'models'
+
+
+@pytest.fixture(scope='module')
+def artifacts():
+    from tensorflow import keras
+
+    scaler = joblib.load(BACKEND_MODEL_DIR / 'scaler.pkl')
+    encoder = joblib.load(BACKEND_MODEL_DIR / 'encoder.pkl')
+    model = keras.models.load_model(BACKEND_MODEL_DIR / 'keras_model.h5')
+    return scaler, encoder, model
+
+
+def test_save_artifacts_exports_a_complete_set(tmp_path, artifacts):
+    save_artifacts(tmp_path, *artifacts, data_path=DATA_PATH)
+
+    # the serving models are derived, and the manifest lists every artifact as written
+    manifest = json.loads((tmp_path / 'manifest.json').read_text())
+    assert set(manifest) == {
+        'scaler.pkl', 'encoder.pkl', 'keras_model.h5', 'churn_model.tflite', 'churn_pipeline.npz', 'churn_model.npz'
+    }
+    for name, digest in manifest.items():
+        assert hashlib.blake2b((tmp_path / name).read_bytes(), digest_size=16).hexdigest() == digest
+
+    # nothing is left from the staging directory
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(list(manifest) + ['manifest.json'])
+
+
+def test_save_artifacts_refuses_stale_serving_models(tmp_path, artifacts):
+    save_artifacts(tmp_path, *artifacts, export=False)
+    assert not (tmp_path / 'manifest.json').exists()
+
+    (tmp_path / 'churn_model.npz').write_bytes(b'')
+    with pytest.raises(ValueError, match='churn_model.npz'):
+        save_artifacts(tmp_path, *artifacts, export=False)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Train the churn model and write the scaler, encoder, model and serving artifacts
+
+Reproduces the training of the notebook: typed and imputed data from the
+cache of `packages.data_cache`, stratified splits, scaling, SMOTENC
+oversampling and one hot encoding from `packages.preprocessing`, then a
+model of `packages.modeling` trained on cached and prefetched tf.data
+pipelines with early stopping.
+
+Example: `python train.py --model sequential_tuned --model-dir models --intra-op-threads 4`
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import subprocess
+from pathlib import Path
+
+import joblib
+
+
+# backend exporting the serving models and the manifest of the artifacts
+BACKEND_DIR = Path(__file__).resolve().parent / 'deployment' / 'backend'
+
+# artifacts derived from the Keras model by the export
+DERIVED_NAMES = ('churn_model.tflite', 'churn_pipeline.npz', 'churn_model.npz')
+
+
+def save_artifacts(model_dir, scaler, encoder, model, export=True, data_path=None):
+    """
+    Write the artifacts and the serving models derived from them, then swap them in as a set
+
+    The scaler, encoder and Keras model are written to a staging directory
+    inside `model_dir`, where `deployment/backend/export_model.py` derives the
+    TFLite and .npz models and writes the manifest of the set. Every file is
+    then renamed into `model_dir`, the manifest last: the backend only reloads
+    the artifacts when the manifest changes, and only if they all match it.
+    Nothing is swapped in when the export fails, e.g. when the reduced
+    precisions of the .npz model lose accuracy on the held-out customers.
+
+    Parameters
+    ----------
+    model_dir : str or pathlib.Path
+        Directory of the artifacts
+    scaler : sklearn.compose.ColumnTransformer
+        Fitted scaler
+    encoder : sklearn.compose.ColumnTransformer
+        Fitted encoder
+    model : keras.Model
+        Trained model
+    export : bool
+        Derive the serving models. Without them, `model_dir` must not hold
+        serving models that would be left stale
+    data_path : str or pathlib.Path
+        Telco churn CSV for the precision check of the export, skipped when None
+    """
+
+    model_dir = Path(model_dir)
+    model_dir.mkdir(parents=True, exist_ok=True)
+
+    if not export:
+        stale = [name for name in DERIVED_NAMES + ('manifest.json',) if (model_dir / name).exists()]
+        if stale:
+            raise ValueError(f'{", ".join(stale)} in {model_dir} would be left stale, export them too')
+
+    # the staging directory is on the same file system, so every rename is atomic
+    staging_dir = model_dir / f'.staging-{os.getpid()}'
+    staging_dir.mkdir()
+
+    try:
+        joblib.dump(scaler, staging_dir / 'scaler.pkl')
+        joblib.dump(encoder, staging_dir / 'encoder.pkl')
+        model.save(staging_dir / 'keras_model.h5')
+
+        if export:
+            command = [sys.executable, 'export_model.py', '--model-dir', str(staging_dir.resolve())]
+            if data_path is None:
+                command.append('--no-precision-check')
+            else:
+                command.extend(['--data', str(Path(data_path).resolve())])
+            subprocess.run(command, cwd=BACKEND_DIR, check=True)
+
+        names = sorted(path.name for path in staging_dir.iterdir() if path.name != 'manifest.json')
+        if export:
+            names.append('manifest.json')
+        for name in names:
+            os.replace(staging_dir / name, model_dir / name)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default='data/WA_Fn-UseC_-Telco-Customer-Churn.csv')
+    parser.add_argument('--model-dir', default='models')
+    parser.add_argument('--model', default='sequential_tuned', help='one of packages.modeling.MODELS')
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--batch-size', type=int, default=128)
+    parser.add_argument('--patience', type=int, default=10, help='epochs without val_loss improvement before stopping')
+    parser.add_argument('--shuffle-buffer', type=int, default=0, help='shuffle buffer of the training set, 0 for no shuffling')
+    parser.add_argument('--no-smote', action='store_true', help='train without SMOTENC oversampling')
+    parser.add_argument('--intra-op-threads', type=int, help='TensorFlow threads inside an operation')
+    parser.add_argument('--inter-op-threads', type=int, help='TensorFlow operations run in parallel')
+    parser.add_argument('--deterministic', action='store_true', help='use deterministic TensorFlow ops')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--dry-run', action='store_true', help='train and evaluate without writing the artifacts')
+    parser.add_argument('--no-export', action='store_true',
+                        help='write the scaler, encoder and Keras model only, in a directory without serving models')
+    args = parser.parse_args()
+
+    from packages.data_cache import load_cached
+    from packages.preprocessing import prepare_sets
+    from packages.modeling import configure_threads, make_dataset, build_model
+
+    import tensorflow as tf
+    from tensorflow import keras
+
+    # the thread pools can only be set before TensorFlow runs anything
+    configure_threads(args.intra_op_threads, args.inter_op_threads)
+    keras.utils.set_random_seed(args.seed)
+    if args.deterministic:
+        tf.config.experimental.enable_op_determinism()
+
+    start = time.perf_counter()
+
+    # load the typed and imputed dataset, then split, scale, oversample and encode it
+    data = load_cached(args.data, float_dtype='float64')
+    sets, scaler, encoder = prepare_sets(data, smote=not args.no_smote, seed=args.seed)
+    prepared = time.perf_counter()
+
+    for name, (X, y) in sets.items():
+        print(f'{name:>5}: X {X.shape} {X.dtype}, churn rate {y.mean():.3f}')
+
+    # create tf dataset instances
+    train_dataset = make_dataset(*sets['train'], args.batch_size, args.shuffle_buffer, args.seed)
+    valid_dataset = make_dataset(*sets['valid'], args.batch_size)
+    test_dataset = make_dataset(*sets['test'], args.batch_size)
+
+    model = build_model(args.model, sets['train'][0].shape[1], seed=args.seed)
+
+    early_stopping_cb = keras.callbacks.EarlyStopping(
+        monitor='val_loss',
+        patience=args.patience,
+        restore_best_weights=True
+    )
+
+    history = model.fit(
+        train_dataset,
+        epochs=args.epochs,
+        validation_data=valid_dataset,
+        callbacks=[early_stopping_cb],
+        verbose=0
+    )
+    trained = time.perf_counter()
+
+    loss, accuracy = model.evaluate(test_dataset, verbose=0)
+
+    print(f'epochs: {len(history.history["loss"])}, test loss: {loss:.4f}, test accuracy: {accuracy:.4f}')
+    print(f'prepare: {prepared - start:.2f}s, train: {trained - prepared:.2f}s')
+
+    if not args.dry_run:
+        save_artifacts(args.model_dir, scaler, encoder, model, export=not args.no_export, data_path=args.data)
+        print(f'artifacts written to {args.model_dir}')
+
+
+if __name__ == '__main__':
+    main()